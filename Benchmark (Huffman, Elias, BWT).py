@@ -0,0 +1,455 @@
+##########################
+# Question 2 (Benchmark) #
+##########################
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+# the encoder and the decoder are standalone scripts, so they are loaded from the files next to this one
+ENCODER_FILE_NAME = "Encoder (Huffman, Eias, BWT).py"
+DECODER_FILE_NAME = "Decoder (Huffman, Elias, BWT).py"
+
+DEFAULT_SIZES = [1 << 16, 1 << 18]
+DEFAULT_SEED = 3155
+
+# the keyword arguments of q2_block_encoder for every configuration that is measured
+CONFIGURATIONS = {
+    "huffman": {},
+    "huffman-mtf": {"move_to_front": True},
+    "rans": {"entropy_coder": "rans"},
+    "rans-mtf": {"move_to_front": True, "entropy_coder": "rans"},
+    "huffman-dedup": {"dedup": True},
+}
+
+# the compression levels of the encoder, their options are looked up in COMPRESSION_LEVELS when the encoder is loaded
+LEVEL_CONFIGURATIONS = ["level-%d" % level for level in range(1, 10)]
+
+# (stage, module, attribute) of every function that is timed, a method is given as "Class.method"
+ENCODER_STAGES = [
+    ("dedup", "encoder", "long_match_dedup"),
+    ("bwt", "encoder", "sais_suffix_array"),
+    ("bwt", "encoder", "bwt_from_suffix_array"),
+    ("run_length_encoded_tuples", "encoder", "run_length_encoded_tuples"),
+    ("move_to_front", "encoder", "move_to_front_zero_run"),
+    ("huffman_codes", "encoder", "length_limited_code_lengths"),
+    ("huffman_codes", "encoder", "canonical_code_words"),
+    ("rans_encode", "encoder", "write_rans_symbols"),
+    ("fm_index", "encoder", "fm_index_section"),
+    ("bit_writer_flush", "encoder", "BitWriter.flush"),
+]
+DECODER_STAGES = [
+    ("entropy_decode", "decoder", "decode_block_bwt"),
+    ("rans_decode", "decoder", "read_rans_symbols"),
+    ("invert_bwt", "decoder", "invert_bwt_bytes"),
+    ("restore_long_matches", "decoder", "restore_long_matches"),
+]
+
+ENGLISH_WORDS = ["the", "of", "and", "to", "a", "in", "is", "it", "that", "was", "for", "on", "are", "with", "as",
+                 "his", "they", "be", "at", "one", "have", "this", "from", "or", "had", "by", "word", "but", "what",
+                 "some", "we", "can", "out", "other", "were", "all", "there", "when", "up", "use", "your", "how",
+                 "said", "an", "each", "she", "which", "do", "their", "time", "if", "will", "way", "about", "many",
+                 "then", "them", "write", "would", "like", "so", "these", "her", "long", "make", "thing", "see"]
+LOG_LEVELS = ["INFO", "INFO", "INFO", "INFO", "DEBUG", "DEBUG", "WARN", "ERROR"]
+LOG_PATHS = ["/", "/index.html", "/api/v1/users", "/api/v1/orders", "/static/app.js", "/static/style.css",
+             "/login", "/logout", "/health"]
+
+
+def load_script(module_name, file_name):
+    """
+    Description: load one of the standalone scripts next to this file as a module
+    Written by: Kuah Jia Chen
+    Input: module_name is a string and file_name is the name of the script
+    Return: the loaded module
+    Time complexity (Worst case) : O(S), where S is the size of the script
+    Space complexity:
+        Input: O(1)
+        Aux: O(S), where S is the size of the script
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def random_corpus(generator, size):
+    """
+    Description: generate size uniformly random bytes, which cannot be compressed
+    Written by: Kuah Jia Chen
+    Input: generator is a random.Random and size is a non-negative integer
+    Return: the corpus as a bytes object
+    Time complexity (Worst case) : O(N), where N is the size
+    Space complexity:
+        Input: O(1)
+        Aux: O(N), where N is the size
+    """
+    return generator.randbytes(size)
+
+
+def english_corpus(generator, size):
+    """
+    Description: generate English-like text, the words are drawn with Zipf-like weights and grouped into
+                 sentences and lines
+    Written by: Kuah Jia Chen
+    Input: generator is a random.Random and size is a non-negative integer
+    Return: the corpus as a bytes object of exactly size bytes
+    Time complexity (Worst case) : O(N), where N is the size
+    Space complexity:
+        Input: O(1)
+        Aux: O(N), where N is the size
+    """
+    weights = [1 / (rank + 1) for rank in range(len(ENGLISH_WORDS))]
+    ans = []
+    length = 0
+
+    while length < size:
+        words = generator.choices(ENGLISH_WORDS, weights, k=generator.randint(4, 16))
+        sentence = " ".join(words).capitalize() + generator.choice([". ", ". ", ", ", "? ", ".\n"])
+        ans.append(sentence)
+        length += len(sentence)
+
+    return "".join(ans).encode("ascii")[:size]
+
+
+def repetitive_corpus(generator, size):
+    """
+    Description: generate a highly repetitive corpus, a short phrase repeated over and over with a rare change
+    Written by: Kuah Jia Chen
+    Input: generator is a random.Random and size is a non-negative integer
+    Return: the corpus as a bytes object of exactly size bytes
+    Time complexity (Worst case) : O(N), where N is the size
+    Space complexity:
+        Input: O(1)
+        Aux: O(N), where N is the size
+    """
+    phrase = b"the quick brown fox jumps over the lazy dog; "
+    ans = bytearray(phrase * (size // len(phrase) + 1))[:size]
+
+    # change about one byte in a thousand
+    for i in range(size // 1000):
+        ans[generator.randrange(size)] = generator.randrange(97, 123)
+
+    return bytes(ans)
+
+
+def log_corpus(generator, size):
+    """
+    Description: generate a log-like corpus, every line has a timestamp, a level, a request path, a status and an id
+    Written by: Kuah Jia Chen
+    Input: generator is a random.Random and size is a non-negative integer
+    Return: the corpus as a bytes object of exactly size bytes
+    Time complexity (Worst case) : O(N), where N is the size
+    Space complexity:
+        Input: O(1)
+        Aux: O(N), where N is the size
+    """
+    ans = []
+    length = 0
+    seconds = 0
+
+    while length < size:
+        seconds += generator.randint(0, 3)
+        line = "2024-05-%02d %02d:%02d:%02d %s GET %s status=%d id=%06d\n" % (
+            1 + seconds // 86400 % 28, seconds // 3600 % 24, seconds // 60 % 60, seconds % 60,
+            generator.choice(LOG_LEVELS), generator.choice(LOG_PATHS), generator.choice([200, 200, 200, 304, 404]),
+            generator.randrange(1000000))
+        ans.append(line)
+        length += len(line)
+
+    return "".join(ans).encode("ascii")[:size]
+
+
+CORPORA = {
+    "random": random_corpus,
+    "english": english_corpus,
+    "repetitive": repetitive_corpus,
+    "log": log_corpus,
+}
+
+
+class StageTimer:
+
+    def __init__(self):
+        """
+        Description: initialise the attributes of an instance of StageTimer, it replaces functions of the loaded
+                     modules with wrappers that add up the time spent in them for each stage
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: None
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        self.seconds = {}
+        self.originals = []
+
+    def wrap(self, stage, owner, attribute):
+        """
+        Description: time every call of owner.attribute as part of stage, a recursive call is only counted once
+        Written by: Kuah Jia Chen
+        Input: stage is a string, owner is a module or a class and attribute is the name of a function in owner
+        Return: None
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        function = getattr(owner, attribute)
+        depth = [0]
+        self.seconds.setdefault(stage, 0.0)
+
+        def timed(*args, **kwargs):
+            if depth[0] > 0:
+                return function(*args, **kwargs)
+
+            depth[0] += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                depth[0] -= 1
+
+        self.originals.append((owner, attribute, function))
+        setattr(owner, attribute, timed)
+
+    def restore(self):
+        """
+        Description: put the original functions back
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: None
+        Time complexity (Worst case) : O(F), where F is the number of wrapped functions
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        for owner, attribute, function in reversed(self.originals):
+            setattr(owner, attribute, function)
+        self.originals = []
+
+
+def wrap_stages(timer, modules, stages):
+    """
+    Description: wrap the function of every stage with the timer
+    Written by: Kuah Jia Chen
+    Input: timer is a StageTimer, modules is a dictionary from a module name to the module and stages is a list of
+           (stage, module name, attribute) tuples
+    Return: None
+    Time complexity (Worst case) : O(F), where F is the length of stages
+    Space complexity:
+        Input: O(F), where F is the length of stages
+        Aux: O(1)
+    """
+    for stage, module_name, attribute in stages:
+        owner = modules[module_name]
+        if "." in attribute:
+            class_name, attribute = attribute.split(".")
+            owner = getattr(owner, class_name)
+        timer.wrap(stage, owner, attribute)
+
+
+def benchmark_one(modules, data, block_options, block_size, directory):
+    """
+    Description: encode data into a block container and decode it back, the blocks are coded in this process so
+                 that every stage can be timed
+    Written by: Kuah Jia Chen
+    Input: modules is a dictionary with the "encoder" and "decoder" modules, data is a bytes object, block_options is
+           a dictionary of keyword arguments for q2_block_encoder, block_size is a positive integer that is used
+           when block_options has no block size and directory is the path of a directory for the temporary files
+    Return: a dictionary with the sizes, the timings and the time of every stage
+    Time complexity (Worst case) : O(N * log N), where N is the length of data
+    Space complexity:
+        Input: O(N), where N is the length of data
+        Aux: O(N), where N is the length of data
+    """
+    encoder = modules["encoder"]
+    decoder = modules["decoder"]
+    input_file_name = os.path.join(directory, "input.bin")
+    output_file_name = os.path.join(directory, "output.bin")
+
+    input_file = open(input_file_name, "wb")
+    input_file.write(data)
+    input_file.close()
+
+    options = {"block_size": block_size}
+    options.update(block_options)
+
+    timer = StageTimer()
+    wrap_stages(timer, modules, ENCODER_STAGES + DECODER_STAGES)
+
+    try:
+        start = time.perf_counter()
+        encoder.q2_block_encoder(input_file_name, output_file_name, workers=1, **options)
+        encode_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        recovered = decoder.q2_block_decoder(output_file_name, workers=1)
+        decode_seconds = time.perf_counter() - start
+    finally:
+        timer.restore()
+
+    if recovered != data:
+        raise ValueError("the decoded bytes do not match the input")
+
+    output_size = os.path.getsize(output_file_name)
+
+    return {
+        "input_bytes": len(data),
+        "output_bytes": output_size,
+        "ratio": round(len(data) / output_size, 4),
+        "bits_per_byte": round(8 * output_size / len(data), 4),
+        "encode_seconds": round(encode_seconds, 4),
+        "decode_seconds": round(decode_seconds, 4),
+        "encode_mb_per_s": round(len(data) / encode_seconds / 1e6, 4),
+        "decode_mb_per_s": round(len(data) / decode_seconds / 1e6, 4),
+        "stages": {stage: round(seconds, 4) for stage, seconds in timer.seconds.items()},
+    }
+
+
+def run_benchmark(corpora, sizes, configurations, block_size, seed=DEFAULT_SEED):
+    """
+    Description: run every configuration on every corpus at every size, the corpora only depend on the seed so the
+                 sizes and ratios of two runs can be compared directly
+    Written by: Kuah Jia Chen
+    Input: corpora, sizes and configurations are lists of corpus names, positive integers and configuration names,
+           block_size is a positive integer and seed is an integer
+    Return: the report as a dictionary
+    Time complexity (Worst case) : O(C * K * S * log S), where C is the number of corpora, K is the number of
+                                   configurations and S is the largest size
+    Space complexity:
+        Input: O(1)
+        Aux: O(S + R), where S is the largest size and R is the number of results
+    """
+    modules = {"encoder": load_script("bwt_encoder", ENCODER_FILE_NAME),
+               "decoder": load_script("bwt_decoder", DECODER_FILE_NAME)}
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for corpus in corpora:
+            for size in sizes:
+                data = CORPORA[corpus](random.Random("%s-%d-%d" % (corpus, size, seed)), size)
+
+                for configuration in configurations:
+                    result = {"corpus": corpus, "size": size, "configuration": configuration}
+                    result.update(benchmark_one(modules, data, configuration_options(modules, configuration),
+                                                block_size, directory))
+                    results.append(result)
+
+                    print("%-10s %8d %-13s ratio %7.3f  encode %6.3f MB/s  decode %6.3f MB/s" % (
+                        corpus, size, configuration, result["ratio"], result["encode_mb_per_s"],
+                        result["decode_mb_per_s"]), file=sys.stderr)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "block_size": block_size,
+        "seed": seed,
+        "results": results,
+        "levels": summarise_levels(modules, results),
+    }
+
+
+def configuration_options(modules, configuration):
+    """
+    Description: get the keyword arguments of q2_block_encoder for a configuration or a compression level
+    Written by: Kuah Jia Chen
+    Input: modules is a dictionary with the "encoder" module and configuration is a name in CONFIGURATIONS or
+           LEVEL_CONFIGURATIONS
+    Return: a dictionary of keyword arguments for q2_block_encoder
+    Time complexity (Worst case) : O(1)
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    if configuration in LEVEL_CONFIGURATIONS:
+        return modules["encoder"].level_options(int(configuration[len("level-"):]))
+
+    return CONFIGURATIONS[configuration]
+
+
+def summarise_levels(modules, results):
+    """
+    Description: summarise the speed and the ratio of every compression level that was run, over all the corpora
+                 and sizes and for each corpus, so that a level can be chosen for a workload
+    Written by: Kuah Jia Chen
+    Input: modules is a dictionary with the "encoder" module and results is the list of results of run_benchmark
+    Return: a dictionary from the level to its options, its overall ratio and speeds, and its ratio and speeds on
+            each corpus
+    Time complexity (Worst case) : O(R), where R is the length of results
+    Space complexity:
+        Input: O(R), where R is the length of results
+        Aux: O(L * C), where L is the number of levels and C is the number of corpora
+    """
+    totals = {}
+
+    for result in results:
+        if result["configuration"] not in LEVEL_CONFIGURATIONS:
+            continue
+
+        level = result["configuration"][len("level-"):]
+        for key in ["all", result["corpus"]]:
+            total = totals.setdefault(level, {}).setdefault(key, [0, 0, 0.0, 0.0])
+            total[0] += result["input_bytes"]
+            total[1] += result["output_bytes"]
+            total[2] += result["encode_seconds"]
+            total[3] += result["decode_seconds"]
+
+    summary = {}
+    for level, level_totals in totals.items():
+        summary[level] = {"options": configuration_options(modules, "level-" + level), "corpora": {}}
+
+        for key, (input_bytes, output_bytes, encode_seconds, decode_seconds) in level_totals.items():
+            speed_and_ratio = {
+                "ratio": round(input_bytes / output_bytes, 4),
+                "encode_mb_per_s": round(input_bytes / max(encode_seconds, 1e-9) / 1e6, 4),
+                "decode_mb_per_s": round(input_bytes / max(decode_seconds, 1e-9) / 1e6, 4),
+            }
+
+            if key == "all":
+                summary[level].update(speed_and_ratio)
+            else:
+                summary[level]["corpora"][key] = speed_and_ratio
+
+    return summary
+
+
+if __name__ == '__main__':
+    # retrieve the options from the commandline arguments
+    parser = argparse.ArgumentParser(description="Benchmark the Burrows-Wheeler Transform encoder and decoder")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file to write the JSON report to, - writes to the standard output")
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA), default=None,
+                        help="corpus to run, can be given more than once (default: all)")
+    parser.add_argument("--size", action="append", type=int, default=None,
+                        help="corpus size in bytes, can be given more than once (default: 64 KiB and 256 KiB)")
+    parser.add_argument("--configuration", action="append", choices=sorted(CONFIGURATIONS) + LEVEL_CONFIGURATIONS,
+                        default=None,
+                        help="encoder configuration or compression level to run, can be given more than once "
+                             "(default: all)")
+    parser.add_argument("--block-size", type=int, default=1 << 18)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    arguments = parser.parse_args()
+
+    report = run_benchmark(arguments.corpus or list(CORPORA), arguments.size or DEFAULT_SIZES,
+                           arguments.configuration or list(CONFIGURATIONS) + LEVEL_CONFIGURATIONS,
+                           arguments.block_size, arguments.seed)
+
+    # the keys are sorted so that two reports can be compared with diff
+    report_json = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if arguments.output == "-":
+        sys.stdout.write(report_json)
+    else:
+        output_file = open(arguments.output, "w")
+        output_file.write(report_json)
+        output_file.close()
@@ -2,7 +2,13 @@
 #####  Question 2  #####
 ########################
 
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import os
 import sys
+import types
 
 
 def q2(text, pattern):
@@ -19,189 +25,462 @@ def q2(text, pattern):
              and C is the number of elements in mp_array, and D is the number of elements in the ans list that contain
              the number of matched indices
         """
-    ans = []
-
     # return empty list of text is empty of pattern is empty of length of pattern is greater than length of text
     if not text or not pattern or len(pattern) > len(text):
         return []
 
-    # preprocessing
-    bc_table = bad_character_matrix(pattern)
-    gs_array = good_suffix_array(pattern)
-    mp_array = matched_prefix_array(pattern)
+    # the preprocessing is taken from the cache when the pattern was searched before
+    return compile(pattern).search(text)
 
-    # get the index of wildcard
-    wildcard_index = None
-    for i in range(len(pattern)):
-        if pattern[i] == '.':
-            wildcard_index = i
-            break
 
-    text_index = 0
-    break_pointer, resume_pointer = 0, 0
+class CompiledPattern:
 
-    while text_index < len(text) - len(pattern) + 1:
+    __slots__ = ("pattern", "bc_table", "gs_array", "mp_array", "wildcard_index", "match_shift")
 
-        # pattern index start from the end of pattern
-        pattern_index = len(pattern) - 1
+    def __init__(self, pattern):
+        """
+        Description: initialise an immutable instance of CompiledPattern that holds the preprocessed tables of the
+                     pattern, so the pattern can be searched in many texts without preprocessing it again
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty string that can contain at most 1 wildcard character
+        Return: None
+        Time complexity (Worst case) : O(M), where M is the length of pattern
+        Space complexity:
+            Input: O(M), where M is the length of the pattern
+            Aux: O(M), where M is the length of pattern
+        """
+        if not pattern:
+            raise ValueError("cannot compile an empty pattern")
 
-        while pattern_index >= 0:
+        # preprocessing, the tables are stored as tuples so they cannot be changed after compiling
+        bc_table = types.MappingProxyType(bad_character_table(pattern))
+        object.__setattr__(self, "pattern", pattern)
+        object.__setattr__(self, "bc_table", bc_table)
+        object.__setattr__(self, "gs_array", tuple(good_suffix_array(pattern)))
+        object.__setattr__(self, "mp_array", tuple(matched_prefix_array(pattern)))
 
-            if pattern_index == break_pointer:
-                pattern_index = resume_pointer
-                break_pointer, resume_pointer = -1, -1
-            elif pattern[pattern_index] == '.' or text[text_index + pattern_index] == pattern[pattern_index]:
-                pattern_index -= 1
-            else:  # there is a mismatch character happen at pattern[pattern_index]
-                break_pointer, resume_pointer = -1, -1
+        # get the index of wildcard
+        wildcard_index = None
+        for i in range(len(pattern)):
+            if pattern[i] == '.':
+                wildcard_index = i
                 break
+        object.__setattr__(self, "wildcard_index", wildcard_index)
+        object.__setattr__(self, "match_shift", match_shift(pattern, self.mp_array, wildcard_index))
 
-        shift = 1
+    def __setattr__(self, name, value):
+        """
+        Description: prevent the attributes of the CompiledPattern instance from being changed
+        Written by: Kuah Jia Chen
+        Input: name is a string and value is any value
+        Return: None
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        raise AttributeError("CompiledPattern is immutable")
 
-        # if there is a match
-        if pattern_index < 0:
-            ans.append(text_index)
-            shift = len(pattern) - mp_array[1]
+    def __getstate__(self):
+        """
+        Description: get the preprocessed tables of the CompiledPattern instance so that it can be sent to a worker
+                     process without preprocessing the pattern again
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: a tuple of the pattern and its preprocessed tables
+        Time complexity (Worst case) : O(M), where M is the length of pattern
+        Space complexity:
+            Input: O(1)
+            Aux: O(M), where M is the length of pattern
+        """
+        return (self.pattern, dict(self.bc_table), self.gs_array, self.mp_array, self.wildcard_index,
+                self.match_shift)
 
-            # set the break pointer
-            if wildcard_index is not None:
-                break_pointer = wildcard_index
-            else:
-                break_pointer = mp_array[1] - 1
+    def __setstate__(self, state):
+        """
+        Description: restore the CompiledPattern instance from the tuple of __getstate__
+        Written by: Kuah Jia Chen
+        Input: state is a tuple of the pattern and its preprocessed tables
+        Return: None
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(1)
+        """
+        pattern, bc_table, gs_array, mp_array, wildcard_index, shift_after_match = state
+        object.__setattr__(self, "pattern", pattern)
+        object.__setattr__(self, "bc_table", types.MappingProxyType(bc_table))
+        object.__setattr__(self, "gs_array", gs_array)
+        object.__setattr__(self, "mp_array", mp_array)
+        object.__setattr__(self, "wildcard_index", wildcard_index)
+        object.__setattr__(self, "match_shift", shift_after_match)
 
-            # set the resume pointer
-            if wildcard_index is not None:
-                resume_pointer = wildcard_index - 1
-            else:
-                resume_pointer = 0
+    def __repr__(self):
+        """
+        Description: get the printable representation of the CompiledPattern instance
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: a string
+        Time complexity (Worst case) : O(M), where M is the length of pattern
+        Space complexity:
+            Input: O(1)
+            Aux: O(M), where M is the length of pattern
+        """
+        return "CompiledPattern(" + repr(self.pattern) + ")"
 
-        # if there is a mismatch
-        else:
+    def search(self, text):
+        """
+        Description: find all exact occurrences of the compiled pattern in the text using the boyer moore algorithm
+                     with galil optimization and the preprocessed tables
+        Written by: Kuah Jia Chen
+        Input: text is a string
+        Return: a list that contains the matched indices
+        Time complexity (Worst case) : O(N / M) where N is the length of the text and M is the length of pattern
+        Space complexity:
+            Input: O(N), where N is the length of the text
+            Aux: O(D), where D is the number of elements in the ans list that contain the number of matched indices
+        """
+        ans = []
+        pattern = self.pattern
+        bc_table, gs_array, mp_array = self.bc_table, self.gs_array, self.mp_array
+        wildcard_index = self.wildcard_index
 
-            # check for bad character rule
-
-            # get the number of shift to the wildcard if there is one before the mismatch character
-            wildcard_shift = None
-            if wildcard_index is not None and pattern_index > wildcard_index:
-                wildcard_shift = pattern_index - wildcard_index
-
-            # get the number of shift to the rightmost character that is same as the mismatch character if there is one
-            mismatch_shift = None
-            bc_char_array = bc_table[ord(text[text_index + pattern_index]) - 97]
-            if bc_char_array is not None and bc_char_array[pattern_index] is not None:
-                mismatch_shift = pattern_index - bc_char_array[pattern_index]
-
-            # compare wildcard_shift and mismatch_shift to the get the optimal shift for bad character shift
-            bc_num_shift = None
-            shift_to_wildcard = False
-            if wildcard_shift is not None and mismatch_shift is not None:
-                # choose the smaller one as it is safer
-                if wildcard_shift < mismatch_shift:
-                    bc_num_shift = wildcard_shift
-                    shift_to_wildcard = True  # this indicates that we had chosen to shift to dot
+        if not text or len(pattern) > len(text):
+            return []
+
+        text_index = 0
+        break_pointer, resume_pointer = 0, 0
+
+        while text_index < len(text) - len(pattern) + 1:
+
+            # pattern index start from the end of pattern
+            pattern_index = len(pattern) - 1
+
+            while pattern_index >= 0:
+
+                if pattern_index == break_pointer:
+                    pattern_index = resume_pointer
+                    break_pointer, resume_pointer = -1, -1
+                elif pattern[pattern_index] == '.' or text[text_index + pattern_index] == pattern[pattern_index]:
+                    pattern_index -= 1
+                else:  # there is a mismatch character happen at pattern[pattern_index]
+                    break_pointer, resume_pointer = -1, -1
+                    break
+
+            shift = 1
+
+            # if there is a match
+            if pattern_index < 0:
+                ans.append(text_index)
+                shift = self.match_shift
+
+                # set the break pointer
+                if wildcard_index is not None:
+                    break_pointer = wildcard_index
                 else:
-                    bc_num_shift = mismatch_shift
-            elif wildcard_shift is not None:  # mismatch shift is None
-                bc_num_shift = wildcard_shift
-                shift_to_wildcard = True
-            elif mismatch_shift is not None:
-                bc_num_shift = mismatch_shift
-            else:  # wildcard_shift is None and mismatch_shift is None, shift pattern_index + 1
-                bc_num_shift = pattern_index + 1
-
-            # get the number of shift for good suffix rule
-            gs_num_shift = None
-            select_gs_shift = False
-            select_mp_shift = False
-            gs_value = gs_array[pattern_index + 1]
-
-            # if shift to wildcard, then assigned gs_num_shift to 0 so that we will only shift to wildcard
-            if shift_to_wildcard:
-                gs_num_shift = 0
-            # gs[k + 1] > 0, which means there is substring in pattern matches the suffix
-            elif gs_value is not None:
-                if wildcard_shift is not None:
-                    gs_num_shift = min(len(pattern) - gs_value - 1, wildcard_shift)
-                    # print(gs_num_shift)
+                    break_pointer = mp_array[1] - 1
+
+                # set the resume pointer
+                if wildcard_index is not None:
+                    resume_pointer = wildcard_index - 1
                 else:
-                    gs_num_shift = len(pattern) - gs_value - 1
-                    select_gs_shift = True
-            else:  # gs_value is None, which means gs[k + 1] == 0
-                gs_num_shift = len(pattern) - mp_array[pattern_index]
-                select_mp_shift = True
-
-            # choose the optimal shift
-            shift = max(bc_num_shift, gs_num_shift)
-
-            # set the break and resume pointer for galil optimization
-            if gs_num_shift > bc_num_shift:
-                if select_gs_shift:
-
-                    # set the break pointer
-                    if wildcard_index is not None and (gs_num_shift >= pattern_index or pattern_index < wildcard_index):
-                        break_pointer = wildcard_index
-                    else:
-                        break_pointer = gs_value
+                    resume_pointer = 0
 
-                    # set the resume pointer
-                    if wildcard_index is not None and (gs_num_shift >= pattern_index or pattern_index < wildcard_index):
-                        resume_pointer = wildcard_index - 1
-                    else:
-                        resume_pointer = break_pointer - len(pattern) + pattern_index + 1
+            # if there is a mismatch
+            else:
 
-                elif select_mp_shift:
+                # check for bad character rule
 
-                    # set the break pointer
-                    if wildcard_index is not None:
-                        break_pointer = wildcard_index
+                # get the number of shift to the wildcard if there is one before the mismatch character
+                wildcard_shift = None
+                if wildcard_index is not None and pattern_index > wildcard_index:
+                    wildcard_shift = pattern_index - wildcard_index
+
+                # get the number of shift to the rightmost character that is same as the mismatch character if there is one
+                mismatch_shift = None
+                bc_positions = bc_table.get(text[text_index + pattern_index])
+                if bc_positions is not None:
+                    bc_position_index = bisect.bisect_right(bc_positions, pattern_index) - 1
+                    if bc_position_index >= 0:
+                        mismatch_shift = pattern_index - bc_positions[bc_position_index]
+
+                # compare wildcard_shift and mismatch_shift to the get the optimal shift for bad character shift
+                bc_num_shift = None
+                shift_to_wildcard = False
+                if wildcard_shift is not None and mismatch_shift is not None:
+                    # choose the smaller one as it is safer
+                    if wildcard_shift < mismatch_shift:
+                        bc_num_shift = wildcard_shift
+                        shift_to_wildcard = True  # this indicates that we had chosen to shift to dot
                     else:
-                        break_pointer = mp_array[pattern_index + 1] - 1
+                        bc_num_shift = mismatch_shift
+                elif wildcard_shift is not None:  # mismatch shift is None
+                    bc_num_shift = wildcard_shift
+                    shift_to_wildcard = True
+                elif mismatch_shift is not None:
+                    bc_num_shift = mismatch_shift
+                else:  # wildcard_shift is None and mismatch_shift is None, shift pattern_index + 1
+                    bc_num_shift = pattern_index + 1
+
+                # get the number of shift for good suffix rule
+                gs_num_shift = None
+                select_gs_shift = False
+                select_mp_shift = False
+                gs_value = gs_array[pattern_index + 1]
 
-                    # set the resume pointer
-                    if wildcard_index is not None:
-                        resume_pointer = wildcard_index - 1
+                # if shift to wildcard, then assigned gs_num_shift to 0 so that we will only shift to wildcard
+                if shift_to_wildcard:
+                    gs_num_shift = 0
+                # the wildcard is in the matched suffix, the good suffix and matched prefix values compare it as
+                # a normal character, so only the bad character shift is safe
+                elif wildcard_index is not None and pattern_index < wildcard_index:
+                    gs_num_shift = 0
+                # gs[k + 1] > 0, which means there is substring in pattern matches the suffix
+                elif gs_value is not None:
+                    if wildcard_shift is not None:
+                        gs_num_shift = min(len(pattern) - gs_value - 1, wildcard_shift)
+                        # print(gs_num_shift)
                     else:
-                        resume_pointer = 0
+                        gs_num_shift = len(pattern) - gs_value - 1
+                        select_gs_shift = True
+                else:  # gs_value is None, which means gs[k + 1] == 0
+                    gs_num_shift = len(pattern) - mp_array[pattern_index]
+                    # the wildcard can match the mismatch character, so never shift past it
+                    if wildcard_shift is not None:
+                        gs_num_shift = min(gs_num_shift, wildcard_shift)
+                    select_mp_shift = True
 
-        text_index += shift
+                # choose the optimal shift
+                shift = max(bc_num_shift, gs_num_shift)
 
-    return ans
+                # set the break and resume pointer for galil optimization
+                if gs_num_shift > bc_num_shift:
+                    if select_gs_shift:
+
+                        # set the break pointer
+                        if wildcard_index is not None and (gs_num_shift >= pattern_index or pattern_index < wildcard_index):
+                            break_pointer = wildcard_index
+                        else:
+                            break_pointer = gs_value
+
+                        # set the resume pointer
+                        if wildcard_index is not None and (gs_num_shift >= pattern_index or pattern_index < wildcard_index):
+                            resume_pointer = wildcard_index - 1
+                        else:
+                            resume_pointer = break_pointer - len(pattern) + pattern_index + 1
+
+                    elif select_mp_shift:
+
+                        # set the break pointer
+                        if wildcard_index is not None:
+                            break_pointer = wildcard_index
+                        else:
+                            break_pointer = mp_array[pattern_index + 1] - 1
+
+                        # set the resume pointer
+                        if wildcard_index is not None:
+                            resume_pointer = wildcard_index - 1
+                        else:
+                            resume_pointer = 0
+
+            text_index += shift
+
+        return ans
+
+
+class PatternCache:
+
+    def __init__(self, max_size):
+        """
+        Description: initialise a bounded least recently used cache of CompiledPattern instances keyed by pattern
+        Written by: Kuah Jia Chen
+        Input: max_size is a positive integer, the maximum number of patterns kept in the cache
+        Return: None
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        if max_size < 1:
+            raise ValueError("the size of the pattern cache must be at least 1")
+
+        self.max_size = max_size
+        self.compiled_patterns = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pattern):
+        """
+        Description: get the CompiledPattern of the pattern from the cache, compile it on a miss and evict the least
+                     recently used pattern when the cache is full
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty string
+        Return: a CompiledPattern instance
+        Time complexity (Worst case) : O(1) on a hit, O(M) on a miss, where M is the length of pattern
+        Space complexity:
+            Input: O(M), where M is the length of the pattern
+            Aux: O(M) on a miss, where M is the length of pattern
+        """
+        compiled_pattern = self.compiled_patterns.get(pattern)
+
+        if compiled_pattern is not None:
+            self.hits += 1
+            self.compiled_patterns.move_to_end(pattern)
+            return compiled_pattern
 
+        self.misses += 1
+        compiled_pattern = CompiledPattern(pattern)
+        self.compiled_patterns[pattern] = compiled_pattern
 
-def bad_character_matrix(pattern):
+        if len(self.compiled_patterns) > self.max_size:
+            self.compiled_patterns.popitem(last=False)
+
+        return compiled_pattern
+
+    def info(self):
+        """
+        Description: get the counters of the cache
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: a dictionary with the hits, misses, current size and maximum size of the cache
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.compiled_patterns),
+                "max_size": self.max_size}
+
+    def clear(self):
+        """
+        Description: remove every pattern from the cache and reset the counters
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: None
+        Time complexity (Worst case) : O(S), where S is the number of patterns in the cache
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        self.compiled_patterns.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# the number of bytes read from the text file at a time by the streaming search
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# the largest number of bytes of the text file searched by one task of the parallel search
+MAX_PARTITION_SIZE = 1 << 26
+
+# the compiled pattern of a worker process of the parallel search, set by init_search_worker
+WORKER_PATTERN = None
+
+# the maximum number of compiled patterns kept by compile
+PATTERN_CACHE_SIZE = 4096
+PATTERN_CACHE = PatternCache(PATTERN_CACHE_SIZE)
+
+
+def compile(pattern):
     """
-    Description: create the bad character matrix that contains the elements that will help the boyer moore function
-                 to find the right most occurrence of the mismatch character if there is one
+    Description: get the CompiledPattern of the pattern, repeated patterns are taken from the least recently used
+                 cache without preprocessing them again
+    Written by: Kuah Jia Chen
+    Input: pattern is a non-empty string that can contain at most 1 wildcard character
+    Return: a CompiledPattern instance
+    Time complexity (Worst case) : O(1) on a cache hit, O(M) on a miss, where M is the length of
+                                   pattern
+    Space complexity:
+        Input: O(M), where M is the length of the pattern
+        Aux: O(M) on a miss, where M is the length of pattern
+    """
+    return PATTERN_CACHE.get(pattern)
+
+
+def bad_character_table(pattern):
+    """
+    Description: create the bad character table that maps every character in the pattern to the sorted positions
+                 where it occurs, so the boyer moore function can find the right most occurrence of the mismatch
+                 character on the left of the mismatch with a binary search, for any alphabet
     Written by: Kuah Jia Chen
     Input: pattern is a string
-    Return: a list of list that contains the numbers to achieve bad character rule
-    Time complexity (Worst case) : O(k * M), where k is the number of unique characters in pattern, and M is the length
-                                   of pattern
+    Return: a dictionary that maps a character to a tuple of its positions in pattern in increasing order
+    Time complexity (Worst case) : O(M), where M is the length of pattern
     Space complexity:
         Input: O(M), where M is the length of the pattern
-        Aux: O(k * M), where k is the number of unique characters in pattern, and M is the length of pattern
+        Aux: O(M + k), where k is the number of unique characters in pattern, and M is the length of pattern
     """
-    matrix = [None] * 26
+    positions = {}
 
-    # right to left
-    for i in range(len(pattern) - 1, -1, -1):
+    # left to right so the positions of every character are in increasing order
+    for i in range(len(pattern)):
         current_char = pattern[i]
 
         if current_char == ".":
             continue
 
-        current_index = ord(current_char) - 97
+        if current_char not in positions:
+            positions[current_char] = []
+        positions[current_char].append(i)
 
-        if matrix[current_index] is None:
-            matrix[current_index] = [None] * len(pattern)
+    table = {}
+    for current_char in positions:
+        table[current_char] = tuple(positions[current_char])
 
-        matrix[current_index][i] = i
-        pointer = i
-        while pointer < len(pattern) - 1 and matrix[current_index][pointer + 1] is None:
-            matrix[current_index][pointer + 1] = i
-            pointer += 1
+    return table
 
-    return matrix
+
+def match_shift(pattern, mp_array, wildcard_index):
+    """
+    Description: get the shift after a full match, which is the smallest shift where the pattern still agrees with
+                 itself, the wildcard agrees with every character so the pattern is split around it into left and
+                 right, and each shift only compares left with left, left with right and right with right, which
+                 are looked up in the z arrays of the pieces
+    Written by: Kuah Jia Chen
+    Input: pattern is a string, mp_array is the matched prefix array of pattern and wildcard_index is the index of the
+           wildcard in pattern or None
+    Return: the number of positions to shift the pattern after a match
+    Time complexity (Worst case) : O(M), where M is the length of pattern
+    Space complexity:
+        Input: O(M), where M is the length of the pattern
+        Aux: O(M), where M is the length of the pattern
+    """
+    m = len(pattern)
+
+    if wildcard_index is None:
+        return m - mp_array[1]
+
+    left, right = pattern[:wildcard_index], pattern[wildcard_index + 1:]
+    left_z = z_algorithm(left)
+    right_z = z_algorithm(right)
+    # the separator only stops a match after the whole prefix is matched, so any character other than the wildcard
+    # works even if it is in the pattern
+    left_in_right = z_algorithm(left + "\x00" + right)
+    right_in_left = z_algorithm(right + "\x00" + left)
+
+    for shift in range(1, m):
+        # pattern[i] against pattern[i + shift] when both are in left
+        if shift < wildcard_index and left_z[shift] < wildcard_index - shift:
+            continue
+
+        # pattern[i] in left against pattern[i + shift] in right
+        if shift <= wildcard_index:
+            start = wildcard_index - shift + 1
+            length = min(wildcard_index, m - shift) - start
+            if length > 0 and right_in_left[len(right) + 1 + start] < length:
+                continue
+        else:
+            length = min(wildcard_index, m - shift)
+            if length > 0 and left_in_right[shift] < length:
+                continue
+
+        # pattern[i] against pattern[i + shift] when both are in right
+        if shift < len(right) and right_z[shift] < len(right) - shift:
+            continue
+
+        return shift
+
+    return m
 
 
 def good_suffix_array(pattern):
@@ -394,6 +673,427 @@ def reverse_explicit_comparison(i, string):
     return wildcard_index if wildcard_index != -1 else zbox_left, zbox_right - 1, zbox_right - zbox_left
 
 
+class AhoCorasick:
+
+    def __init__(self, patterns):
+        """
+        Description: initialise the Aho-Corasick automaton of the patterns, a pattern with the wildcard is split
+                     around it into a left piece and a right piece, and every non-empty piece is a keyword of the
+                     automaton, so the patterns are found in one pass over the text
+        Written by: Kuah Jia Chen
+        Input: patterns is a list of strings, each one can contain at most 1 wildcard character
+        Return: None
+        Time complexity (Worst case) : O(M * A), where M is the total length of patterns and A is the number of
+                                       unique characters in patterns
+        Space complexity:
+            Input: O(M), where M is the total length of patterns
+            Aux: O(M), where M is the total length of patterns
+        """
+        # goto[state] maps a character to the next state, fail[state] is the state of the longest proper suffix
+        # that is also in the automaton and output[state] has the pieces that end at state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        self.patterns = list(patterns)
+        # wildcard_index[pattern_id] is the index of the wildcard in the pattern, or None if it has none
+        self.wildcard_index = []
+
+        for pattern_id in range(len(self.patterns)):
+            pattern = self.patterns[pattern_id]
+            wildcard_index = pattern.find(".")
+
+            if pattern.count(".") > 1:
+                raise ValueError("a pattern can contain at most 1 wildcard character: " + pattern)
+
+            if wildcard_index < 0:
+                self.wildcard_index.append(None)
+                if pattern:
+                    self.add_piece(pattern, pattern_id, "whole")
+                continue
+
+            self.wildcard_index.append(wildcard_index)
+            left, right = pattern[:wildcard_index], pattern[wildcard_index + 1:]
+
+            if not left and not right:
+                # a single wildcard is an empty right piece at the root, the failure links copy the output of the
+                # root to every state, so it matches every character of the text
+                self.output[0].append((pattern_id, "right", 0))
+            if left:
+                self.add_piece(left, pattern_id, "left")
+            if right:
+                self.add_piece(right, pattern_id, "right")
+
+        self.build_failure_links()
+
+    def add_piece(self, piece, pattern_id, kind):
+        """
+        Description: insert a piece of a pattern into the trie of the automaton
+        Written by: Kuah Jia Chen
+        Input: piece is a non-empty string, pattern_id is an integer and kind is "whole", "left" or "right"
+        Return: None
+        Time complexity (Worst case) : O(P), where P is the length of piece
+        Space complexity:
+            Input: O(P), where P is the length of piece
+            Aux: O(P), where P is the length of piece
+        """
+        state = 0
+
+        for current_char in piece:
+            next_state = self.goto[state].get(current_char)
+
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][current_char] = next_state
+
+            state = next_state
+
+        self.output[state].append((pattern_id, kind, len(piece)))
+
+    def build_failure_links(self):
+        """
+        Description: compute the failure link of every state in breadth first order, and add the output of the
+                     failure link to the output of every state so that the search only looks at one list
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: None
+        Time complexity (Worst case) : O(M * A), where M is the total length of the pieces and A is the number of
+                                       unique characters in the pieces
+        Space complexity:
+            Input: O(1)
+            Aux: O(M), where M is the total length of the pieces
+        """
+        queue = collections.deque(self.goto[0].values())
+
+        # the failure link of every state of depth 1 is the root
+        for state in queue:
+            self.output[state] = self.output[state] + self.output[0]
+
+        while queue:
+            state = queue.popleft()
+
+            for current_char, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                # follow the failure links of state until one of them has an edge for current_char
+                fail_state = self.fail[state]
+                while fail_state != 0 and current_char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+
+                self.fail[next_state] = self.goto[fail_state].get(current_char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def search(self, text):
+        """
+        Description: find every occurrence of every pattern in one pass over the text, a pattern with the wildcard
+                     at index w occurs at offset o when its left piece ends at o + w - 1 and its right piece ends at
+                     o + m - 1, the offsets of the left pieces wait in a deque for their right piece
+        Written by: Kuah Jia Chen
+        Input: text is a string or any iterable of characters
+        Return: a generator that yields a (pattern_id, offset) tuple as soon as the occurrence ends in the text
+        Time complexity (Worst case) : O(N + Z), where N is the length of the text and Z is the number of pieces
+                                       found
+        Space complexity:
+            Input: O(1)
+            Aux: O(K * M), where K is the number of patterns and M is the length of the longest pattern
+        """
+        # pending[pattern_id] has the offsets whose left piece matched, in increasing order
+        pending = [collections.deque() for i in range(len(self.patterns))]
+        # the occurrences of the patterns that end with the wildcard, which match once one more character is read
+        next_char_matches = []
+        state = 0
+        j = -1
+
+        for current_char in text:
+            j += 1
+
+            for pattern_id, offset in next_char_matches:
+                yield pattern_id, offset
+            next_char_matches = []
+
+            # follow the failure links until there is an edge for current_char
+            while state != 0 and current_char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(current_char, 0)
+
+            for pattern_id, kind, piece_length in self.output[state]:
+                m = len(self.patterns[pattern_id])
+
+                if kind == "whole":
+                    yield pattern_id, j - m + 1
+
+                elif kind == "left":
+                    offset = j - piece_length + 1
+
+                    if piece_length == m - 1:
+                        # the wildcard is the last character, so any next character completes the pattern
+                        next_char_matches.append((pattern_id, offset))
+                    else:
+                        offsets = pending[pattern_id]
+                        # an offset whose right piece would have ended before j can never match
+                        while offsets and offsets[0] + m - 1 < j:
+                            offsets.popleft()
+                        offsets.append(offset)
+
+                else:
+                    offset = j - m + 1
+                    if offset < 0:
+                        continue
+
+                    if self.wildcard_index[pattern_id] == 0:
+                        # the wildcard is the first character, so the right piece is the whole match
+                        yield pattern_id, offset
+                        continue
+
+                    offsets = pending[pattern_id]
+                    while offsets and offsets[0] < offset:
+                        offsets.popleft()
+                    if offsets and offsets[0] == offset:
+                        offsets.popleft()
+                        yield pattern_id, offset
+
+
+def multi_pattern_search(text, patterns):
+    """
+    Description: find all occurrences of all the patterns in the text in one pass, every pattern can contain at most
+                 1 wildcard character
+    Written by: Kuah Jia Chen
+    Input: text is a string and patterns is a list of strings
+    Return: a list of (pattern_id, offset) tuples sorted by offset and then by pattern_id, where pattern_id is the
+            index of the pattern in patterns and offset is 0-based
+    Time complexity (Worst case) : O(M * A + N + Z * log Z), where M is the total length of patterns, A is the number
+                                   of unique characters in patterns, N is the length of the text and Z is the number
+                                   of occurrences
+    Space complexity:
+        Input: O(N + M), where N is the length of the text and M is the total length of patterns
+        Aux: O(M + Z), where M is the total length of patterns and Z is the number of occurrences
+    """
+    ans = list(AhoCorasick(patterns).search(text))
+    ans.sort(key=lambda occurrence: (occurrence[1], occurrence[0]))
+
+    return ans
+
+
+def encode_pattern(pattern):
+    """
+    Description: convert the pattern to the byte string used by the streaming search, the pattern is encoded with
+                 utf-8 and every byte becomes one latin-1 character so that it can be searched in a latin-1 text
+    Written by: Kuah Jia Chen
+    Input: pattern is a string
+    Return: a string with one character for every byte of the utf-8 pattern
+    Time complexity (Worst case) : O(M), where M is the length of pattern
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(M), where M is the length of pattern
+    """
+    return pattern.encode("utf-8").decode("latin-1")
+
+
+def iter_file_search(file_name, pattern, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Description: find all occurrences of the pattern in a file of any size, the file is read in chunks of chunk_size
+                 bytes and the last m - 1 bytes of every chunk are kept in front of the next one, so an occurrence
+                 across two chunks is found exactly once
+    Written by: Kuah Jia Chen
+    Input: file_name is the path of the text file, pattern is a string that can contain at most 1 wildcard character,
+           which matches one byte, and chunk_size is a positive integer
+    Return: a generator that yields the 0-based byte offsets of the occurrences in increasing order
+    Time complexity (Worst case) : O(N / M) where N is the size of the file and M is the length of pattern
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(C + M), where C is chunk_size and M is the length of pattern
+    """
+    if chunk_size < 1:
+        raise ValueError("the chunk size must be at least 1 byte")
+
+    pattern = encode_pattern(pattern)
+    if not pattern:
+        return
+
+    compiled_pattern = compile(pattern)
+    with open(file_name, "rb") as file:
+        for offset in iter_range_search(file, compiled_pattern, 0, None, chunk_size):
+            yield offset
+
+
+def iter_range_search(file, compiled_pattern, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Description: find the occurrences of the compiled pattern that start in the byte range [start, end) of the file,
+                 the file is read in chunks and up to m - 1 bytes after end are read so that an occurrence that
+                 starts before end is complete
+    Written by: Kuah Jia Chen
+    Input: file is an opened binary file object, compiled_pattern is a CompiledPattern of a latin-1 pattern, start is
+           a non-negative integer, end is an integer or None for the end of the file and chunk_size is a positive
+           integer
+    Return: a generator that yields the 0-based byte offsets of the occurrences in increasing order
+    Time complexity (Worst case) : O(N / M) where N is the size of the range and M is the length of pattern
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(C + M), where C is chunk_size and M is the length of pattern
+    """
+    m = len(compiled_pattern.pattern)
+    # the last byte that can be part of an occurrence that starts in the range
+    stop = None if end is None else end + m - 1
+
+    file.seek(start)
+    overlap = ""
+    # the offset in the file of the first character of overlap
+    base_offset = start
+    position = start
+
+    while stop is None or position < stop:
+        read_size = chunk_size if stop is None else min(chunk_size, stop - position)
+        chunk = file.read(read_size)
+        if not chunk:
+            break
+        position += len(chunk)
+
+        # latin-1 maps every byte to one character so the offsets of the characters are the offsets of the bytes
+        text = overlap + chunk.decode("latin-1")
+
+        for offset in compiled_pattern.search(text):
+            if end is not None and base_offset + offset >= end:
+                break
+            yield base_offset + offset
+
+        # an occurrence that starts in the overlap ends in the next chunk, so m - 1 characters are enough
+        keep = min(m - 1, len(text))
+        overlap = text[len(text) - keep:]
+        base_offset += len(text) - keep
+
+
+def init_search_worker(compiled_pattern):
+    """
+    Description: keep the compiled pattern in a worker process of the parallel search, so the preprocessed tables are
+                 sent once to every worker instead of once to every partition
+    Written by: Kuah Jia Chen
+    Input: compiled_pattern is a CompiledPattern instance
+    Return: None
+    Time complexity (Worst case) : O(1)
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(1)
+    """
+    global WORKER_PATTERN
+    WORKER_PATTERN = compiled_pattern
+
+
+def search_partition(file_name, start, end, chunk_size):
+    """
+    Description: find the occurrences of the pattern of the worker process that start in the byte range [start, end)
+                 of the file
+    Written by: Kuah Jia Chen
+    Input: file_name is the path of the text file, start and end are non-negative integers and chunk_size is a
+           positive integer
+    Return: a list of the 0-based byte offsets of the occurrences in increasing order
+    Time complexity (Worst case) : O(N / M) where N is end - start and M is the length of pattern
+    Space complexity:
+        Input: O(1)
+        Aux: O(C + M + D), where C is chunk_size, M is the length of pattern and D is the number of occurrences
+    """
+    with open(file_name, "rb") as file:
+        return list(iter_range_search(file, WORKER_PATTERN, start, end, chunk_size))
+
+
+def parallel_file_search(file_name, pattern, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                         partition_size=MAX_PARTITION_SIZE):
+    """
+    Description: find all occurrences of the pattern in the file with a pool of worker processes, the file is split
+                 into partitions that every worker reads with m - 1 bytes of overlap, and an occurrence belongs to
+                 the partition where it starts, so the occurrences in the overlaps are only reported once, the
+                 partitions are yielded in order and at most 2 * workers partitions are in flight at a time
+    Written by: Kuah Jia Chen
+    Input: file_name is the path of the text file, pattern is a string that can contain at most 1 wildcard character,
+           which matches one byte, workers is a positive integer or None for all cores, chunk_size is a positive
+           integer and partition_size is the largest number of bytes in a partition
+    Return: a generator that yields the 0-based byte offsets of the occurrences in increasing order
+    Time complexity (Worst case) : O(N / (M * W)), where N is the size of the file, M is the length of pattern and
+                                   W is the number of workers
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(W * (C + M + D)), where W is the number of workers, C is chunk_size, M is the length of pattern and D
+             is the largest number of occurrences in a partition
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if chunk_size < 1 or partition_size < 1:
+        raise ValueError("the chunk size and the partition size must be at least 1 byte")
+
+    if workers <= 1:
+        for offset in iter_file_search(file_name, pattern, chunk_size):
+            yield offset
+        return
+
+    pattern = encode_pattern(pattern)
+    if not pattern:
+        return
+
+    compiled_pattern = compile(pattern)
+    file_size = os.path.getsize(file_name)
+
+    # at least one partition for every worker, and more when the partitions would be larger than partition_size
+    partition_count = max(workers, -(-file_size // partition_size))
+    partition_length = max(1, -(-file_size // partition_count))
+
+    pending = collections.deque()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_search_worker,
+                                                      initargs=(compiled_pattern,))
+
+    try:
+        for start in range(0, file_size, partition_length):
+            end = min(start + partition_length, file_size)
+            pending.append(executor.submit(search_partition, file_name, start, end, chunk_size))
+
+            # wait for the oldest partition so that the offsets are yielded in order
+            if len(pending) >= 2 * workers:
+                for offset in pending.popleft().result():
+                    yield offset
+
+        while pending:
+            for offset in pending.popleft().result():
+                yield offset
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def write_offsets(offsets, output_file_name="output_q2.txt"):
+    """
+    Description: write the 1-based offsets to the output file as soon as they are found, "-" writes them to the
+                 standard output
+    Written by: Kuah Jia Chen
+    Input: offsets is an iterable of 0-based integers and output_file_name is a string
+    Return: the number of offsets written
+    Time complexity (Worst case) : O(D), where D is the number of offsets
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    if output_file_name == "-":
+        output_file = sys.stdout
+    else:
+        output_file = open(output_file_name, "w")
+
+    count = 0
+    for offset in offsets:
+        if count > 0:
+            output_file.write("\n")
+        output_file.write(str(offset + 1))
+        count += 1
+
+    if output_file_name == "-":
+        if count > 0:
+            output_file.write("\n")
+        output_file.flush()
+    else:
+        output_file.close()
+
+    return count
+
+
 def read_file(file_path):
     """
     Description: read the input from the input text file
@@ -407,39 +1107,46 @@ def read_file(file_path):
     return line
 
 
-def writeOutput(occurrences):
+def writeOutput(occurrences, output_file_name="output_q2.txt"):
     """
     Description: write the answer to the output file
     Written by: Kuah Jia Chen
-    Input: occurrences is the answer for q2
+    Input: occurrences is the answer for q2 and output_file_name is the name of the output file
     Return: None
     """
-    # open output file with correct name
-    outputFile = open("output_q2.txt", "w")
-
-    if len(occurrences) > 0:
-        outputFile.write(str(occurrences[0] + 1))
-
-    for i in range(1, len(occurrences)):
-        outputFile.write("\n")
-        outputFile.write(str(occurrences[i] + 1))
-
-    # close output file
-    outputFile.close()
+    write_offsets(occurrences, output_file_name)
 
 
 if __name__ == '__main__':
-    # retrieve the file paths from the commandline arguments
-    _, filename1, filename2 = sys.argv
-    print("Number of arguments passed : ", len(sys.argv))
-    # since we know the program takes two arguments
-    print("First argument : ", filename1)
-    print("Second argument : ", filename2)
-    file1content = read_file(filename1)
-    print("\nContent of first file : ", file1content)
-    file2content = read_file(filename2)
-    print("\nContent of second file : ", file2content)
-    text = file1content[0]
-    pat = file2content[0]
-    ans = q2(text, pat)
-    writeOutput(ans)
+    # retrieve the file paths and options from the commandline arguments
+    parser = argparse.ArgumentParser(description="Find the occurrences of a pattern in a text using Boyer-Moore")
+    parser.add_argument("text_file")
+    parser.add_argument("pattern_file")
+    parser.add_argument("--stream", action="store_true",
+                        help="search the text file in chunks of bytes so that it does not have to fit in memory, "
+                             "the offsets are byte offsets")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="number of bytes read at a time by --stream")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of processes that search partitions of the text file in parallel with "
+                             "--stream, 0 uses all cores")
+    parser.add_argument("-o", "--output", default="output_q2.txt",
+                        help="file of the 1-based offsets, - writes them to the standard output")
+    arguments = parser.parse_args()
+
+    if arguments.stream:
+        # the pattern is the first line of the pattern file without its line break
+        pat = read_file(arguments.pattern_file)[0].rstrip("\r\n")
+        workers = arguments.workers if arguments.workers > 0 else None
+        write_offsets(parallel_file_search(arguments.text_file, pat, workers, arguments.chunk_size), arguments.output)
+    else:
+        print("First argument : ", arguments.text_file)
+        print("Second argument : ", arguments.pattern_file)
+        file1content = read_file(arguments.text_file)
+        print("\nContent of first file : ", file1content)
+        file2content = read_file(arguments.pattern_file)
+        print("\nContent of second file : ", file2content)
+        text = file1content[0]
+        pat = file2content[0]
+        ans = q2(text, pat)
+        writeOutput(ans, arguments.output)
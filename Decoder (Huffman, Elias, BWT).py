@@ -2,79 +2,192 @@
 # Question 2 (Decoder) #
 ########################
 
+import argparse
+import array
+import bisect
+import collections
+import concurrent.futures
+import mmap
+import os
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-class BinaryUnPacker:
+# the header, frame, index and footer layout written by q2_block_encoder in the encoder
+CONTAINER_MAGIC = b"Q2BW"
+CONTAINER_VERSION = 4
+FRAME_LENGTH_BYTES = 4
+INDEX_FIELD_BYTES = 8
+FOOTER_MAGIC = b"Q2IX"
+
+# bits of the flags byte of a frame
+FLAG_CANONICAL_HUFFMAN = 1
+FLAG_MOVE_TO_FRONT = 2
+FLAG_FM_INDEX = 4
+FLAG_RANS = 8
+FLAG_DEDUP = 16
+SUPPORTED_FLAGS = FLAG_CANONICAL_HUFFMAN | FLAG_MOVE_TO_FRONT | FLAG_FM_INDEX | FLAG_RANS | FLAG_DEDUP
+
+# the symbols that write a run of move-to-front zeros in bijective base 2
+RUNA = 0
+RUNB = 1
+
+# number of bits the HuffmanDecoder looks up at once, longer code words go to a secondary table
+DEFAULT_HUFFMAN_TABLE_BITS = 11
+
+# the rANS layout written by write_rans_symbols in the encoder
+RANS_PROBABILITY_BITS = 12
+RANS_LOWER_BOUND = 1 << 23
+RANS_STATE_BYTES = 4
+
+# the FM-index counts the occurrences of every byte at every DEFAULT_FM_CHECKPOINT_INTERVAL-th row when it is loaded
+DEFAULT_FM_CHECKPOINT_INTERVAL = 256
+# number of blocks whose FM-index an FMArchive keeps in memory
+DEFAULT_FM_CACHE_SIZE = 4
+
+# number of bits elias_decoder looks up at once, a code word that does not fit is decoded bit by bit
+ELIAS_TABLE_BITS = 16
+
+
+class BitReader:
 
     def __init__(self, file_name):
         """
-        Description: initialise the attributes of an instance of BinaryUnpacker
+        Description: initialise the attributes of an instance of BitReader, a file name is memory mapped and
+                     any other input is read as a bytes-like object, the bits are then served straight from
+                     the bytes
         Written by: Kuah Jia Chen
-        Input: file_name is a string
+        Input: file_name is a string, a bytes-like object or an opened binary file object
         Return: None
-        Time complexity (Worst case) : O(1)
+        Time complexity (Worst case) : O(1) for a file name or bytes, O(N) for a file object, where N is the
+                                       number of bytes in the file
         Space complexity:
             Input: O(1)
-            Aux: O(1)
+            Aux: O(1) for a file name or bytes, O(N) for a file object, where N is the number of bytes in the file
         """
-        self.my_bit_string = []
-        self.file = open(file_name, "rb")
+        self.file = None
+        self.position = 0
+
+        if isinstance(file_name, str):
+            self.file = open(file_name, "rb")
+            file_size = os.fstat(self.file.fileno()).st_size
+            # an empty file cannot be memory mapped
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if file_size > 0 else b""
+        elif isinstance(file_name, (bytes, bytearray, memoryview)):
+            self.data = file_name
+        else:
+            self.data = file_name.read()
+
+        self.bit_length = len(self.data) * 8
 
-    def get_bit_string(self):
+    @classmethod
+    def from_bit_string(cls, bit_string):
         """
-        Description: get the bit string from the file
+        Description: create a BitReader from a string of "0" and "1" characters, the last byte is padded with zeros
         Written by: Kuah Jia Chen
-        Input: None
-        Return: the bit stream represented in bit string form that reads from the binary file
-        Time complexity (Worst case) : O(N + M), where N and M is the length of all bit strings in ans and
-                                       the number of bytes in the file respectively
+        Input: bit_string is a string
+        Return: a BitReader instance
+        Time complexity (Worst case) : O(N), where N is the length of bit_string
+        Space complexity:
+            Input: O(N), where N is the length of bit_string
+            Aux: O(N), where N is the length of bit_string
+        """
+        padding = -len(bit_string) % 8
+        number_of_bytes = (len(bit_string) + padding) // 8
+        value = int(bit_string, 2) << padding if bit_string else 0
+
+        return cls(value.to_bytes(number_of_bytes, byteorder='big'))
+
+    def peek_bits(self, nbits):
+        """
+        Description: get the next nbits bits as an integer without moving the position, the bits after the end of
+                     the data are read as zeros
+        Written by: Kuah Jia Chen
+        Input: nbits is a non-negative integer
+        Return: the next nbits bits as an integer, the first bit is the most significant one
+        Time complexity (Worst case) : O(nbits)
         Space complexity:
             Input: O(1)
-            Aux: O(N), where N is the length of all bit strings in ans
+            Aux: O(nbits)
         """
-        ans = []
+        start_byte = self.position >> 3
+        end_bit = self.position + nbits
+        end_byte = (end_bit + 7) >> 3
 
-        current_byte = self.file.read(1)
+        chunk = self.data[start_byte:end_byte]
+        value = int.from_bytes(chunk, byteorder='big')
 
-        while current_byte:
-            # read the byte
-            current_byte = bin(int.from_bytes(current_byte, byteorder='big'))
+        # pad the bytes after the end of the data with zeros
+        value <<= (end_byte - start_byte - len(chunk)) * 8
 
-            # exclude the prefix "0b"
-            current_byte = current_byte[2:]
+        return (value >> ((end_byte << 3) - end_bit)) & ((1 << nbits) - 1)
 
-            # add leading zero(s)
-            current_byte = self.add_leading_zero(current_byte)
+    def read_bits(self, nbits):
+        """
+        Description: get the next nbits bits as an integer and move the position past them
+        Written by: Kuah Jia Chen
+        Input: nbits is a non-negative integer
+        Return: the next nbits bits as an integer, the first bit is the most significant one
+        Time complexity (Worst case) : O(nbits)
+        Space complexity:
+            Input: O(1)
+            Aux: O(nbits)
+        """
+        value = self.peek_bits(nbits)
+        self.position += nbits
+        return value
 
-            ans.append(current_byte)
+    def read_bytes(self, nbytes):
+        """
+        Description: skip to the next byte boundary and get the next nbytes bytes as they are
+        Written by: Kuah Jia Chen
+        Input: nbytes is a non-negative integer
+        Return: the bytes as a bytes-like object
+        Time complexity (Worst case) : O(nbytes)
+        Space complexity:
+            Input: O(1)
+            Aux: O(nbytes)
+        """
+        start_byte = (self.position + 7) >> 3
 
-            # for each iteration, read one byte from the file
-            current_byte = self.file.read(1)
+        if start_byte + nbytes > len(self.data):
+            raise ValueError("unexpected end of the bit stream")
 
-        return "".join(ans)
+        self.position = (start_byte + nbytes) << 3
+        return self.data[start_byte:start_byte + nbytes]
 
-    def add_leading_zero(self, byte):
+    def skip_bits(self, nbits):
         """
-        Description: add leading zero(s) to byte if its length is less than 8
+        Description: move the position past the next nbits bits
         Written by: Kuah Jia Chen
-        Input: byte is a string
-        Return: byte is a string with a length of 8
-        Time complexity (Worst case) : O(A), where A is 8 - len(byte)
+        Input: nbits is a non-negative integer
+        Return: None
+        Time complexity (Worst case) : O(1)
         Space complexity:
             Input: O(1)
-            Aux: O(N), where N is the length of all bit strings in ans
+            Aux: O(1)
         """
-        if len(byte) == 8:
-            return byte
-        else:
-            number_of_leading_zeros = 8 - len(byte)
-            byte = (number_of_leading_zeros * "0") + byte
-            return byte
+        self.position += nbits
+
+    def bits_remaining(self):
+        """
+        Description: get the number of bits that have not been read
+        Written by: Kuah Jia Chen
+        Input: None
+        Return: the number of unread bits
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        return self.bit_length - self.position
 
     def close(self):
         """
-        Description: close the file
+        Description: close the memory map and the file if this instance opened them
         Written by: Kuah Jia Chen
         Input: None
         Return: None
@@ -83,58 +196,71 @@ class BinaryUnPacker:
             Input: O(1)
             Aux: O(1)
         """
-        self.file.close()
+        if self.file is not None:
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+            self.file.close()
+            self.file = None
 
 
-def q2_decoder(bit_string):
+def q2_decoder(bit_reader):
     """
     Description:  decode and recover the original string str[1 . . . n] from a binary encoded file
     Written by: Kuah Jia Chen
-    Input: bit_string is a string
+    Input: bit_reader is a BitReader, or a string of "0" and "1" characters
     Return: original string str[1 . . . n] from a binary encoded file
     Time complexity (Worst case) : O(N + log N + number_unique_char * log N),
-                                   where N is the length of bit_string
+                                   where N is the number of bits in bit_reader
     Space complexity:
-        Input: O(N), where N is the length of bit_string
+        Input: O(N), where N is the number of bits in bit_reader
         Aux: O(N + M), where N is the length of bwt_string,, where M is the number_unique_char
     """
+    if isinstance(bit_reader, str):
+        bit_reader = BitReader.from_bit_string(bit_reader)
 
-    # initialize the pointer that will always pointer at the first unprocessed bit in bit_string
-    current_start_index = 0
+    # get the length of the original string in bwt string form
+    length_of_string = elias_decoder(bit_reader)
 
-    bit_string = list(bit_string)
-
-    # get the length of the original string in bwt string form and update the pointer
-    length_of_string, current_start_index = elias_decoder(bit_string, current_start_index)
-
-    # get the number of unique characters of the original string in bwt string form and update the pointer
-    number_unique_char, current_start_index = elias_decoder(bit_string, current_start_index)
+    # get the number of unique characters of the original string in bwt string form
+    number_unique_char = elias_decoder(bit_reader)
 
     # create huffman decoder
     huffman_tree = HuffmanDecoder()
 
     for i in range(number_unique_char):
-        # get the ascii of the current character of the original string in bwt string form and update the pointer
-        current_ascii, current_start_index = ascii_to_int(bit_string, current_start_index)
+        # get the ascii of the current character of the original string in bwt string form
+        current_ascii = ascii_to_int(bit_reader)
 
         # get the huffman code word length of the current character of the original string in bwt string form
-        # and update the pointer
-        code_length, current_start_index = elias_decoder(bit_string, current_start_index)
+        code_length = elias_decoder(bit_reader)
 
         # insert it to the huffman tree
-        huffman_tree.insert(bit_string[current_start_index: current_start_index + code_length], chr(current_ascii))
-        # update the pointer
-        current_start_index += code_length
+        huffman_tree.insert(bit_reader.read_bits(code_length), code_length, chr(current_ascii))
+
+    return decode_run_length_body(bit_reader, huffman_tree, length_of_string)
+
 
+def decode_run_length_body(bit_reader, huffman_tree, length_of_string):
+    """
+    Description: decode the run length encoded tuples that follow the header and recover the original string
+    Written by: Kuah Jia Chen
+    Input: bit_reader is a BitReader, huffman_tree is a HuffmanDecoder and length_of_string is the length of the
+           bwt string
+    Return: original string str[1 . . . n]
+    Time complexity (Worst case) : O(N), where N is the number of bits in bit_reader
+    Space complexity:
+        Input: O(1)
+        Aux: O(M), where M is the length_of_string
+    """
     run_length_encode_tuples = []
     # create a pointer to check when to stop processing the bit string
     pointer = 0
-    while current_start_index < len(bit_string):
-        # get the current character of the original string in bwt string form and update the pointer
-        current_char, current_start_index = huffman_tree.find_character(bit_string, current_start_index)
+    while bit_reader.bits_remaining() > 0:
+        # get the current character of the original string in bwt string form
+        current_char = huffman_tree.decode_character(bit_reader)
 
-        # get the run length of the current character of the original string in bwt string form and update the pointer
-        current_run_length, current_start_index = elias_decoder(bit_string, current_start_index)
+        # get the run length of the current character of the original string in bwt string form
+        current_run_length = elias_decoder(bit_reader)
 
         run_length_encode_tuples.append([current_char, current_run_length])
 
@@ -158,9 +284,1107 @@ def q2_decoder(bit_string):
     return ans
 
 
+def read_canonical_bwt(bit_reader, entropy_coder="huffman"):
+    """
+    Description: decode the bwt of a block that was encoded with canonical Huffman code words, the header only has
+                 the primary index, and the byte and the code length of each unique byte, so the code words are
+                 rebuilt from the lengths, with the "rans" entropy_coder the bytes of the runs are read by
+                 read_rans_symbols and the run lengths follow them
+    Written by: Kuah Jia Chen
+    Input: bit_reader is a BitReader and entropy_coder is "huffman" or "rans"
+    Return: the sentinel-free bwt as a bytearray and the primary index
+    Time complexity (Worst case) : O(N + K), where N is the number of bits in bit_reader and K is the size of the
+                                   lookup table
+    Space complexity:
+        Input: O(1)
+        Aux: O(M + K), where M is the length of the original block and K is the size of the lookup table
+    """
+    if entropy_coder == "rans":
+        return read_rans_run_length_bwt(bit_reader)
+    elif entropy_coder != "huffman":
+        raise ValueError("unknown entropy coder: " + str(entropy_coder))
+
+    # get the length of the block, the primary index and the number of unique bytes of the bwt
+    length_of_block = elias_decoder(bit_reader)
+    primary_index = elias_decoder(bit_reader)
+    number_unique_byte = elias_decoder(bit_reader)
+
+    code_lengths = [0] * 256
+    for i in range(number_unique_byte):
+        byte = bit_reader.read_bits(8)
+        code_lengths[byte] = elias_decoder(bit_reader)
+
+    huffman_tree = HuffmanDecoder.from_code_lengths(code_lengths)
+
+    bwt_bytes = bytearray()
+    while len(bwt_bytes) < length_of_block:
+        if bit_reader.bits_remaining() <= 0:
+            raise ValueError("unexpected end of the bit stream")
+
+        # get the byte and its run length
+        byte = huffman_tree.decode_character(bit_reader)
+        current_run_length = elias_decoder(bit_reader)
+        bwt_bytes += bytes((byte,)) * current_run_length
+
+    return bwt_bytes, primary_index
+
+
+def read_rans_run_length_bwt(bit_reader):
+    """
+    Description: decode the bwt of a block that was encoded by write_rans_run_length_encoding, the bytes of the
+                 runs come from read_rans_symbols and the elias code words of the run lengths follow them
+    Written by: Kuah Jia Chen
+    Input: bit_reader is a BitReader
+    Return: the sentinel-free bwt as a bytearray and the primary index
+    Time complexity (Worst case) : O(N + M), where N is the number of bits in bit_reader and M is the length of the
+                                   original block
+    Space complexity:
+        Input: O(1)
+        Aux: O(M), where M is the length of the original block
+    """
+    # get the length of the block, the primary index and the unique bytes of the bwt
+    length_of_block = elias_decoder(bit_reader)
+    primary_index = elias_decoder(bit_reader)
+    number_unique_byte = elias_decoder(bit_reader)
+
+    alphabet = []
+    for i in range(number_unique_byte):
+        alphabet.append(bit_reader.read_bits(8))
+
+    symbols = read_rans_symbols(bit_reader, number_unique_byte)
+
+    bwt_bytes = bytearray()
+    for symbol in symbols:
+        bwt_bytes += bytes((alphabet[symbol],)) * elias_decoder(bit_reader)
+
+    if len(bwt_bytes) != length_of_block:
+        raise ValueError("the runs do not add up to the length of the block")
+
+    return bwt_bytes, primary_index
+
+
+def read_rans_symbols(bit_reader, alphabet_size):
+    """
+    Description: decode the symbols that were written by write_rans_symbols in the encoder, the state takes a
+                 slot of 2^RANS_PROBABILITY_BITS at a time and the slot is mapped back to its symbol with a table
+    Written by: Kuah Jia Chen
+    Input: bit_reader is a BitReader and alphabet_size is a positive integer
+    Return: the symbols as a list of integers in the range [0, alphabet_size)
+    Time complexity (Worst case) : O(N + K + 2^RANS_PROBABILITY_BITS), where N is the number of symbols and K is
+                                   the alphabet_size
+    Space complexity:
+        Input: O(1)
+        Aux: O(N + K + 2^RANS_PROBABILITY_BITS), where N is the number of symbols and K is the alphabet_size
+    """
+    number_of_symbols = elias_decoder(bit_reader)
+
+    scaled_frequencies = []
+    for i in range(alphabet_size):
+        scaled_frequencies.append(elias_decoder(bit_reader) - 1)
+
+    # cumulative[symbol] is the first slot of symbol and slot_symbols[slot] is the symbol that owns the slot
+    cumulative = [0] * alphabet_size
+    slot_symbols = []
+    for symbol in range(alphabet_size):
+        cumulative[symbol] = len(slot_symbols)
+        slot_symbols += [symbol] * scaled_frequencies[symbol]
+
+    if len(slot_symbols) != 1 << RANS_PROBABILITY_BITS:
+        raise ValueError("the rANS frequencies do not add up to 2^" + str(RANS_PROBABILITY_BITS))
+
+    stream = bit_reader.read_bytes(elias_decoder(bit_reader))
+    if len(stream) < RANS_STATE_BYTES:
+        raise ValueError("truncated rANS stream")
+
+    state = int.from_bytes(stream[:RANS_STATE_BYTES], byteorder='big')
+    position = RANS_STATE_BYTES
+    slot_mask = (1 << RANS_PROBABILITY_BITS) - 1
+
+    symbols = [0] * number_of_symbols
+    try:
+        for i in range(number_of_symbols):
+            slot = state & slot_mask
+            symbol = slot_symbols[slot]
+            symbols[i] = symbol
+            state = scaled_frequencies[symbol] * (state >> RANS_PROBABILITY_BITS) + slot - cumulative[symbol]
+
+            # move bytes in until the state is back above RANS_LOWER_BOUND
+            while state < RANS_LOWER_BOUND:
+                state = (state << 8) | stream[position]
+                position += 1
+    except IndexError:
+        raise ValueError("truncated rANS stream")
+
+    return symbols
+
+
+def read_move_to_front_bwt(bit_reader, entropy_coder="huffman"):
+    """
+    Description: decode the bwt of a block that was encoded with the move-to-front and zero run stage, the RUNA and
+                 RUNB symbols are expanded back into runs of the front byte and every other symbol i moves the
+                 byte at index i - 1 to the front, the symbols are decoded with canonical Huffman code words or,
+                 with the "rans" entropy_coder, by read_rans_symbols
+    Written by: Kuah Jia Chen
+    Input: bit_reader is a BitReader and entropy_coder is "huffman" or "rans"
+    Return: the sentinel-free bwt as a bytearray and the primary index
+    Time complexity (Worst case) : O(N + M * K), where N is the number of bits in bit_reader, M is the length of
+                                   the original block and K is the number of unique bytes
+    Space complexity:
+        Input: O(1)
+        Aux: O(M + T), where M is the length of the original block and T is the size of the lookup table
+    """
+    # get the length of the block and the primary index of the bwt
+    length_of_block = elias_decoder(bit_reader)
+    primary_index = elias_decoder(bit_reader)
+
+    # get the unique bytes, they are the initial move-to-front order
+    number_unique_byte = elias_decoder(bit_reader)
+    order = []
+    for i in range(number_unique_byte):
+        order.append(bit_reader.read_bits(8))
+
+    # RUNA, RUNB and one symbol for each move-to-front index from 1 to number_unique_byte - 1
+    if entropy_coder == "rans":
+        symbols = iter(read_rans_symbols(bit_reader, number_unique_byte + 1))
+    elif entropy_coder == "huffman":
+        code_lengths = []
+        for i in range(number_unique_byte + 1):
+            code_lengths.append(elias_decoder(bit_reader) - 1)
+
+        symbols = iter_huffman_symbols(bit_reader, HuffmanDecoder.from_code_lengths(code_lengths))
+    else:
+        raise ValueError("unknown entropy coder: " + str(entropy_coder))
+
+    bwt_bytes = bytearray()
+    zero_run = 0
+    run_weight = 1
+
+    while len(bwt_bytes) + zero_run < length_of_block:
+        symbol = next(symbols, None)
+        if symbol is None:
+            raise ValueError("unexpected end of the bit stream")
+
+        if symbol == RUNA or symbol == RUNB:
+            # RUNA is the digit 1 and RUNB is the digit 2 of the run length in bijective base 2
+            zero_run += (symbol + 1) * run_weight
+            run_weight <<= 1
+            continue
+
+        if zero_run > 0:
+            bwt_bytes += bytes((order[0],)) * zero_run
+            zero_run = 0
+            run_weight = 1
+
+        byte = order.pop(symbol - 1)
+        order.insert(0, byte)
+        bwt_bytes.append(byte)
+
+    if zero_run > 0:
+        bwt_bytes += bytes((order[0],)) * zero_run
+
+    return bwt_bytes, primary_index
+
+
+def iter_huffman_symbols(bit_reader, huffman_tree):
+    """
+    Description: decode the symbols of bit_reader one at a time with the lookup table of huffman_tree
+    Written by: Kuah Jia Chen
+    Input: bit_reader is a BitReader and huffman_tree is a HuffmanDecoder
+    Return: a generator that yields each symbol as an integer until the end of the bit stream
+    Time complexity (Worst case) : O(N), where N is the number of bits in bit_reader
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    while bit_reader.bits_remaining() > 0:
+        yield huffman_tree.decode_character(bit_reader)
+
+
+def decode_block(payload, flags=0):
+    """
+    Description: decode one block that was encoded on its own by the encoder
+    Written by: Kuah Jia Chen
+    Input: payload is a bytes object and flags is the flags byte of its frame
+    Return: the original block as a bytes object
+    Time complexity (Worst case) : O(N), where N is the number of bits in payload
+    Space complexity:
+        Input: O(N), where N is the number of bits in payload
+        Aux: O(M), where M is the length of the original block
+    """
+    block = invert_bwt_bytes(*decode_block_bwt(payload, flags))
+
+    # the long repeats were taken out before the bwt, so they are copied back after it is inverted
+    if flags & FLAG_DEDUP:
+        block = restore_long_matches(block, read_dedup_section(split_dedup_section(payload, flags)[0]))
+
+    return block
+
+
+def decode_block_bwt(payload, flags=0):
+    """
+    Description: undo the entropy coding of one block without inverting its bwt, the FM-index section of the
+                 payload is skipped
+    Written by: Kuah Jia Chen
+    Input: payload is a bytes object and flags is the flags byte of its frame
+    Return: the sentinel-free bwt of the block as a bytearray and the primary index
+    Time complexity (Worst case) : O(N), where N is the number of bits in payload
+    Space complexity:
+        Input: O(N), where N is the number of bits in payload
+        Aux: O(M), where M is the length of the original block
+    """
+    # every frame names exactly one entropy coder
+    if flags & ~SUPPORTED_FLAGS or bool(flags & FLAG_CANONICAL_HUFFMAN) == bool(flags & FLAG_RANS):
+        raise ValueError("unsupported frame flags: " + str(flags))
+
+    section, payload = split_dedup_section(payload, flags)
+    entropy_coder = "rans" if flags & FLAG_RANS else "huffman"
+
+    if flags & FLAG_MOVE_TO_FRONT:
+        return read_move_to_front_bwt(BitReader(payload), entropy_coder)
+
+    return read_canonical_bwt(BitReader(payload), entropy_coder)
+
+
+def split_dedup_section(payload, flags):
+    """
+    Description: split the payload of a frame into its dedup section and the entropy coded block, the FM-index
+                 section in front of it is skipped
+    Written by: Kuah Jia Chen
+    Input: payload is a bytes object and flags is the flags byte of its frame
+    Return: the dedup section as a memoryview, or None if the frame has none, and the rest of the payload
+    Time complexity (Worst case) : O(1)
+    Space complexity:
+        Input: O(N), where N is the length of payload
+        Aux: O(1)
+    """
+    payload = split_fm_index_section(payload, flags)[1]
+
+    if not flags & FLAG_DEDUP:
+        return None, payload
+
+    payload = memoryview(payload)
+    section_length = int.from_bytes(payload[:FRAME_LENGTH_BYTES], byteorder='big')
+    section_end = FRAME_LENGTH_BYTES + section_length
+
+    if section_end > len(payload):
+        raise ValueError("truncated dedup section")
+
+    return payload[FRAME_LENGTH_BYTES:section_end], payload[section_end:]
+
+
+def read_dedup_section(section):
+    """
+    Description: read the back-references of a dedup section, the elias code word of (number of back-references
+                 + 1) is followed by (number of literal bytes before it + 1), the distance to its source and the
+                 length of each back-reference
+    Written by: Kuah Jia Chen
+    Input: section is a bytes-like object
+    Return: a list of (position, source, length) tuples
+    Time complexity (Worst case) : O(M), where M is the number of back-references
+    Space complexity:
+        Input: O(M), where M is the number of back-references
+        Aux: O(M), where M is the number of back-references
+    """
+    bit_reader = BitReader(section)
+    number_of_matches = elias_decoder(bit_reader) - 1
+
+    matches = []
+    previous_end = 0
+    for i in range(number_of_matches):
+        position = previous_end + elias_decoder(bit_reader) - 1
+        source = position - elias_decoder(bit_reader)
+        length = elias_decoder(bit_reader)
+        matches.append((position, source, length))
+        previous_end = position + length
+
+    return matches
+
+
+def restore_long_matches(literals, matches):
+    """
+    Description: copy the long repeats back between the literals, a back-reference that overlaps the bytes it
+                 copies is copied one distance at a time
+    Written by: Kuah Jia Chen
+    Input: literals is a bytes-like object and matches is a list of (position, source, length) tuples in the
+           order of position
+    Return: the original block as a bytes object
+    Time complexity (Worst case) : O(M), where M is the length of the original block
+    Space complexity:
+        Input: O(L), where L is the length of literals
+        Aux: O(M), where M is the length of the original block
+    """
+    block = bytearray()
+    literal_position = 0
+
+    for position, source, length in matches:
+        if position < len(block) or source >= position:
+            raise ValueError("corrupted dedup section")
+
+        literal_length = position - len(block)
+        if literal_position + literal_length > len(literals):
+            raise ValueError("corrupted dedup section")
+
+        block += literals[literal_position:literal_position + literal_length]
+        literal_position += literal_length
+
+        # the source may run into the copy itself, so copy at most position - source bytes at a time
+        distance = position - source
+        while length > 0:
+            copied = min(length, distance)
+            block += block[source:source + copied]
+            source += copied
+            length -= copied
+
+    block += literals[literal_position:]
+
+    return bytes(block)
+
+
+def split_fm_index_section(payload, flags):
+    """
+    Description: split the payload of a frame into its FM-index section and the entropy coded block
+    Written by: Kuah Jia Chen
+    Input: payload is a bytes object and flags is the flags byte of its frame
+    Return: the FM-index section as a memoryview, or None if the frame has none, and the rest of the payload
+    Time complexity (Worst case) : O(1)
+    Space complexity:
+        Input: O(N), where N is the length of payload
+        Aux: O(1)
+    """
+    if not flags & FLAG_FM_INDEX:
+        return None, payload
+
+    payload = memoryview(payload)
+    section_length = int.from_bytes(payload[:FRAME_LENGTH_BYTES], byteorder='big')
+    section_end = FRAME_LENGTH_BYTES + section_length
+
+    if section_end > len(payload):
+        raise ValueError("truncated FM-index section")
+
+    return payload[FRAME_LENGTH_BYTES:section_end], payload[section_end:]
+
+
+def is_block_container(file):
+    """
+    Description: check whether the file starts with the block container header, the file position is moved
+                 past the header if it does and back to the start if it does not
+    Written by: Kuah Jia Chen
+    Input: file is an opened binary file object
+    Return: True if the file is a block container, otherwise False
+    Time complexity (Worst case) : O(1)
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    header = file.read(len(CONTAINER_MAGIC) + 1)
+
+    if header[:len(CONTAINER_MAGIC)] != CONTAINER_MAGIC:
+        file.seek(0)
+        return False
+
+    if header[len(CONTAINER_MAGIC)] != CONTAINER_VERSION:
+        raise ValueError("unsupported container version: " + str(header[len(CONTAINER_MAGIC)]))
+
+    return True
+
+
+def read_frame_body(file, frame_header):
+    """
+    Description: read the payload of the frame whose header has just been read
+    Written by: Kuah Jia Chen
+    Input: file is an opened binary file object and frame_header is a bytes object
+    Return: the flags and the payload of the frame
+    Time complexity (Worst case) : O(B), where B is the size of the frame
+    Space complexity:
+        Input: O(1)
+        Aux: O(B), where B is the size of the frame
+    """
+    if len(frame_header) < FRAME_LENGTH_BYTES + 1:
+        raise ValueError("truncated frame header")
+
+    payload_length = int.from_bytes(frame_header[:FRAME_LENGTH_BYTES], byteorder='big')
+    flags = frame_header[FRAME_LENGTH_BYTES]
+    payload = file.read(payload_length)
+
+    if len(payload) < payload_length:
+        raise ValueError("truncated frame payload")
+
+    return flags, payload
+
+
+def read_block_index(file):
+    """
+    Description: read the block index from the end of a block container
+    Written by: Kuah Jia Chen
+    Input: file is an opened binary file object
+    Return: a list of (frame offset, block length) tuples, one for each block in order
+    Time complexity (Worst case) : O(K), where K is the number of blocks
+    Space complexity:
+        Input: O(1)
+        Aux: O(K), where K is the number of blocks
+    """
+    footer_size = INDEX_FIELD_BYTES + len(FOOTER_MAGIC)
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+
+    if file_size < len(CONTAINER_MAGIC) + 1 + footer_size:
+        raise ValueError("truncated block container")
+
+    file.seek(file_size - footer_size)
+    footer = file.read(footer_size)
+
+    if footer[INDEX_FIELD_BYTES:] != FOOTER_MAGIC:
+        raise ValueError("missing block index footer")
+
+    index_offset = int.from_bytes(footer[:INDEX_FIELD_BYTES], byteorder='big')
+    file.seek(index_offset)
+    index_bytes = file.read(file_size - footer_size - index_offset)
+
+    block_index = []
+    for i in range(0, len(index_bytes), 2 * INDEX_FIELD_BYTES):
+        frame_offset = int.from_bytes(index_bytes[i:i + INDEX_FIELD_BYTES], byteorder='big')
+        block_length = int.from_bytes(index_bytes[i + INDEX_FIELD_BYTES:i + 2 * INDEX_FIELD_BYTES], byteorder='big')
+        block_index.append((frame_offset, block_length))
+
+    return block_index
+
+
+def decode_frame_at(file_name, frame_offset):
+    """
+    Description: read and decode the frame that starts at frame_offset, it only needs the file name so that it can
+                 run in a worker process
+    Written by: Kuah Jia Chen
+    Input: file_name is a string and frame_offset is an integer
+    Return: the original block as a bytes object
+    Time complexity (Worst case) : O(B), where B is the number of bits in the frame
+    Space complexity:
+        Input: O(1)
+        Aux: O(B), where B is the number of bits in the frame
+    """
+    file = open(file_name, "rb")
+    file.seek(frame_offset)
+    flags, payload = read_frame_body(file, file.read(FRAME_LENGTH_BYTES + 1))
+    file.close()
+
+    return decode_block(payload, flags)
+
+
+def decode_frames_in_order(file_name, frame_offsets, workers=1):
+    """
+    Description: decode the frames at frame_offsets, using a pool of worker processes when workers is more than
+                 one, the blocks are always yielded in the order of frame_offsets and at most 2 * workers blocks
+                 are in flight at a time
+    Written by: Kuah Jia Chen
+    Input: file_name is a string, frame_offsets is a list of integers and workers is a positive integer or None
+           for all cores
+    Return: a generator that yields each original block as a bytes object
+    Time complexity (Worst case) : O(N / W), where N is the number of bits in the frames and W is the number of
+                                   workers
+    Space complexity:
+        Input: O(K), where K is the length of frame_offsets
+        Aux: O(W * B), where W is the number of workers and B is the length of the largest block
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for frame_offset in frame_offsets:
+            yield decode_frame_at(file_name, frame_offset)
+        return
+
+    pending = collections.deque()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        for frame_offset in frame_offsets:
+            pending.append(executor.submit(decode_frame_at, file_name, frame_offset))
+
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def open_block_container(file_name):
+    """
+    Description: open a block container and read its block index
+    Written by: Kuah Jia Chen
+    Input: file_name is a string
+    Return: the block index as a list of (frame offset, block length) tuples
+    Time complexity (Worst case) : O(K), where K is the number of blocks
+    Space complexity:
+        Input: O(1)
+        Aux: O(K), where K is the number of blocks
+    """
+    file = open(file_name, "rb")
+
+    try:
+        if not is_block_container(file):
+            raise ValueError(file_name + " is not a block container")
+        return read_block_index(file)
+    finally:
+        file.close()
+
+
+def q2_block_decoder(file_name, workers=1):
+    """
+    Description: decode every block of a block container and recover the original bytes
+    Written by: Kuah Jia Chen
+    Input: file_name is a string and workers is a positive integer or None for all cores
+    Return: the original bytes
+    Time complexity (Worst case) : O(N / W), where N is the number of bits in the file and W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(K + W * B + M), where K is the number of blocks, W is the number of workers, B is the number of bits
+             in the largest frame and M is the length of the original bytes
+    """
+    return b"".join(iter_block_decoder(file_name, workers))
+
+
+def iter_block_decoder(file_name, workers=1):
+    """
+    Description: decode the blocks of a block container one at a time, every block is yielded as soon as it and
+                 the blocks before it are decoded, so only the blocks in flight are kept in memory
+    Written by: Kuah Jia Chen
+    Input: file_name is a string and workers is a positive integer or None for all cores
+    Return: a generator that yields each original block as a bytes object
+    Time complexity (Worst case) : O(N / W), where N is the number of bits in the file and W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(K + W * B), where K is the number of blocks, W is the number of workers and B is the number of bits
+             in the largest frame
+    """
+    block_index = open_block_container(file_name)
+    frame_offsets = [frame_offset for frame_offset, block_length in block_index]
+
+    return decode_frames_in_order(file_name, frame_offsets, workers)
+
+
+def q2_range_decoder(file_name, start, end, workers=1):
+    """
+    Description: recover original_bytes[start:end] by decoding only the blocks that cover the range
+    Written by: Kuah Jia Chen
+    Input: file_name is a string, start and end are integers with 0 <= start <= end, and workers is a positive
+           integer or None for all cores
+    Return: the bytes of the original file in the range [start, end)
+    Time complexity (Worst case) : O(K + R / W), where K is the number of blocks, R is the number of bits in the
+                                   frames that cover the range and W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(K + W * B + (end - start)), where K is the number of blocks, W is the number of workers and B is the
+             number of bits in the largest frame
+    """
+    return b"".join(iter_range_decoder(file_name, start, end, workers))
+
+
+def iter_range_decoder(file_name, start, end, workers=1):
+    """
+    Description: recover original_bytes[start:end] one block at a time by decoding only the blocks that cover the
+                 range, the first and the last block are cut to the range
+    Written by: Kuah Jia Chen
+    Input: file_name is a string, start and end are integers with 0 <= start <= end, and workers is a positive
+           integer or None for all cores
+    Return: a generator that yields the parts of the range as bytes objects in order
+    Time complexity (Worst case) : O(K + R / W), where K is the number of blocks, R is the number of bits in the
+                                   frames that cover the range and W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(K + W * B), where K is the number of blocks, W is the number of workers and B is the number of bits
+             in the largest frame
+    """
+    if start < 0 or end < start:
+        raise ValueError("invalid range")
+
+    block_index = open_block_container(file_name)
+
+    # block_starts[i] is the position of the first byte of block i in the original file
+    block_starts = []
+    total_length = 0
+    for frame_offset, block_length in block_index:
+        block_starts.append(total_length)
+        total_length += block_length
+
+    end = min(end, total_length)
+    if start >= end:
+        return
+
+    first_block = bisect.bisect_right(block_starts, start) - 1
+    last_block = bisect.bisect_right(block_starts, end - 1) - 1
+    frame_offsets = [block_index[i][0] for i in range(first_block, last_block + 1)]
+
+    block_start = block_starts[first_block]
+    for block in decode_frames_in_order(file_name, frame_offsets, workers):
+        yield block[max(0, start - block_start):end - block_start]
+        block_start += len(block)
+
+
+def write_blocks(blocks, output_file=None):
+    """
+    Description: write the blocks to output_file as they arrive, so only one block has to be in memory at a time
+    Written by: Kuah Jia Chen
+    Input: blocks is an iterable of bytes objects and output_file is a binary file object, or None for the
+           standard output
+    Return: the number of bytes written as an integer
+    Time complexity (Worst case) : O(M), where M is the total length of the blocks
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    if output_file is None:
+        output_file = sys.stdout.buffer
+
+    written = 0
+    for block in blocks:
+        output_file.write(block)
+        written += len(block)
+
+    output_file.flush()
+
+    return written
+
+
+def fm_count(file_name, pattern):
+    """
+    Description: count the occurrences of pattern in the original file of a block container that was encoded with
+                 the FM-index, without inverting the bwt of any block, use an FMArchive to count many patterns
+    Written by: Kuah Jia Chen
+    Input: file_name is a string and pattern is a non-empty bytes object or string (encoded as utf-8)
+    Return: the number of occurrences as an integer
+    Time complexity (Worst case) : O(N + K * (M + S) * C), where N is the number of bits in the file, K is the
+                                   number of blocks, M is the length of pattern, S is the sample rate and C is the
+                                   checkpoint interval
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(K + B), where K is the number of blocks and B is the number of bits in the largest frame
+    """
+    return FMArchive(file_name).count(pattern)
+
+
+def fm_locate(file_name, pattern):
+    """
+    Description: find the positions of pattern in the original file of a block container that was encoded with
+                 the FM-index, without inverting the bwt of any block, use an FMArchive to locate many patterns
+    Written by: Kuah Jia Chen
+    Input: file_name is a string and pattern is a non-empty bytes object or string (encoded as utf-8)
+    Return: a sorted list of the 0-based positions of pattern in the original file
+    Time complexity (Worst case) : O(N + K * (M + S) * C + O * S * C), where N is the number of bits in the file, K
+                                   is the number of blocks, M is the length of pattern, O is the number of
+                                   occurrences, S is the sample rate and C is the checkpoint interval
+    Space complexity:
+        Input: O(M), where M is the length of pattern
+        Aux: O(K + B + O), where K is the number of blocks, B is the number of bits in the largest frame and O is
+             the number of occurrences
+    """
+    return FMArchive(file_name).locate(pattern)
+
+
+class FMArchive:
+
+    def __init__(self, file_name, cache_size=DEFAULT_FM_CACHE_SIZE):
+        """
+        Description: initialise a handle on a block container that was encoded with the FM-index, only the block
+                     index is read here, the FM-index of a block is built when a query first needs it and the last
+                     cache_size of them are kept, so a query over the whole file decodes one block at a time
+        Written by: Kuah Jia Chen
+        Input: file_name is a string and cache_size is a positive integer
+        Return: None
+        Time complexity (Worst case) : O(K), where K is the number of blocks
+        Space complexity:
+            Input: O(1)
+            Aux: O(K), where K is the number of blocks
+        """
+        if cache_size < 1:
+            raise ValueError("the FM-index cache must hold at least 1 block")
+
+        self.file_name = file_name
+        self.cache_size = cache_size
+        # cache maps a block number to its FMIndex, the least recently used block is first
+        self.cache = collections.OrderedDict()
+        self.frame_offsets = []
+        # block_starts[k] is the position of the first byte of block k in the original file
+        self.block_starts = []
+        self.block_lengths = []
+        self.length = 0
+
+        file = open(file_name, "rb")
+
+        try:
+            if not is_block_container(file):
+                raise ValueError(file_name + " is not a block container")
+
+            for frame_offset, block_length in read_block_index(file):
+                # only the flags byte of the frame is read
+                file.seek(frame_offset + FRAME_LENGTH_BYTES)
+                flags = file.read(1)
+
+                if not flags or not flags[0] & FLAG_FM_INDEX:
+                    raise ValueError("the block at " + str(frame_offset) + " has no FM-index, encode it with "
+                                     "--fm-index")
+
+                self.frame_offsets.append(frame_offset)
+                self.block_starts.append(self.length)
+                self.block_lengths.append(block_length)
+                self.length += block_length
+        finally:
+            file.close()
+
+    def block(self, k):
+        """
+        Description: get the FM-index of block k, the frame is read and its entropy coding is undone if the block
+                     is not in the cache, the bwt is not inverted
+        Written by: Kuah Jia Chen
+        Input: k is an integer in [0, K), where K is the number of blocks
+        Return: an FMIndex
+        Time complexity (Worst case) : O(B), where B is the number of bits in the frame
+        Space complexity:
+            Input: O(1)
+            Aux: O(B), where B is the number of bits in the frame
+        """
+        if k in self.cache:
+            self.cache.move_to_end(k)
+            return self.cache[k]
+
+        file = open(self.file_name, "rb")
+        file.seek(self.frame_offsets[k])
+        flags, payload = read_frame_body(file, file.read(FRAME_LENGTH_BYTES + 1))
+        file.close()
+
+        section = split_fm_index_section(payload, flags)[0]
+        bwt_bytes, primary_index = decode_block_bwt(payload, flags)
+        fm_index = FMIndex(bytes(bwt_bytes), primary_index, section)
+
+        self.cache[k] = fm_index
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return fm_index
+
+    def count(self, pattern):
+        """
+        Description: count the occurrences of pattern in the original file, including the ones that cross the
+                     boundary between two blocks
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty bytes object or string (encoded as utf-8)
+        Return: the number of occurrences as an integer
+        Time complexity (Worst case) : O(N + K * (M + S) * C), where N is the number of bits of the blocks that are
+                                       not in the cache, K is the number of blocks, M is the length of pattern, S
+                                       is the sample rate and C is the checkpoint interval
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(L * B), where L is the cache size and B is the number of bits in the largest frame
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode("utf-8")
+
+        ans = 0
+        for k in range(len(self.frame_offsets)):
+            ans += self.block(k).count(pattern)
+            ans += len(self.boundary_matches(pattern, k))
+
+        return ans
+
+    def locate(self, pattern):
+        """
+        Description: find the positions of pattern in the original file, including the ones that cross the
+                     boundary between two blocks
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty bytes object or string (encoded as utf-8)
+        Return: a sorted list of the 0-based positions of pattern in the original file
+        Time complexity (Worst case) : O(N + K * (M + S) * C + O * S * C), where N is the number of bits of the
+                                       blocks that are not in the cache, K is the number of blocks, M is the length
+                                       of pattern, O is the number of occurrences, S is the sample rate and C is
+                                       the checkpoint interval
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(L * B + O), where L is the cache size, B is the number of bits in the largest frame and O is the
+                 number of occurrences
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode("utf-8")
+
+        ans = []
+        for k in range(len(self.frame_offsets)):
+            for position in self.block(k).locate(pattern):
+                ans.append(self.block_starts[k] + position)
+
+            # the occurrences that start in block k and end in a later block come after the ones inside block k
+            ans.extend(self.boundary_matches(pattern, k))
+
+        return ans
+
+    def boundary_matches(self, pattern, k):
+        """
+        Description: find the occurrences of pattern that start in block k and end in a later block, the last
+                     M - 1 bytes of block k and the M - 1 bytes after it are extracted from the FM-indexes and
+                     searched
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty bytes object and k is an integer in [0, K), where K is the number of blocks
+        Return: a sorted list of the 0-based positions of the occurrences in the original file
+        Time complexity (Worst case) : O(N + (M + S) * C), where N is the number of bits of the blocks in the window
+                                       that are not in the cache, M is the length of pattern, S is the sample rate
+                                       and C is the checkpoint interval
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(M + L * B), where M is the length of pattern, L is the cache size and B is the number of bits
+                 in the largest frame
+        """
+        if len(pattern) == 0:
+            raise ValueError("empty pattern")
+
+        if k + 1 >= len(self.frame_offsets):
+            return []
+
+        m = len(pattern)
+        ans = []
+
+        boundary = self.block_starts[k + 1]
+        window_start = max(self.block_starts[k], boundary - m + 1)
+        window = self.extract(window_start, min(self.length, boundary + m - 1))
+
+        # only the occurrences that start before the boundary and end after it
+        position = window.find(pattern)
+        while 0 <= position and window_start + position < boundary:
+            if window_start + position + m > boundary:
+                ans.append(window_start + position)
+            position = window.find(pattern, position + 1)
+
+        return ans
+
+    def extract(self, start, end):
+        """
+        Description: get the bytes of the original file in [start, end) from the FM-indexes of the blocks
+        Written by: Kuah Jia Chen
+        Input: start and end are integers with 0 <= start <= end <= the length of the original file
+        Return: a bytes object
+        Time complexity (Worst case) : O(N + (E + K * S) * C + log K), where N is the number of bits of the blocks
+                                       in the range that are not in the cache, E is end - start, K is the number
+                                       of blocks in the range, S is the sample rate and C is the checkpoint
+                                       interval
+        Space complexity:
+            Input: O(1)
+            Aux: O(E + S + L * B), where E is end - start, S is the sample rate, L is the cache size and B is the
+                 number of bits in the largest frame
+        """
+        ans = bytearray()
+
+        # the last block that starts at or before start
+        k = max(0, bisect.bisect_right(self.block_starts, start) - 1)
+
+        while k < len(self.frame_offsets) and self.block_starts[k] < end:
+            block_start = self.block_starts[k]
+            block_end = block_start + self.block_lengths[k]
+
+            if block_end > start:
+                ans += self.block(k).extract(max(start, block_start) - block_start, min(end, block_end) - block_start)
+            k += 1
+
+        return bytes(ans)
+
+
+class FMIndex:
+
+    def __init__(self, bwt_bytes, primary_index, section, checkpoint_interval=DEFAULT_FM_CHECKPOINT_INTERVAL):
+        """
+        Description: initialise an FM-index over the sentinel-free bwt of a block and the FM-index section that
+                     was stored next to it, row 0 is the suffix that only has the sentinel and the sentinel sits in
+                     the last column at primary_index, the occurrences of every byte before every
+                     checkpoint_interval-th row are counted here from the bwt
+        Written by: Kuah Jia Chen
+        Input: bwt_bytes is a bytes object, primary_index is an integer, section is a bytes-like object and
+               checkpoint_interval is a positive integer
+        Return: None
+        Time complexity (Worst case) : O(N + K * N / C), where N is the length of bwt_bytes, K is the number of
+                                       unique bytes and C is the checkpoint_interval
+        Space complexity:
+            Input: O(N), where N is the length of bwt_bytes
+            Aux: O(N / S + K * N / C), where N is the length of bwt_bytes, S is the sample rate, K is the number of
+                 unique bytes and C is the checkpoint_interval
+        """
+        n = len(bwt_bytes)
+        self.bwt_bytes = bwt_bytes
+        self.primary_index = primary_index
+        self.checkpoint_interval = checkpoint_interval
+        self.sample_rate = int.from_bytes(section[0:4], byteorder='big')
+        alphabet = sorted(set(bwt_bytes))
+
+        # alphabet_rank[c] is the column of byte c in the checkpoints, or None if c is not in the block
+        self.number_unique_byte = len(alphabet)
+        self.alphabet_rank = [None] * 256
+        for i in range(len(alphabet)):
+            self.alphabet_rank[alphabet[i]] = i
+
+        # occurrences of each unique byte before every checkpoint
+        self.checkpoints = array.array("I")
+        occurrences = [0] * len(alphabet)
+        for checkpoint_start in range(0, n + 1, checkpoint_interval):
+            window = collections.Counter(bwt_bytes[max(0, checkpoint_start - checkpoint_interval):checkpoint_start])
+            for byte in window:
+                occurrences[self.alphabet_rank[byte]] += window[byte]
+            self.checkpoints.extend(occurrences)
+
+        # first_row[c] is the first row whose suffix starts with byte c, row 0 belongs to the sentinel
+        self.first_row = [0] * 256
+        total = 1
+        for byte in alphabet:
+            self.first_row[byte] = total
+            total += self.rank(byte, n + 1)
+
+        # sample_rows maps every sampled text position to its row, the end of the block is the sentinel row, and
+        # sampled_rows maps every sampled row back to its suffix array value
+        number_of_samples = -(-n // self.sample_rate)
+        row_bits = n.bit_length()
+        bit_reader = BitReader(section[4:])
+        if bit_reader.bits_remaining() < number_of_samples * row_bits:
+            raise ValueError("truncated FM-index section")
+
+        self.sample_rows = {n: 0}
+        self.sampled_rows = {}
+        for position in range(0, n, self.sample_rate):
+            row = bit_reader.read_bits(row_bits)
+            self.sample_rows[position] = row
+            self.sampled_rows[row] = position
+
+        if self.sample_rows.get(0) != primary_index or len(self.sampled_rows) != number_of_samples:
+            raise ValueError("corrupted FM-index section")
+
+    def rank(self, byte, row):
+        """
+        Description: count the occurrences of byte in the last column above row
+        Written by: Kuah Jia Chen
+        Input: byte is an integer in the block and row is an integer in [0, N + 1]
+        Return: the number of occurrences as an integer
+        Time complexity (Worst case) : O(C), where C is the checkpoint interval
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        # the sentinel is not stored in bwt_bytes, so the rows below it are shifted up by one
+        if row > self.primary_index:
+            row -= 1
+
+        checkpoint = row // self.checkpoint_interval
+        checkpoint_start = checkpoint * self.checkpoint_interval
+
+        return self.checkpoints[checkpoint * self.number_unique_byte + self.alphabet_rank[byte]] \
+            + self.bwt_bytes.count(byte, checkpoint_start, row)
+
+    def backward_search(self, pattern):
+        """
+        Description: find the rows of the suffixes that start with pattern using backward search
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty bytes object
+        Return: the first row and the end row (exclusive) of the suffixes that start with pattern
+        Time complexity (Worst case) : O(M * C), where M is the length of pattern and C is the checkpoint interval
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(1)
+        """
+        if len(pattern) == 0:
+            raise ValueError("empty pattern")
+
+        start_row = 0
+        end_row = len(self.bwt_bytes) + 1
+
+        for i in range(len(pattern) - 1, -1, -1):
+            byte = pattern[i]
+
+            if self.alphabet_rank[byte] is None:
+                return 0, 0
+
+            start_row = self.first_row[byte] + self.rank(byte, start_row)
+            end_row = self.first_row[byte] + self.rank(byte, end_row)
+
+            if start_row >= end_row:
+                return 0, 0
+
+        return start_row, end_row
+
+    def count(self, pattern):
+        """
+        Description: count the occurrences of pattern in the block
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty bytes object
+        Return: the number of occurrences as an integer
+        Time complexity (Worst case) : O(M * C), where M is the length of pattern and C is the checkpoint interval
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(1)
+        """
+        start_row, end_row = self.backward_search(pattern)
+        return end_row - start_row
+
+    def locate(self, pattern):
+        """
+        Description: find the positions of pattern in the block, every row walks the LF mapping back until it
+                     reaches a row whose suffix array value was sampled
+        Written by: Kuah Jia Chen
+        Input: pattern is a non-empty bytes object
+        Return: a sorted list of the 0-based positions of pattern in the block
+        Time complexity (Worst case) : O(M * C + O * S * C), where M is the length of pattern, O is the number of
+                                       occurrences, S is the sample rate and C is the checkpoint interval
+        Space complexity:
+            Input: O(M), where M is the length of pattern
+            Aux: O(O), where O is the number of occurrences
+        """
+        start_row, end_row = self.backward_search(pattern)
+
+        ans = []
+        for row in range(start_row, end_row):
+            steps = 0
+
+            # the primary row is always sampled, so the walk never reaches the sentinel
+            while row not in self.sampled_rows:
+                if row < self.primary_index:
+                    byte = self.bwt_bytes[row]
+                else:
+                    byte = self.bwt_bytes[row - 1]
+                row = self.first_row[byte] + self.rank(byte, row)
+                steps += 1
+
+            ans.append(self.sampled_rows[row] + steps)
+
+        ans.sort()
+        return ans
+
+    def extract(self, start, end):
+        """
+        Description: get the bytes of the block in [start, end) by walking the LF mapping back from the first
+                     sampled text position at or after end
+        Written by: Kuah Jia Chen
+        Input: start and end are integers with 0 <= start <= end <= N, where N is the length of the block
+        Return: a bytes object
+        Time complexity (Worst case) : O((E + S) * C), where E is end - start, S is the sample rate and C is the
+                                       checkpoint interval
+        Space complexity:
+            Input: O(1)
+            Aux: O(E + S), where E is end - start and S is the sample rate
+        """
+        n = len(self.bwt_bytes)
+        position = min(n, -(-end // self.sample_rate) * self.sample_rate)
+        row = self.sample_rows[position]
+
+        # the bytes are found from position - 1 down to start
+        ans = bytearray()
+        while position > start:
+            if row < self.primary_index:
+                byte = self.bwt_bytes[row]
+            else:
+                byte = self.bwt_bytes[row - 1]
+            ans.append(byte)
+            row = self.first_row[byte] + self.rank(byte, row)
+            position -= 1
+
+        ans.reverse()
+        return bytes(ans[:end - start])
+
+
 def invert_bwt_string(bwt_string):
     """
-    Description:  invert the bwt_string to get the original string
+    Description:  invert the bwt_string to get the original string, the "$" is the smallest character, so it is
+                  left out and its position is used as the primary index of invert_bwt_bytes
     Written by: Kuah Jia Chen
     Input: bwt_string is a string
     Return: original string str[1 . . . n] from a binary encoded file
@@ -169,58 +1393,87 @@ def invert_bwt_string(bwt_string):
         Input: O(N), where N is the length of bwt_string
         Aux: O(N), where N is the length of bwt_string
     """
+    primary_index = bwt_string.index("$")
+    bwt_bytes = (bwt_string[:primary_index] + bwt_string[primary_index + 1:]).encode("latin-1")
 
-    order_table, rank_table, frequency_table = get_frequency_order_rank_table(bwt_string)
-
-    original_string = [None] * len(bwt_string)
-    original_string[-1] = "$"
-    original_string_index = len(original_string) - 2
+    return invert_bwt_bytes(bwt_bytes, primary_index).decode("latin-1")
 
-    current_bwt_index = 0
 
-    while bwt_string[current_bwt_index] != "$":
-        current_char = bwt_string[current_bwt_index]
-        original_string[original_string_index] = current_char
-        current_rank = rank_table[ord(current_char) - 36]
-        current_order = order_table[current_bwt_index] - 1
-        next_char = current_rank + current_order - 1
-        current_bwt_index = next_char
-        original_string_index -= 1
+def invert_bwt_bytes(bwt_bytes, primary_index):
+    """
+    Description: invert the sentinel-free bwt of a block of bytes, the sentinel is smaller than every byte and would
+                 be at the row primary_index, so the row of the sentinel suffix is always row 0
+    Written by: Kuah Jia Chen
+    Input: bwt_bytes is a bytes-like object and primary_index is an integer
+    Return: the original block as a bytes object
+    Time complexity (Worst case) : O(N), where N is the length of bwt_bytes
+    Space complexity:
+        Input: O(N), where N is the length of bwt_bytes
+        Aux: O(N), where N is the length of bwt_bytes
+    """
+    n = len(bwt_bytes)
+    next_index = get_lf_next_index(bwt_bytes, primary_index)
 
-    original_string = original_string[:-1]
+    ans = bytearray(n)
+    j = 0
+    for k in range(n - 1, -1, -1):
+        ans[k] = bwt_bytes[j]
+        j = next_index[j]
 
-    return "".join(original_string)
+    return bytes(ans)
 
 
-def get_frequency_order_rank_table(bwt_string):
+def get_lf_next_index(bwt_bytes, primary_index):
     """
-    Description:  get the frequency table, order table and rank table for the bwt_string
+    Description: get the LF mapping of the sentinel-free bwt as positions in bwt_bytes, next_index[j] is the
+                 position of the byte that comes before bwt_bytes[j] in the original block, NumPy is used to
+                 compute it with a stable argsort when it is installed
     Written by: Kuah Jia Chen
-    Input: bwt_string is a string
-    Return: get the frequency table, order table and rank table for the bwt_string
-    Time complexity (Worst case) : O(N), where N is the length of bwt_string
+    Input: bwt_bytes is a bytes-like object and primary_index is an integer
+    Return: an array('I') with the next position of every position of bwt_bytes
+    Time complexity (Worst case) : O(N) without NumPy and O(N * log N) with NumPy, where N is the length of
+                                   bwt_bytes
     Space complexity:
-        Input: O(N), where N is the length of bwt_string
-        Aux: O(N), where N is the length of bwt_string
+        Input: O(N), where N is the length of bwt_bytes
+        Aux: O(N), where N is the length of bwt_bytes
     """
-    frequency_table = [0] * 91
-    order_table = []
-    rank_table = []
+    n = len(bwt_bytes)
 
-    for i in range(len(bwt_string)):
-        current_char = bwt_string[i]
-        current_index = ord(current_char) - 36
-        frequency_table[current_index] += 1
-        order_table.append(frequency_table[current_index])
+    if numpy is not None and n > 0:
+        last_column = numpy.frombuffer(bytes(bwt_bytes), dtype=numpy.uint8)
 
-    for i in range(len(frequency_table)):
-        if i == 0:
-            rank_table.append(frequency_table[0])
-        else:
-            current_num = rank_table[i - 1] + frequency_table[i - 1]
-            rank_table.append(current_num)
+        # the k-th byte in stable sorted order is in row k + 1, since row 0 starts with the sentinel
+        rows = numpy.empty(n, dtype=numpy.int64)
+        rows[numpy.argsort(last_column, kind="stable")] = numpy.arange(1, n + 1, dtype=numpy.int64)
+
+        # rows after the primary index are shifted by one since the sentinel is left out of bwt_bytes
+        rows -= rows > primary_index
+
+        next_index = array.array("I")
+        next_index.frombytes(rows.astype(numpy.uint32).tobytes())
+        return next_index
+
+    # order_table[j] is the number of times bwt_bytes[j] occurs before position j
+    frequency_table = [0] * 256
+    order_table = array.array("I", [0]) * n
+    for j in range(n):
+        byte = bwt_bytes[j]
+        order_table[j] = frequency_table[byte]
+        frequency_table[byte] += 1
 
-    return order_table, rank_table, frequency_table
+    # rank_table[c] is the first row that starts with c, row 0 starts with the sentinel
+    rank_table = [0] * 256
+    total = 1
+    for byte in range(256):
+        rank_table[byte] = total
+        total += frequency_table[byte]
+
+    # reuse order_table to hold the next position
+    for j in range(n):
+        row = rank_table[bwt_bytes[j]] + order_table[j]
+        order_table[j] = row if row <= primary_index else row - 1
+
+    return order_table
 
 
 class Node:
@@ -268,160 +1521,354 @@ class HuffmanDecoder:
             Aux: O(1)
         """
         self.root = Node()
+        self.code_words = []
+        self.table_bits = 0
+        self.table_symbols = None
+        self.table_lengths = None
+        self.secondary_tables = []
+
+    @classmethod
+    def from_code_lengths(cls, code_lengths):
+        """
+        Description: create a HuffmanDecoder from canonical code lengths and build its lookup tables directly,
+                     the tree is not built so only decode_character can be used, which returns the integer symbol
+        Written by: Kuah Jia Chen
+        Input: code_lengths is a list of non-negative integers indexed by symbol, 0 for a symbol that does not occur
+        Return: a HuffmanDecoder instance
+        Time complexity (Worst case) : O(K + T), where K is the length of code_lengths and T is the size of the
+                                       lookup tables
+        Space complexity:
+            Input: O(K), where K is the length of code_lengths
+            Aux: O(K + T), where K is the length of code_lengths and T is the size of the lookup tables
+        """
+        huffman_tree = cls()
+        code_words = canonical_code_words(code_lengths)
+
+        for symbol in range(len(code_words)):
+            if code_words[symbol] is not None:
+                code_word, code_length = code_words[symbol]
+                huffman_tree.code_words.append((code_word, code_length, symbol))
 
-    def insert(self, bit_encoding, character):
+        huffman_tree.build_table()
+
+        return huffman_tree
+
+    def insert(self, code_word, code_length, character):
         """
-        Description: insert the bit_encoding for the character to the Huffman tree
+        Description: insert the code_word for the character to the Huffman tree
         Written by: Kuah Jia Chen
-        Input: bit_encoding is a list of bit strings and character is a string
+        Input: code_word is an integer, code_length is the number of bits in code_word and character is a string
         Return: None
-        Time complexity (Worst case) : O(N), where N is the length of bit_encoding
+        Time complexity (Worst case) : O(N), where N is the code_length
         Space complexity:
-            Input: O(N), where N is the length of bit_encoding
-            Aux: O(N), where N is the length of bit_encoding
+            Input: O(1)
+            Aux: O(N), where N is the code_length
         """
 
         current_node = self.root
 
-        for bit in bit_encoding:
+        for i in range(code_length - 1, -1, -1):
+            bit = (code_word >> i) & 1
             # if path exists, then insert the bit
-            if current_node.child[int(bit)] is not None:
-                current_node = current_node.child[int(bit)]
+            if current_node.child[bit] is not None:
+                current_node = current_node.child[bit]
             # if path doesn't exist, create a node and insert the bit
             else:
-                current_node.child[int(bit)] = Node()
-                current_node = current_node.child[int(bit)]
+                current_node.child[bit] = Node()
+                current_node = current_node.child[bit]
         # put the character at the last node
         current_node.value = character
 
-    def find_character(self, bit_string, start_index):
+        # remember the code word for the lookup table, which has to be rebuilt
+        self.code_words.append((code_word, code_length, character))
+        self.table_symbols = None
+
+    def build_table(self, table_bits=DEFAULT_HUFFMAN_TABLE_BITS):
         """
-        Description: find the character using the bit string from the Huffman tree
+        Description: build the lookup tables from the inserted code words, the primary table is indexed by the next
+                     table_bits bits and gives the character and its code length, a code word longer than
+                     table_bits is found in the secondary table of its first table_bits bits
         Written by: Kuah Jia Chen
-        Input: bit_string is a string, start_index is an integer
-        Return: ans is the character with the bit_string encoding and (start_index + counter)
-                is the updated pointer value
-        Time complexity (Worst case) : O(N), where N is the length of bit_string
+        Input: table_bits is a positive integer
+        Return: None
+        Time complexity (Worst case) : O(2^K + S * 2^L), where K is the number of bits of the primary table, S is
+                                       the number of secondary tables and L is the number of bits of the largest one
         Space complexity:
-            Input: O(N), where N is the length of bit_string
+            Input: O(1)
+            Aux: O(2^K + S * 2^L), where K is the number of bits of the primary table, S is the number of secondary
+                 tables and L is the number of bits of the largest one
+        """
+        max_code_length = 0
+        for code_word, code_length, character in self.code_words:
+            max_code_length = max(max_code_length, code_length)
+
+        # the primary table does not need more bits than the longest code word
+        self.table_bits = max(1, min(table_bits, max_code_length))
+        # a length of 0 means there is no code word with this prefix, or that it is in a secondary table
+        self.table_symbols = [None] * (1 << self.table_bits)
+        self.table_lengths = [0] * (1 << self.table_bits)
+        self.secondary_tables = []
+
+        # group the long code words by their first table_bits bits
+        long_code_words = {}
+
+        for code_word, code_length, character in self.code_words:
+            if code_length <= self.table_bits:
+                # every index that starts with the code word decodes to the character
+                shift = self.table_bits - code_length
+                for index in range(code_word << shift, (code_word + 1) << shift):
+                    self.table_symbols[index] = character
+                    self.table_lengths[index] = code_length
+            else:
+                prefix = code_word >> (code_length - self.table_bits)
+                if prefix not in long_code_words:
+                    long_code_words[prefix] = []
+                long_code_words[prefix].append((code_word, code_length, character))
+
+        for prefix in long_code_words:
+            extra_bits = 0
+            for code_word, code_length, character in long_code_words[prefix]:
+                extra_bits = max(extra_bits, code_length - self.table_bits)
+
+            secondary_symbols = [None] * (1 << extra_bits)
+            secondary_lengths = [0] * (1 << extra_bits)
+
+            for code_word, code_length, character in long_code_words[prefix]:
+                suffix_length = code_length - self.table_bits
+                suffix = code_word & ((1 << suffix_length) - 1)
+                shift = extra_bits - suffix_length
+                for index in range(suffix << shift, (suffix + 1) << shift):
+                    secondary_symbols[index] = character
+                    secondary_lengths[index] = code_length
+
+            # the primary entry points at the secondary table
+            self.table_symbols[prefix] = len(self.secondary_tables)
+            self.secondary_tables.append((extra_bits, secondary_symbols, secondary_lengths))
+
+    def decode_character(self, bit_reader):
+        """
+        Description: find the character of the next code word of bit_reader with the lookup tables, the tables are
+                     built on the first call after an insert
+        Written by: Kuah Jia Chen
+        Input: bit_reader is a BitReader
+        Return: the character with the bit encoding, the position of bit_reader is moved past the code word
+        Time complexity (Worst case) : O(1)
+        Space complexity:
+            Input: O(1)
+            Aux: O(1)
+        """
+        if self.table_symbols is None:
+            self.build_table()
+
+        index = bit_reader.peek_bits(self.table_bits)
+        code_length = self.table_lengths[index]
+
+        if code_length > 0:
+            bit_reader.skip_bits(code_length)
+            return self.table_symbols[index]
+
+        if self.table_symbols[index] is None:
+            raise ValueError("invalid Huffman code word")
+
+        # the code word is longer than table_bits, look it up in the secondary table
+        extra_bits, secondary_symbols, secondary_lengths = self.secondary_tables[self.table_symbols[index]]
+        index = bit_reader.peek_bits(self.table_bits + extra_bits) & ((1 << extra_bits) - 1)
+        code_length = secondary_lengths[index]
+
+        if code_length == 0:
+            raise ValueError("invalid Huffman code word")
+
+        bit_reader.skip_bits(code_length)
+        return secondary_symbols[index]
+
+    def find_character(self, bit_reader):
+        """
+        Description: find the character using the next bits of bit_reader from the Huffman tree
+        Written by: Kuah Jia Chen
+        Input: bit_reader is a BitReader
+        Return: the character with the bit encoding, the position of bit_reader is moved past the code word
+        Time complexity (Worst case) : O(N), where N is the length of the longest code word
+        Space complexity:
+            Input: O(1)
             Aux: O(1)
         """
-        ans = None
         current_node = self.root
-        counter = 0
 
-        for i in range(start_index, len(bit_string)):
-            current_bit = bit_string[i]
-            current_node = current_node.child[int(current_bit)]
-            counter += 1
+        while bit_reader.bits_remaining() > 0:
+            current_node = current_node.child[bit_reader.read_bits(1)]
+
+            if current_node is None:
+                raise ValueError("invalid Huffman code word")
 
             if current_node.value is not None:
-                ans = current_node.value
-                current_node = self.root
-                break
+                return current_node.value
 
-        return ans, start_index + counter
+        return None
 
 
-def bin_to_int(bit_string, flip=False):
+def canonical_code_words(code_lengths):
     """
-    Description: convert binary to integer
+    Description: rebuild the canonical Huffman code words from the code lengths, the code words are consecutive
+                 integers in the order of (code length, symbol)
     Written by: Kuah Jia Chen
-    Input: bit_string is a string
-    Return: the bit_string in integer form
-    Time complexity (Worst case) : O(N), where N is the length of bit_string
+    Input: code_lengths is a list of non-negative integers indexed by symbol, 0 for a symbol that does not occur
+    Return: a list with the (value, number of bits) code word of each symbol, None for a symbol that does not occur
+    Time complexity (Worst case) : O(K + L), where K is the length of code_lengths and L is the longest code length
     Space complexity:
-        Input: O(N), where N is the length of bit_string
-        Aux: O(1)
+        Input: O(K), where K is the length of code_lengths
+        Aux: O(K + L), where K is the length of code_lengths and L is the longest code length
     """
-    if flip:
-        bit_string[0] = "1"
+    max_code_length = max(code_lengths) if code_lengths else 0
 
-    ans = 0
-    i = len(bit_string) - 1
-    j = 0
+    # count the number of code words of each length
+    length_count = [0] * (max_code_length + 1)
+    for code_length in code_lengths:
+        if code_length > 0:
+            length_count[code_length] += 1
 
-    while i >= 0:
-        ans += 2 ** j * (int(bit_string[i]))
-        i -= 1
-        j += 1
-    return ans
+    # get the first code word of each length
+    next_code = [0] * (max_code_length + 1)
+    code = 0
+    for code_length in range(1, max_code_length + 1):
+        code = (code + length_count[code_length - 1]) << 1
+        next_code[code_length] = code
 
+    code_words = [None] * len(code_lengths)
+    for symbol in range(len(code_lengths)):
+        code_length = code_lengths[symbol]
+        if code_length > 0:
+            code_words[symbol] = (next_code[code_length], code_length)
+            next_code[code_length] += 1
 
-def ascii_to_int(bit_string, start_index):
+    return code_words
+
+
+def ascii_to_int(bit_reader):
     """
-    Description: convert ascii to integer
+    Description: read the next 7 bits ascii code from bit_reader
     Written by: Kuah Jia Chen
-    Input: bit_string is a string, start_index is an integer
-    Return: ans is the bit_string in integer form, and (start_index + 7) is the updated pointer value
+    Input: bit_reader is a BitReader
+    Return: the ascii code as an integer
     Time complexity (Worst case) : O(1)
     Space complexity:
-        Input: O(N), where N is the length of bit_string
+        Input: O(1)
         Aux: O(1)
     """
-    ans = 0
-
-    i = start_index + 7 - 1
-    j = 0
-    counter = 7
+    return bit_reader.read_bits(7)
 
-    while counter > 0:
-        ans += 2 ** j * (int(bit_string[i]))
-        i -= 1
-        j += 1
-        counter -= 1
 
-    return ans, start_index + 7
-
-
-def elias_decoder(bit_string, start_index):
+def elias_decoder(bit_reader):
     """
-    Description: decode the elias code word to the integer
+    Description: decode the next elias code word of bit_reader to the integer, a code word of at most
+                 ELIAS_TABLE_BITS bits is found with a single table lookup
     Written by: Kuah Jia Chen
-    Input: bit_string is a string, start_index is an integer
-    Return: ans is the current elias code word in integer form, and pointer is the updated pointer value
-    Time complexity (Worst case) : O(log N), where N is the value of ans
+    Input: bit_reader is a BitReader
+    Return: the current elias code word in integer form
+    Time complexity (Worst case) : O(1) for a code word that fits in the table, otherwise O(log N), where N is the
+                                   value of the decoded integer
     Space complexity:
-        Input: O(M), where M is the length of bit_string
+        Input: O(1)
         Aux: O(1)
     """
-    pointer = start_index
-    length_to_check = 1
-    ans = None
+    window = bit_reader.peek_bits(ELIAS_TABLE_BITS)
+    code_length = ELIAS_DECODE_LENGTHS[window]
 
-    while pointer < len(bit_string):
+    # the bits after the end of the stream are zeros, so a code word found there is not a real one
+    if 0 < code_length <= bit_reader.bits_remaining():
+        bit_reader.skip_bits(code_length)
+        return ELIAS_DECODE_VALUES[window]
 
-        current_bit = bit_string[pointer]
+    length_to_check = 1
+
+    while bit_reader.bits_remaining() > 0:
         # use the formula to get the current elias encoding and find the length that used to encode the final integer
-        if current_bit == "0":
-            current_elias_encoding = bit_string[pointer:pointer + length_to_check]
-            current_elias_int = bin_to_int(current_elias_encoding, True) + 1
-            pointer += length_to_check
-            length_to_check = current_elias_int
+        if bit_reader.peek_bits(1) == 0:
+            # the leading "0" of a length component stands for a "1"
+            current_elias_int = bit_reader.read_bits(length_to_check) | (1 << (length_to_check - 1))
+            length_to_check = current_elias_int + 1
 
         else:
-            # if current_bit is not "0", (i.e., "1"), it means we reach the bit that represents the final integer
+            # if current bit is "1", it means we reach the bits that represent the final integer
             # thus, we can use the length_to_check to find the value of final integer
-            current_elias_encoding = bit_string[pointer:pointer + length_to_check]
-            current_elias_int = bin_to_int(current_elias_encoding)
-            pointer += length_to_check
-            # reset previous elias
-            length_to_check = 1
-            ans = current_elias_int
-            break
+            return bit_reader.read_bits(length_to_check)
 
-    return ans, pointer
+    raise ValueError("unexpected end of the bit stream")
 
 
-def writeOutput(original_string):
+def compute_elias_code(input_num):
+    """
+    Description: compute the elias code word for the input_num with integer arithmetic, the same as the encoder
+    Written by: Kuah Jia Chen
+    Input: input_num is a positive integer
+    Return: the elias code word as a (value, number of bits) tuple
+    Time complexity (Worst case) : O(log* N), where N is the input_num
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    code_word = input_num
+    code_length = input_num.bit_length()
+    length_of_bits = code_length
+
+    while length_of_bits > 1:
+        current_length = length_of_bits - 1
+        length_of_bits = current_length.bit_length()
+
+        # drop the leading "1" of the component and put it in front of the code word
+        code_word |= (current_length ^ (1 << (length_of_bits - 1))) << code_length
+        code_length += length_of_bits
+
+    return code_word, code_length
+
+
+def build_elias_decode_table(table_bits):
+    """
+    Description: build the lookup table of elias_decoder, every table_bits bits window that starts with a whole
+                 code word maps to the decoded integer and the length of the code word, any other window maps to
+                 a length of 0
+    Written by: Kuah Jia Chen
+    Input: table_bits is a positive integer
+    Return: the decoded integers as an array and the code word lengths as a bytearray, both of size 2^table_bits
+    Time complexity (Worst case) : O(2^table_bits)
+    Space complexity:
+        Input: O(1)
+        Aux: O(2^table_bits)
+    """
+    values = array.array("I", [0]) * (1 << table_bits)
+    lengths = bytearray(1 << table_bits)
+
+    # the code words get longer as the integers grow, so stop at the first one that does not fit
+    input_num = 1
+    code_word, code_length = compute_elias_code(input_num)
+    while code_length <= table_bits:
+        first = code_word << (table_bits - code_length)
+        last = (code_word + 1) << (table_bits - code_length)
+        values[first:last] = array.array("I", [input_num]) * (last - first)
+        lengths[first:last] = bytes((code_length,)) * (last - first)
+
+        input_num += 1
+        code_word, code_length = compute_elias_code(input_num)
+
+    return values, lengths
+
+
+ELIAS_DECODE_VALUES, ELIAS_DECODE_LENGTHS = build_elias_decode_table(ELIAS_TABLE_BITS)
+
+
+def writeOutput(original_string, output_file_name="recovered.txt"):
     """
     Description: write the original_string to the text file
     Written by: Kuah Jia Chen
-    Input: original_string is the string to write to the file
+    Input: original_string is the string or the bytes object to write to the file and output_file_name is a string,
+           "-" writes to the standard output
     Return: None
     """
-    # Open output file with correct name
-    outputFile = open("recovered.txt", "w")
+    if output_file_name == "-":
+        write_blocks([original_string if isinstance(original_string, bytes) else original_string.encode("utf-8")])
+        return
+
+    # Open output file with correct name, the block container recovers bytes
+    outputFile = open(output_file_name, "wb" if isinstance(original_string, bytes) else "w")
     # write results to an output file
     outputFile.write(original_string)
     # Close output file
@@ -429,13 +1876,58 @@ def writeOutput(original_string):
 
 
 if __name__ == '__main__':
-    # retrieve the file paths from the commandline arguments
-    _, filename1 = sys.argv
-    print("Number of arguments passed : ", len(sys.argv))
-    # since we know the program takes one argument
-    print("First argument : ", filename1)
-    input_bit_stream = BinaryUnPacker(filename1)
-    input_string = input_bit_stream.get_bit_string()
-    print("input_string", input_string)
-    # print(("ans", q2_decoder(input_string)))
-    writeOutput(q2_decoder(input_string))
+    # retrieve the file path and options from the commandline arguments
+    parser = argparse.ArgumentParser(description="Decode a file encoded by the Burrows-Wheeler Transform encoder")
+    parser.add_argument("input_file")
+    parser.add_argument("-o", "--output", default="recovered.txt",
+                        help="file to write the recovered text to, - writes to the standard output")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of processes that decode blocks of a block container in parallel, "
+                             "0 uses all cores")
+    parser.add_argument("--start", type=int, default=None,
+                        help="first byte of the range to recover from a block container")
+    parser.add_argument("--end", type=int, default=None,
+                        help="end (exclusive) of the range to recover from a block container")
+    parser.add_argument("--count", action="append", default=None,
+                        help="print the number of occurrences of a pattern in a block container encoded with "
+                             "--fm-index instead of decoding it, can be given more than once")
+    parser.add_argument("--locate", action="append", default=None,
+                        help="print the 0-based positions of a pattern in a block container encoded with "
+                             "--fm-index instead of decoding it, can be given more than once")
+    arguments = parser.parse_args()
+    filename1 = arguments.input_file
+    workers = arguments.workers if arguments.workers > 0 else None
+
+    # block containers are recognised by their header, anything else is a single q2_encoder stream
+    input_file = open(filename1, "rb")
+    is_container = is_block_container(input_file)
+    input_file.close()
+    if is_container:
+        if arguments.count is not None or arguments.locate is not None:
+            # the FM-indexes are built once and shared by every pattern
+            archive = FMArchive(filename1)
+            for pattern in arguments.count or []:
+                print(archive.count(pattern))
+            for pattern in arguments.locate or []:
+                for position in archive.locate(pattern):
+                    print(position)
+        else:
+            if arguments.start is None and arguments.end is None:
+                blocks = iter_block_decoder(filename1, workers)
+            else:
+                start = arguments.start if arguments.start is not None else 0
+                end = arguments.end if arguments.end is not None else sys.maxsize
+                blocks = iter_range_decoder(filename1, start, end, workers)
+
+            # the blocks are written as they are decoded
+            if arguments.output == "-":
+                write_blocks(blocks)
+            else:
+                output_file = open(arguments.output, "wb")
+                write_blocks(blocks, output_file)
+                output_file.close()
+        sys.exit(0)
+
+    input_bit_stream = BitReader(filename1)
+    writeOutput(q2_decoder(input_bit_stream), arguments.output)
+    input_bit_stream.close()
@@ -2,84 +2,193 @@
 # Question 2 (Encoder) #
 ########################
 
+import argparse
+import collections
+import concurrent.futures
 import heapq
+import io
+import os
+import shutil
 import sys
-
-
-class BinaryPacker:
-
-    def __init__(self, file_name):
+import tempfile
+
+# the container written by q2_block_encoder starts with the magic bytes and the version, and is followed by
+# one frame per block, an empty frame that marks the end of the frames, the block index and the footer
+CONTAINER_MAGIC = b"Q2BW"
+CONTAINER_VERSION = 4
+FRAME_LENGTH_BYTES = 4
+INDEX_FIELD_BYTES = 8
+FOOTER_MAGIC = b"Q2IX"
+DEFAULT_BLOCK_SIZE = 900 * 1000
+
+# bits of the flags byte of a frame
+FLAG_CANONICAL_HUFFMAN = 1
+FLAG_MOVE_TO_FRONT = 2
+FLAG_FM_INDEX = 4
+FLAG_RANS = 8
+FLAG_DEDUP = 16
+
+# the FM-index samples the suffix array at every DEFAULT_FM_SAMPLE_RATE-th position of the block
+DEFAULT_FM_SAMPLE_RATE = 32
+
+# the dedup pre-pass looks for repeats with a rolling hash over DEDUP_WINDOW bytes, and only replaces a repeat of
+# at least DEDUP_MIN_MATCH bytes by a back-reference
+DEDUP_WINDOW = 32
+DEDUP_MIN_MATCH = 64
+DEDUP_HASH_BASE = 257
+DEDUP_HASH_MASK = (1 << 61) - 1
+
+# the options of q2_block_encoder for each compression level, every level uses the move-to-front stage and the
+# rANS coder, which encoded and decoded faster and compressed better than canonical Huffman code words with or
+# without the move-to-front stage, the low levels use small blocks, which sort faster and take less memory, and the
+# block size grows with the level, levels 7 to 9 add the long match dedup pre-pass, which makes the sort of long
+# repeats much faster but leaves fewer repeats for the bwt
+COMPRESSION_LEVELS = {
+    1: {"block_size": 50 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": False},
+    2: {"block_size": 100 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": False},
+    3: {"block_size": 200 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": False},
+    4: {"block_size": 300 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": False},
+    5: {"block_size": 400 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": False},
+    6: {"block_size": 500 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": False},
+    7: {"block_size": 600 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": True},
+    8: {"block_size": 800 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": True},
+    9: {"block_size": 900 * 1000, "move_to_front": True, "entropy_coder": "rans", "dedup": True},
+}
+
+# the symbols that write a run of move-to-front zeros in bijective base 2
+RUNA = 0
+RUNB = 1
+
+# the canonical Huffman code words are limited to this many bits to keep the decoder lookup tables small
+DEFAULT_MAX_CODE_LENGTH = 15
+
+# the rANS coder scales the symbol frequencies to a total of 2^RANS_PROBABILITY_BITS, and keeps its state in
+# [RANS_LOWER_BOUND, RANS_LOWER_BOUND * 256) by moving one byte at a time
+RANS_PROBABILITY_BITS = 12
+RANS_LOWER_BOUND = 1 << 23
+RANS_STATE_BYTES = 4
+
+# BitWriter moves whole bytes out of its accumulator once it holds a machine word,
+# and writes to the file once its buffer reaches DEFAULT_WRITE_BUFFER_SIZE bytes
+ACCUMULATOR_BITS = 64
+DEFAULT_WRITE_BUFFER_SIZE = 1 << 16
+
+# the elias code words of the integers below ELIAS_TABLE_SIZE are computed once, most run lengths are small
+ELIAS_TABLE_SIZE = 1 << 12
+
+
+class BitWriter:
+
+    def __init__(self, file_name, buffer_size=DEFAULT_WRITE_BUFFER_SIZE):
         """
-        Description: initialise the attributes of an instance of BinaryPacker
+        Description: initialise the attributes of an instance of BitWriter, the bits are accumulated in an integer
+                     and whole bytes are moved to a buffer that is written to the file buffer_size bytes at a time
         Written by: Kuah Jia Chen
-        Input: file_name is a string
+        Input: file_name is a string or an opened binary file object (e.g., io.BytesIO), buffer_size is an integer
         Return: None
         Time complexity (Worst case) : O(1)
         Space complexity:
             Input: O(1)
             Aux: O(1)
         """
-        self.my_bit_string = []
-        self.file = open(file_name, "wb")
+        self.accumulator = 0
+        self.bit_count = 0
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        if isinstance(file_name, str):
+            self.file = open(file_name, "wb")
+        else:
+            self.file = file_name
 
-    def append(self, bit_string):
+    def write_bits(self, value, nbits):
         """
-        Description: append the bit_string to self.bit_string and pack it to file
+        Description: append the lowest nbits bits of value, most significant bit first
         Written by: Kuah Jia Chen
-        Input: bit_string is an array of "bits" string, e.g., ["0", "1", "0"]
+        Input: value is a non-negative integer that fits in nbits bits and nbits is a non-negative integer
+        Return: None
+        Time complexity (Worst case) : O(1) amortised for nbits up to the word size
+        Space complexity:
+            Input: O(1)
+            Aux: O(1) amortised
+        """
+        self.accumulator = (self.accumulator << nbits) | value
+        self.bit_count += nbits
+
+        # move the whole bytes out once the accumulator holds a machine word
+        if self.bit_count >= ACCUMULATOR_BITS:
+            self.pack_to_buffer()
+
+    def pack_to_buffer(self):
+        """
+        Description: move the whole bytes in the accumulator to the buffer, and write the buffer to the file once
+                     it reaches buffer_size bytes
+        Written by: Kuah Jia Chen
+        Input: None
         Return: None
-        Time complexity (Worst case) : O(N + M), where N and M is the length of self.my_bit_string and
-                                       bit_string respectively
+        Time complexity (Worst case) : O(N), where N is the number of bits in the accumulator
         Space complexity:
-            Input: O(M), where M is the length of bit_string
-            Aux: O(N + M), where N and M is the length of self.my_bit_string and bit_string respectively
+            Input: O(1)
+            Aux: O(N), where N is the number of bits in the accumulator
         """
-        self.my_bit_string = self.my_bit_string + bit_string
-        # pack to file whenever my_bit_string exceed 8 characters to keep the bit string short throughout the process
-        self.pack_to_file()
+        remaining_bits = self.bit_count & 7
+        whole_bytes = self.bit_count >> 3
+
+        self.buffer += (self.accumulator >> remaining_bits).to_bytes(whole_bytes, byteorder='big')
+        self.accumulator &= (1 << remaining_bits) - 1
+        self.bit_count = remaining_bits
 
-    def pack_to_file(self):
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
         """
-        Description: pack the current bits into file
+        Description: write the buffered whole bytes to the file in one call
         Written by: Kuah Jia Chen
         Input: None
         Return: None
-        Time complexity (Worst case) : O(N), where N is the length of self.my_bit_string
+        Time complexity (Worst case) : O(B), where B is the length of the buffer
         Space complexity:
             Input: O(1)
-            Aux: O(N), where N is the length of self.bit_string
+            Aux: O(1)
         """
-        # while there is more than 8 bits in the self.my_bit_string
-        while len(self.my_bit_string) >= 8:
-            # get the first eight bit string to write
-            my_bit_string_to_write = "".join(self.my_bit_string[:8])
-            # update self.my_bit_string
-            self.my_bit_string = self.my_bit_string[8:]
-            # convert it to integer
-            my_number = int(my_bit_string_to_write, 2)
-            # convert it to bytes and write it to file
-            my_byte = my_number.to_bytes(1, byteorder='big')
-            self.file.write(my_byte)
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+
+    def write_bytes(self, data):
+        """
+        Description: pad the last partial byte with zeros and append the bytes of data as they are
+        Written by: Kuah Jia Chen
+        Input: data is a bytes-like object
+        Return: None
+        Time complexity (Worst case) : O(N), where N is the length of data
+        Space complexity:
+            Input: O(N), where N is the length of data
+            Aux: O(N), where N is the length of data
+        """
+        if self.bit_count & 7:
+            self.write_bits(0, 8 - (self.bit_count & 7))
+        self.pack_to_buffer()
+        self.buffer += data
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
 
     def pack_to_file_last_byte(self):
         """
-        Description: pack the last byte into file
+        Description: pad the last partial byte with zeros and write every remaining byte to the file
         Written by: Kuah Jia Chen
         Input: None
         Return: None
-        Time complexity (Worst case) : O(N), where N is the length of self.my_bit_string
+        Time complexity (Worst case) : O(B), where B is the length of the buffer
         Space complexity:
             Input: O(1)
-            Aux: O(N), where N is the length of self.bit_string
+            Aux: O(1)
         """
-        if len(self.my_bit_string) >= 1:
-            my_bit_string_to_write = "".join(self.my_bit_string[:])
-            # print(my_bit_string_to_write)
-            while len(my_bit_string_to_write) < 8:
-                my_bit_string_to_write += "0"
-            my_number = int(my_bit_string_to_write, 2)
-            my_byte = my_number.to_bytes(1, byteorder='big')
-            self.file.write(my_byte)
+        if self.bit_count & 7:
+            self.write_bits(0, 8 - (self.bit_count & 7))
+        self.pack_to_buffer()
+        self.flush()
 
     def close(self):
         """
@@ -95,87 +204,894 @@ class BinaryPacker:
         self.file.close()
 
 
-def q2_encoder(input_string, file_name):
+def q2_encoder(input_string, file_name, level=None):
+    """
+    Description: encode the input_string using its Burrows-Wheeler Transform and write it to the file, without a
+                 level the single stream format is written, with a level the utf-8 bytes of input_string are
+                 written into a block container with the options of that compression level
+    Written by: Kuah Jia Chen
+    Input: input_string is a string, file_name is a string and level is None or an integer from 1 to 9
+    Return: None
+    Time complexity (Worst case) : O(N * log N + N + log N), where N is the length of bwt_string
+    Space complexity:
+        Input: O(N + M), where N is the length of input_string and M is the length of file_name
+        Aux: O(N + A + B * C), where N is the length of bwt_string, A is the length of the bwt_run_length_tuples,
+             B is the length of frequency_table, C is the max(len(codeword)) in character_encoding
+    """
+    if level is not None:
+        input_file = io.BytesIO(input_string.encode("utf-8"))
+        return q2_block_encoder(input_file, file_name, **level_options(level))
+
+    # create BitWriter instance
+    output_binary_stream = BitWriter(file_name)
+
+    write_bwt_encoding(input_string, output_binary_stream)
+
+    # write the last byte to file
+    output_binary_stream.pack_to_file_last_byte()
+    # close the file
+    output_binary_stream.close()
+
+    return None
+
+
+def level_options(level):
     """
-    Description: encode the input_string using its Burrows-Wheeler Transform and write it to the file
+    Description: get the options of q2_block_encoder for the compression level
     Written by: Kuah Jia Chen
-    Input: input_string is a string and file_name is a string
+    Input: level is an integer from 1 to 9
+    Return: a dictionary of keyword arguments for q2_block_encoder
+    Time complexity (Worst case) : O(1)
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    if level not in COMPRESSION_LEVELS:
+        raise ValueError("the compression level must be an integer from 1 to 9: " + str(level))
+
+    return dict(COMPRESSION_LEVELS[level])
+
+
+def write_bwt_encoding(input_string, output_binary_stream):
+    """
+    Description: encode the input_string using its Burrows-Wheeler Transform and append the bits to
+                 output_binary_stream, the last partial byte is left to the caller
+    Written by: Kuah Jia Chen
+    Input: input_string is a string and output_binary_stream is a BitWriter
     Return: None
-    Time complexity (Worst case) : O(N^2 * log N + N * log N + N + log N), where N is the length of bwt_string
+    Time complexity (Worst case) : O(N * log N + N + log N), where N is the length of bwt_string
     Space complexity:
         Input: O(N + M), where N is the length of input_string and M is the length of file_name
-        Aux: O(N^2 + A + B * C), where N is the length of bwt_string, A is the length of the bwt_run_length_tuples,
+        Aux: O(N + A + B * C), where N is the length of bwt_string, A is the length of the bwt_run_length_tuples,
              B is the length of frequency_table, C is the max(len(codeword)) in character_encoding
     """
 
     # get the bwt string for input_string
     bwt_string = bwt(input_string)
 
-    # get the elias codewords for the length of bwt_string
-    elias_length = elias(len(bwt_string))
-
     # construct the frequency table and get the unique characters in the bwt_string
     frequency_table, unique_characters = get_frequency_unique(bwt_string)
 
-    # get the elias codewords for the number of unique characters
-    elias_unique_char = elias(len(unique_characters))
-
-    # get the ascii code word in 7 bits for each unique character
-    ascii_code_word = []
+    # get the huffman code word for each unique character as (value, number of bits)
     character_encoding = huffman_encoder(bwt_string, frequency_table, unique_characters)
-    for i in range(len(character_encoding)):
-
-        if character_encoding[i] is not None:
-            current_ascii = i + 37 if i != len(character_encoding) - 1 else 36
-            ascii_code_word.append("".join(bit_representation(current_ascii, True)))
-
-    # get the huffman code word for each unique character
-    huffman_code_word = []
+    huffman_code_word = [None] * len(character_encoding)
     for i in range(len(character_encoding)):
         if character_encoding[i] is not None:
             current_code_word = "".join(character_encoding[i])[::-1]
-            huffman_code_word.append(current_code_word)
+            huffman_code_word[i] = (int(current_code_word, 2), len(current_code_word))
 
-    # get the elias code word the length of its constructed Huffman code word for each unique character
-    elias_code_word = []
-    for i in range(len(huffman_code_word)):
-        current_length = len(huffman_code_word[i])
-        current_elias_code_word = elias(current_length)
-        elias_code_word.append(current_elias_code_word)
+    # write the elias code word for length of bwt_string and number of unique characters
+    output_binary_stream.write_bits(*elias_code(len(bwt_string)))
+    output_binary_stream.write_bits(*elias_code(len(unique_characters)))
 
-    # create BinaryPacker instance
-    output_binary_stream = BinaryPacker(file_name)
-
-    # append and write the elias code word for length of bwt_string and number of unique characters to file
-    output_binary_stream.append(list(elias_length))
-    output_binary_stream.append(list(elias_unique_char))
-
-    # append and write the ascii, elias of length for Huffman code word, and huffman code word
-    # for each character to file
-    for i in range(len(ascii_code_word)):
-        output_binary_stream.append(list(ascii_code_word[i]))
-        output_binary_stream.append(list(elias_code_word[i]))
-        output_binary_stream.append(list(huffman_code_word[i]))
+    # write the ascii in 7 bits, elias of length for Huffman code word, and huffman code word
+    # for each character
+    for i in range(len(huffman_code_word)):
+        if huffman_code_word[i] is not None:
+            current_ascii = i + 37 if i != len(character_encoding) - 1 else 36
+            output_binary_stream.write_bits(current_ascii, 7)
+            output_binary_stream.write_bits(*elias_code(huffman_code_word[i][1]))
+            output_binary_stream.write_bits(*huffman_code_word[i])
 
     # get the run length tuples for the bwt_string
     bwt_run_length_tuples = run_length_encoded_tuples(bwt_string)
 
-    # for each run length encoded tuple, get the Huffman codeword of the character being encoded and
-    # the Elias codeword of its run length and write it to file
+    # for each run length encoded tuple, write the Huffman codeword of the character being encoded and
+    # the Elias codeword of its run length
     for i in range(len(bwt_run_length_tuples)):
         current_char = bwt_run_length_tuples[i][0]
         current_index = ord(current_char) - 37 if current_char != '$' else len(character_encoding) - 1
 
-        current_huffman = "".join(character_encoding[current_index])[::-1]
-        current_elias = elias(bwt_run_length_tuples[i][1])
+        output_binary_stream.write_bits(*huffman_code_word[current_index])
+        output_binary_stream.write_bits(*elias_code(bwt_run_length_tuples[i][1]))
 
-        output_binary_stream.append(list(current_huffman))
-        output_binary_stream.append(list(current_elias))
+    return None
+
+
+def write_canonical_bwt_encoding(bwt_bytes, primary_index, output_binary_stream,
+                                 max_code_length=DEFAULT_MAX_CODE_LENGTH, entropy_coder="huffman"):
+    """
+    Description: encode the sentinel-free Burrows-Wheeler Transform of a block with canonical Huffman code words
+                 of at most max_code_length bits and append the bits to output_binary_stream, the header only has
+                 the primary index, and the 8 bits value and the elias code word of the code length of each unique
+                 byte in ascending order, with the "rans" entropy_coder the bytes of the runs are written by
+                 write_rans_symbols instead and the run lengths follow them
+    Written by: Kuah Jia Chen
+    Input: bwt_bytes is a non-empty bytes object and primary_index is an integer (both from bwt_block),
+           output_binary_stream is a BitWriter, max_code_length is a positive integer and entropy_coder is
+           "huffman" or "rans"
+    Return: None
+    Time complexity (Worst case) : O(N + K * log K), where N is the length of bwt_bytes and K is the number of
+                                   unique bytes
+    Space complexity:
+        Input: O(N), where N is the length of bwt_bytes
+        Aux: O(N), where N is the length of bwt_bytes
+    """
+    if entropy_coder == "rans":
+        return write_rans_run_length_encoding(bwt_bytes, primary_index, output_binary_stream)
+    elif entropy_coder != "huffman":
+        raise ValueError("unknown entropy coder: " + str(entropy_coder))
+
+    # count the frequency of every byte
+    frequencies = [0] * 256
+    for byte in bwt_bytes:
+        frequencies[byte] += 1
+
+    code_lengths = length_limited_code_lengths(frequencies, max_code_length)
+    code_words = canonical_code_words(code_lengths)
+
+    number_unique_byte = 0
+    for code_length in code_lengths:
+        if code_length > 0:
+            number_unique_byte += 1
+
+    # write the elias code word for the length of the block, the primary index and the number of unique bytes
+    output_binary_stream.write_bits(*elias_code(len(bwt_bytes)))
+    output_binary_stream.write_bits(*elias_code(primary_index))
+    output_binary_stream.write_bits(*elias_code(number_unique_byte))
+
+    # write the byte in 8 bits and the elias code word of the code length for each unique byte
+    for byte in range(len(code_lengths)):
+        if code_lengths[byte] > 0:
+            output_binary_stream.write_bits(byte, 8)
+            output_binary_stream.write_bits(*elias_code(code_lengths[byte]))
+
+    # for each run length encoded tuple, write the Huffman codeword of the byte being encoded and
+    # the Elias codeword of its run length
+    for byte, current_run_length in run_length_encoded_tuples(bwt_bytes):
+        output_binary_stream.write_bits(*code_words[byte])
+        output_binary_stream.write_bits(*elias_code(current_run_length))
+
+    return None
+
+
+def write_rans_run_length_encoding(bwt_bytes, primary_index, output_binary_stream):
+    """
+    Description: encode the sentinel-free Burrows-Wheeler Transform of a block as run length encoded tuples, the
+                 header has the primary index and the 8 bits value of each unique byte in ascending order, the
+                 bytes of the runs are written by write_rans_symbols and the elias code words of the run lengths
+                 follow them
+    Written by: Kuah Jia Chen
+    Input: bwt_bytes is a non-empty bytes object and primary_index is an integer (both from bwt_block) and
+           output_binary_stream is a BitWriter
+    Return: None
+    Time complexity (Worst case) : O(N), where N is the length of bwt_bytes
+    Space complexity:
+        Input: O(N), where N is the length of bwt_bytes
+        Aux: O(N), where N is the length of bwt_bytes
+    """
+    alphabet = sorted(set(bwt_bytes))
+
+    # rank[byte] is the symbol of byte for the rANS coder
+    rank = [0] * 256
+    for i in range(len(alphabet)):
+        rank[alphabet[i]] = i
+
+    tuples = run_length_encoded_tuples(bwt_bytes)
+
+    # write the elias code word for the length of the block, the primary index and the number of unique bytes
+    output_binary_stream.write_bits(*elias_code(len(bwt_bytes)))
+    output_binary_stream.write_bits(*elias_code(primary_index))
+    output_binary_stream.write_bits(*elias_code(len(alphabet)))
+
+    for byte in alphabet:
+        output_binary_stream.write_bits(byte, 8)
+
+    write_rans_symbols([rank[byte] for byte, current_run_length in tuples], len(alphabet), output_binary_stream)
+
+    for byte, current_run_length in tuples:
+        output_binary_stream.write_bits(*elias_code(current_run_length))
+
+    return None
+
+
+def write_rans_symbols(symbols, alphabet_size, output_binary_stream):
+    """
+    Description: encode the symbols with a static rANS coder and append them to output_binary_stream, the header
+                 has the number of symbols and the elias code word of (scaled frequency + 1) of every symbol, and is
+                 followed by the number of bytes of the rANS stream and the byte aligned stream itself
+    Written by: Kuah Jia Chen
+    Input: symbols is a non-empty list of integers in the range [0, alphabet_size), alphabet_size is a positive
+           integer that is at most 2^RANS_PROBABILITY_BITS and output_binary_stream is a BitWriter
+    Return: None
+    Time complexity (Worst case) : O(N + K), where N is the length of symbols and K is the alphabet_size
+    Space complexity:
+        Input: O(N), where N is the length of symbols
+        Aux: O(N + K), where N is the length of symbols and K is the alphabet_size
+    """
+    frequencies = [0] * alphabet_size
+    for symbol in symbols:
+        frequencies[symbol] += 1
+
+    scaled_frequencies = scale_frequencies(frequencies, RANS_PROBABILITY_BITS)
+
+    # cumulative[symbol] is the first slot of symbol
+    cumulative = [0] * alphabet_size
+    total = 0
+    for symbol in range(alphabet_size):
+        cumulative[symbol] = total
+        total += scaled_frequencies[symbol]
+
+    # the state goes over the symbols backwards, so that the decoder gets them forwards
+    stream = bytearray()
+    state = RANS_LOWER_BOUND
+    state_bound = (RANS_LOWER_BOUND >> RANS_PROBABILITY_BITS) << 8
+
+    for i in range(len(symbols) - 1, -1, -1):
+        frequency = scaled_frequencies[symbols[i]]
+
+        # move bytes out until encoding the symbol keeps the state below RANS_LOWER_BOUND * 256
+        state_max = state_bound * frequency
+        while state >= state_max:
+            stream.append(state & 0xFF)
+            state >>= 8
+
+        state = ((state // frequency) << RANS_PROBABILITY_BITS) + state % frequency + cumulative[symbols[i]]
+
+    # the decoder reads the final state first and the bytes in the reverse order they were moved out
+    stream += state.to_bytes(RANS_STATE_BYTES, byteorder='little')
+    stream.reverse()
+
+    output_binary_stream.write_bits(*elias_code(len(symbols)))
+    for frequency in scaled_frequencies:
+        output_binary_stream.write_bits(*elias_code(frequency + 1))
+
+    output_binary_stream.write_bits(*elias_code(len(stream)))
+    output_binary_stream.write_bytes(stream)
+
+    return None
+
+
+def scale_frequencies(frequencies, total_bits):
+    """
+    Description: scale the frequencies so that they add up to 2^total_bits, every symbol that occurs keeps a
+                 frequency of at least 1
+    Written by: Kuah Jia Chen
+    Input: frequencies is a list of non-negative integers with at least one positive value and at most
+           2^total_bits positive values, total_bits is a positive integer
+    Return: the scaled frequencies as a list of integers
+    Time complexity (Worst case) : O(K * log K), where K is the length of frequencies
+    Space complexity:
+        Input: O(K), where K is the length of frequencies
+        Aux: O(K), where K is the length of frequencies
+    """
+    total = sum(frequencies)
+    target = 1 << total_bits
+
+    scaled_frequencies = [0] * len(frequencies)
+    for symbol in range(len(frequencies)):
+        if frequencies[symbol] > 0:
+            scaled_frequencies[symbol] = max(1, frequencies[symbol] * target // total)
+
+    # the symbols are adjusted from the most frequent one, which loses the least by the change
+    by_frequency = sorted(range(len(frequencies)), key=lambda symbol: -scaled_frequencies[symbol])
+    difference = target - sum(scaled_frequencies)
+
+    if difference > 0:
+        scaled_frequencies[by_frequency[0]] += difference
+
+    i = 0
+    while difference < 0:
+        symbol = by_frequency[i % len(by_frequency)]
+        if scaled_frequencies[symbol] > 1:
+            taken = min(scaled_frequencies[symbol] - 1, -difference)
+            scaled_frequencies[symbol] -= taken
+            difference += taken
+        i += 1
+
+    return scaled_frequencies
+
+
+def move_to_front_zero_run(bwt_string, alphabet):
+    """
+    Description: apply the move-to-front transform to the bwt_string and replace every run of zeros by its length
+                 written in bijective base 2 with the RUNA (digit 1) and RUNB (digit 2) symbols, least significant
+                 digit first, a move-to-front index i > 0 becomes the symbol i + 1
+    Written by: Kuah Jia Chen
+    Input: bwt_string is a string or a bytes object and alphabet is a list of the unique characters (or bytes) of
+           bwt_string in ascending order
+    Return: a list of integer symbols in the range [0, len(alphabet)]
+    Time complexity (Worst case) : O(N * K), where N is the length of bwt_string and K is the length of alphabet
+    Space complexity:
+        Input: O(N + K), where N is the length of bwt_string and K is the length of alphabet
+        Aux: O(M + K), where M is the length of the output list and K is the length of alphabet
+    """
+    order = list(alphabet)
+    symbols = []
+    zero_run = 0
+
+    for current_char in bwt_string:
+        # the repeated characters of the bwt string are always at the front
+        if order[0] == current_char:
+            zero_run += 1
+            continue
+
+        append_zero_run(symbols, zero_run)
+        zero_run = 0
+
+        index = order.index(current_char)
+        order.pop(index)
+        order.insert(0, current_char)
+        symbols.append(index + 1)
+
+    append_zero_run(symbols, zero_run)
+
+    return symbols
+
+
+def append_zero_run(symbols, zero_run):
+    """
+    Description: append the RUNA and RUNB symbols that encode a run of zero_run zeros
+    Written by: Kuah Jia Chen
+    Input: symbols is a list of integers and zero_run is a non-negative integer
+    Return: None
+    Time complexity (Worst case) : O(log N), where N is the zero_run
+    Space complexity:
+        Input: O(1)
+        Aux: O(log N), where N is the zero_run
+    """
+    while zero_run > 0:
+        if zero_run & 1:
+            symbols.append(RUNA)
+            zero_run = (zero_run - 1) >> 1
+        else:
+            symbols.append(RUNB)
+            zero_run = (zero_run - 2) >> 1
+
+
+def write_move_to_front_bwt_encoding(bwt_string, primary_index, output_binary_stream,
+                                     max_code_length=DEFAULT_MAX_CODE_LENGTH, entropy_coder="huffman"):
+    """
+    Description: encode the sentinel-free Burrows-Wheeler Transform of a block with the move-to-front and zero run
+                 transform and canonical Huffman code words, the header has the primary index, the 8 bits value of
+                 each unique byte in ascending order and the elias code word of (code length + 1) of every symbol,
+                 with the "rans" entropy_coder the symbols are written by write_rans_symbols instead
+    Written by: Kuah Jia Chen
+    Input: bwt_string is a non-empty bytes object and primary_index is an integer (both from bwt_block),
+           output_binary_stream is a BitWriter, max_code_length is a positive integer and entropy_coder is
+           "huffman" or "rans"
+    Return: None
+    Time complexity (Worst case) : O(N * K), where N is the length of bwt_string and K is the number of unique bytes
+    Space complexity:
+        Input: O(N), where N is the length of bwt_string
+        Aux: O(N), where N is the length of bwt_string
+    """
+    if entropy_coder not in ("huffman", "rans"):
+        raise ValueError("unknown entropy coder: " + str(entropy_coder))
+
+    alphabet = sorted(set(bwt_string))
+
+    symbols = move_to_front_zero_run(bwt_string, alphabet)
+
+    if entropy_coder == "rans":
+        # write the elias code word for the length of the block, the primary index and the number of unique bytes
+        output_binary_stream.write_bits(*elias_code(len(bwt_string)))
+        output_binary_stream.write_bits(*elias_code(primary_index))
+        output_binary_stream.write_bits(*elias_code(len(alphabet)))
+
+        for byte in alphabet:
+            output_binary_stream.write_bits(byte, 8)
+
+        # RUNA, RUNB and one symbol for each move-to-front index from 1 to len(alphabet) - 1
+        write_rans_symbols(symbols, len(alphabet) + 1, output_binary_stream)
+        return None
+
+    # RUNA, RUNB and one symbol for each move-to-front index from 1 to len(alphabet) - 1
+    frequencies = [0] * (len(alphabet) + 1)
+    for symbol in symbols:
+        frequencies[symbol] += 1
+
+    code_lengths = length_limited_code_lengths(frequencies, max_code_length)
+    code_words = canonical_code_words(code_lengths)
+
+    # write the elias code word for the length of the block, the primary index and the number of unique bytes
+    output_binary_stream.write_bits(*elias_code(len(bwt_string)))
+    output_binary_stream.write_bits(*elias_code(primary_index))
+    output_binary_stream.write_bits(*elias_code(len(alphabet)))
+
+    for byte in alphabet:
+        output_binary_stream.write_bits(byte, 8)
+
+    # a symbol that does not occur has a code length of 0, so every length is shifted by one for elias
+    for code_length in code_lengths:
+        output_binary_stream.write_bits(*elias_code(code_length + 1))
+
+    for symbol in symbols:
+        output_binary_stream.write_bits(*code_words[symbol])
+
+    return None
+
+
+def encode_block(block, max_code_length=DEFAULT_MAX_CODE_LENGTH, move_to_front=False, fm_index=False,
+                 fm_sample_rate=DEFAULT_FM_SAMPLE_RATE, entropy_coder="huffman", dedup=False):
+    """
+    Description: encode one block of bytes on its own and return the frame flags and the encoded bytes, with
+                 fm_index the encoded bytes start with the 4 bytes length of an FM-index section and the section,
+                 with dedup the long repeats of the block are replaced by back-references before the bwt and the
+                 encoded bytes start with the 4 bytes length of the dedup section and the section
+    Written by: Kuah Jia Chen
+    Input: block is a non-empty bytes object, max_code_length is the longest canonical code word in bits,
+           move_to_front is a boolean that selects the move-to-front and zero run stage, fm_index is a boolean
+           that adds the FM-index section, fm_sample_rate is a positive integer, entropy_coder is "huffman" for
+           canonical Huffman code words or "rans" for the rANS coder and dedup is a boolean that adds the long
+           match dedup pre-pass, it cannot be used with fm_index
+    Return: the flags of the frame as an integer and the encoded block as bytes
+    Time complexity (Worst case) : O(N * K), where N is the length of block and K is the number of unique bytes
+    Space complexity:
+        Input: O(N), where N is the length of block
+        Aux: O(N), where N is the length of block
+    """
+    buffer = io.BytesIO()
+    flags = FLAG_RANS if entropy_coder == "rans" else FLAG_CANONICAL_HUFFMAN
+
+    if dedup:
+        # the FM-index would only see the bytes that are left, so it could not find the repeats
+        if fm_index:
+            raise ValueError("the dedup pre-pass cannot be combined with the FM-index")
+
+        literals, matches = long_match_dedup(block)
+
+        if matches:
+            section = dedup_section(matches)
+            buffer.write(len(section).to_bytes(FRAME_LENGTH_BYTES, byteorder='big'))
+            buffer.write(section)
+            flags |= FLAG_DEDUP
+            block = literals
+
+    suffix_array = sais_suffix_array(list(block), 256)
+    bwt_bytes, primary_index = bwt_from_suffix_array(block, suffix_array)
+
+    if fm_index:
+        section = fm_index_section(bwt_bytes, suffix_array, fm_sample_rate)
+        buffer.write(len(section).to_bytes(FRAME_LENGTH_BYTES, byteorder='big'))
+        buffer.write(section)
+        flags |= FLAG_FM_INDEX
+
+    # the suffix array is not needed any more
+    del suffix_array
+
+    output_binary_stream = BitWriter(buffer)
+
+    if move_to_front:
+        write_move_to_front_bwt_encoding(bwt_bytes, primary_index, output_binary_stream, max_code_length,
+                                         entropy_coder)
+        flags |= FLAG_MOVE_TO_FRONT
+    else:
+        write_canonical_bwt_encoding(bwt_bytes, primary_index, output_binary_stream, max_code_length,
+                                     entropy_coder)
 
-    # write the last byte to file
     output_binary_stream.pack_to_file_last_byte()
-    # close the file
-    output_binary_stream.close()
+
+    return flags, buffer.getvalue()
+
+
+def long_match_dedup(block, window=DEDUP_WINDOW, min_match=DEDUP_MIN_MATCH):
+    """
+    Description: find the long repeats of the block with a rolling hash, the hash of every window bytes at a
+                 multiple of window is kept, so any repeat of at least 2 * window - 1 bytes is found, the repeat is
+                 then extended forwards and backwards and replaced by a back-reference if it has at least min_match
+                 bytes, a back-reference may overlap the bytes it copies
+    Written by: Kuah Jia Chen
+    Input: block is a bytes object, window and min_match are positive integers with window <= min_match
+    Return: the bytes that are not replaced as a bytes object, and a list of (position, source, length) tuples in
+            the order of position, where block[position:position + length] is a copy of
+            block[source:source + length] and source < position
+    Time complexity (Worst case) : O(N + M * W), where N is the length of block, M is the number of hash matches
+                                   and W is the window
+    Space complexity:
+        Input: O(N), where N is the length of block
+        Aux: O(N / W + N), where N is the length of block and W is the window
+    """
+    n = len(block)
+    literals = bytearray()
+    matches = []
+    anchors = {}
+
+    # the factor that takes the oldest byte out of the rolling hash
+    oldest_factor = pow(DEDUP_HASH_BASE, window - 1, DEDUP_HASH_MASK + 1)
+
+    literal_start = 0
+    i = 0
+    hash_value = None
+
+    while i + window <= n:
+        if hash_value is None:
+            hash_value = 0
+            for byte in block[i:i + window]:
+                hash_value = (hash_value * DEDUP_HASH_BASE + byte) & DEDUP_HASH_MASK
+
+        source = anchors.get(hash_value)
+
+        if source is not None and block[source:source + window] == block[i:i + window]:
+            # extend the repeat forwards a window at a time and then a byte at a time
+            length = window
+            while i + length + window <= n and \
+                    block[source + length:source + length + window] == block[i + length:i + length + window]:
+                length += window
+            while i + length < n and block[source + length] == block[i + length]:
+                length += 1
+
+            # extend the repeat backwards over the bytes that are not replaced yet
+            back = 0
+            while back < source and i - back > literal_start and block[source - back - 1] == block[i - back - 1]:
+                back += 1
+
+            if length + back >= min_match:
+                literals += block[literal_start:i - back]
+                matches.append((i - back, source - back, length + back))
+                i += length
+                literal_start = i
+                hash_value = None
+                continue
+
+        if i % window == 0:
+            anchors[hash_value] = i
+
+        # roll the hash one byte forwards
+        if i + window < n:
+            hash_value = ((hash_value - block[i] * oldest_factor) * DEDUP_HASH_BASE + block[i + window]) \
+                & DEDUP_HASH_MASK
+        i += 1
+
+    literals += block[literal_start:]
+
+    return bytes(literals), matches
+
+
+def dedup_section(matches):
+    """
+    Description: build the dedup section of a block, which has the elias code words of (number of back-references
+                 + 1) followed by (number of literal bytes before it + 1), the distance to its source and the length
+                 of each back-reference
+    Written by: Kuah Jia Chen
+    Input: matches is a list of (position, source, length) tuples in the order of position
+    Return: the dedup section as bytes
+    Time complexity (Worst case) : O(M), where M is the length of matches
+    Space complexity:
+        Input: O(M), where M is the length of matches
+        Aux: O(M), where M is the length of matches
+    """
+    buffer = io.BytesIO()
+    output_binary_stream = BitWriter(buffer)
+    output_binary_stream.write_bits(*elias_code(len(matches) + 1))
+
+    previous_end = 0
+    for position, source, length in matches:
+        output_binary_stream.write_bits(*elias_code(position - previous_end + 1))
+        output_binary_stream.write_bits(*elias_code(position - source))
+        output_binary_stream.write_bits(*elias_code(length))
+        previous_end = position + length
+
+    output_binary_stream.pack_to_file_last_byte()
+
+    return buffer.getvalue()
+
+
+def fm_index_section(bwt_bytes, suffix_array, sample_rate=DEFAULT_FM_SAMPLE_RATE):
+    """
+    Description: build the FM-index section of a block, which has the sample_rate as a 4 bytes big endian integer
+                 and the rows of the text positions 0, sample_rate, 2 * sample_rate, ... in that order, every row
+                 is packed in the number of bits of the length of the block, the occurrence counts are not stored
+                 since the decoder can count them in the bwt
+    Written by: Kuah Jia Chen
+    Input: bwt_bytes is the sentinel-free bwt of a block, suffix_array is the suffix array of the block (without the
+           sentinel) and sample_rate is a positive integer
+    Return: the FM-index section as bytes
+    Time complexity (Worst case) : O(N), where N is the length of bwt_bytes
+    Space complexity:
+        Input: O(N), where N is the length of bwt_bytes
+        Aux: O(N / S), where N is the length of bwt_bytes and S is the sample_rate
+    """
+    n = len(bwt_bytes)
+
+    # row 0 is the sentinel suffix, which is never sampled, and row i + 1 is suffix_array[i]
+    rows = [0] * (-(-n // sample_rate))
+    for i in range(len(suffix_array)):
+        if suffix_array[i] % sample_rate == 0:
+            rows[suffix_array[i] // sample_rate] = i + 1
+
+    buffer = io.BytesIO()
+    buffer.write(sample_rate.to_bytes(4, byteorder='big'))
+
+    output_binary_stream = BitWriter(buffer)
+    row_bits = n.bit_length()
+    for row in rows:
+        output_binary_stream.write_bits(row, row_bits)
+    output_binary_stream.pack_to_file_last_byte()
+
+    return buffer.getvalue()
+
+
+def frame_block(payload, flags=0):
+    """
+    Description: wrap an encoded block into a self-delimiting frame, which is the 4 bytes length of the payload,
+                 1 byte of flags and the payload itself
+    Written by: Kuah Jia Chen
+    Input: payload is a bytes object and flags is an integer
+    Return: the frame as bytes
+    Time complexity (Worst case) : O(N), where N is the length of payload
+    Space complexity:
+        Input: O(N), where N is the length of payload
+        Aux: O(N), where N is the length of payload
+    """
+    return len(payload).to_bytes(FRAME_LENGTH_BYTES, byteorder='big') + flags.to_bytes(1, byteorder='big') + payload
+
+
+def iter_blocks(input_file, block_size):
+    """
+    Description: read the input_file in blocks of block_size bytes, so that only one block is in memory at a time
+    Written by: Kuah Jia Chen
+    Input: input_file is an opened binary file object and block_size is a positive integer
+    Return: a generator that yields each block as a bytes object
+    Time complexity (Worst case) : O(N), where N is the size of input_file
+    Space complexity:
+        Input: O(1)
+        Aux: O(B), where B is the block_size
+    """
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+
+    block = input_file.read(block_size)
+    while block:
+        yield block
+        block = input_file.read(block_size)
+
+
+def encode_blocks_in_order(blocks, workers=1, block_options=None):
+    """
+    Description: encode the blocks with encode_block, using a pool of worker processes when workers is more than
+                 one, the encoded blocks are always yielded in the original order and at most 2 * workers blocks
+                 are in flight at a time
+    Written by: Kuah Jia Chen
+    Input: blocks is an iterable of bytes objects, workers is a positive integer or None for all cores and
+           block_options is a dictionary of keyword arguments for encode_block
+    Return: a generator that yields the length of each block, its frame flags and its encoded bytes
+    Time complexity (Worst case) : O(N * log B / W), where N is the total length of blocks, B is the length of the
+                                   largest block and W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(W * B), where W is the number of workers and B is the length of the largest block
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if block_options is None:
+        block_options = {}
+
+    if workers <= 1:
+        for block in blocks:
+            flags, payload = encode_block(block, **block_options)
+            yield len(block), flags, payload
+        return
+
+    pending = collections.deque()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        for block in blocks:
+            pending.append((len(block), executor.submit(encode_block, block, **block_options)))
+
+            # wait for the oldest block so that the input is not read faster than it is encoded
+            if len(pending) >= 2 * workers:
+                block_length, future = pending.popleft()
+                yield (block_length,) + future.result()
+
+        while pending:
+            block_length, future = pending.popleft()
+            yield (block_length,) + future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def write_block_index(output_file, block_index, base_offset=0):
+    """
+    Description: write the end of frames marker, the block index and the footer, the index has the byte offset of
+                 each frame and the original length of its block, and the footer has the byte offset of the index
+    Written by: Kuah Jia Chen
+    Input: output_file is an opened binary file object positioned after the last frame, block_index is a list of
+           (frame offset, block length) tuples and base_offset is the offset in the container of the start of
+           output_file, which is not 0 when the end of a container is built in another file
+    Return: None
+    Time complexity (Worst case) : O(K), where K is the number of blocks
+    Space complexity:
+        Input: O(K), where K is the number of blocks
+        Aux: O(1)
+    """
+    # an empty frame marks the end of the frames
+    output_file.write(frame_block(b""))
+
+    index_offset = base_offset + output_file.tell()
+    for frame_offset, block_length in block_index:
+        output_file.write(frame_offset.to_bytes(INDEX_FIELD_BYTES, byteorder='big'))
+        output_file.write(block_length.to_bytes(INDEX_FIELD_BYTES, byteorder='big'))
+
+    output_file.write(index_offset.to_bytes(INDEX_FIELD_BYTES, byteorder='big'))
+    output_file.write(FOOTER_MAGIC)
+
+
+def q2_block_encoder(input_file_name, file_name, block_size=DEFAULT_BLOCK_SIZE, workers=1,
+                     max_code_length=DEFAULT_MAX_CODE_LENGTH, move_to_front=False, fm_index=False,
+                     fm_sample_rate=DEFAULT_FM_SAMPLE_RATE, entropy_coder="huffman", dedup=False):
+    """
+    Description: encode the bytes of input_file_name block by block and write the frames into a container,
+                 the peak memory is bounded by block_size rather than the size of the input file, the blocks are
+                 encoded by workers processes and the output does not depend on the number of workers, any byte
+                 value can be encoded
+    Written by: Kuah Jia Chen
+    Input: input_file_name is a string or an opened binary file object, file_name is a string, block_size is a
+           positive integer, workers is a positive integer or None for all cores, max_code_length is the longest
+           canonical code word in bits, move_to_front is a boolean that selects the move-to-front and zero run
+           stage, fm_index is a boolean that stores an FM-index section in every frame, fm_sample_rate is the
+           suffix array sample rate,
+           entropy_coder is "huffman" or "rans" and dedup is a boolean that replaces the long repeats inside each
+           block by back-references before the bwt
+    Return: None
+    Time complexity (Worst case) : O(N * log B / W), where N is the size of the input file, B is the block_size and
+                                   W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(W * B), where W is the number of workers and B is the block_size
+    """
+    input_file = open(input_file_name, "rb") if isinstance(input_file_name, str) else input_file_name
+    output_file = open(file_name, "wb")
+
+    output_file.write(CONTAINER_MAGIC)
+    output_file.write(CONTAINER_VERSION.to_bytes(1, byteorder='big'))
+
+    block_options = {"max_code_length": max_code_length, "move_to_front": move_to_front, "fm_index": fm_index,
+                     "fm_sample_rate": fm_sample_rate, "entropy_coder": entropy_coder, "dedup": dedup}
+
+    block_index = []
+    for block_length, flags, payload in encode_blocks_in_order(iter_blocks(input_file, block_size), workers,
+                                                               block_options):
+        block_index.append((output_file.tell(), block_length))
+        output_file.write(frame_block(payload, flags))
+
+    write_block_index(output_file, block_index)
+
+    output_file.close()
+    if input_file is not input_file_name:
+        input_file.close()
+
+    return None
+
+
+def read_block_index(file):
+    """
+    Description: read the block index and the position of the end of frames marker of a block container
+    Written by: Kuah Jia Chen
+    Input: file is an opened binary file object
+    Return: a list of (frame offset, block length) tuples, one for each block in order, and the byte offset of the
+            end of frames marker
+    Time complexity (Worst case) : O(K), where K is the number of blocks
+    Space complexity:
+        Input: O(1)
+        Aux: O(K), where K is the number of blocks
+    """
+    footer_size = INDEX_FIELD_BYTES + len(FOOTER_MAGIC)
+    file.seek(0)
+    header = file.read(len(CONTAINER_MAGIC) + 1)
+
+    if header[:len(CONTAINER_MAGIC)] != CONTAINER_MAGIC:
+        raise ValueError("not a block container")
+
+    if header[len(CONTAINER_MAGIC)] != CONTAINER_VERSION:
+        raise ValueError("unsupported container version: " + str(header[len(CONTAINER_MAGIC)]))
+
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+
+    if file_size < len(CONTAINER_MAGIC) + 1 + FRAME_LENGTH_BYTES + 1 + footer_size:
+        raise ValueError("truncated block container")
+
+    file.seek(file_size - footer_size)
+    footer = file.read(footer_size)
+
+    if footer[INDEX_FIELD_BYTES:] != FOOTER_MAGIC:
+        raise ValueError("missing block index footer")
+
+    index_offset = int.from_bytes(footer[:INDEX_FIELD_BYTES], byteorder='big')
+    file.seek(index_offset)
+    index_bytes = file.read(file_size - footer_size - index_offset)
+
+    block_index = []
+    for i in range(0, len(index_bytes), 2 * INDEX_FIELD_BYTES):
+        frame_offset = int.from_bytes(index_bytes[i:i + INDEX_FIELD_BYTES], byteorder='big')
+        block_length = int.from_bytes(index_bytes[i + INDEX_FIELD_BYTES:i + 2 * INDEX_FIELD_BYTES], byteorder='big')
+        block_index.append((frame_offset, block_length))
+
+    # the end of frames marker is the empty frame right before the index
+    return block_index, index_offset - FRAME_LENGTH_BYTES - 1
+
+
+def q2_block_append(input_file_name, file_name, block_size=DEFAULT_BLOCK_SIZE, workers=1,
+                    max_code_length=DEFAULT_MAX_CODE_LENGTH, move_to_front=False, fm_index=False,
+                    fm_sample_rate=DEFAULT_FM_SAMPLE_RATE, entropy_coder="huffman", dedup=False):
+    """
+    Description: encode the bytes of input_file_name into new blocks at the end of the block container file_name,
+                 the existing frames are kept as they are, and only the end of frames marker, the block index and
+                 the footer are written again, the container is created if it does not exist, the last block of
+                 the container is not filled up, so appending often makes many small blocks, the new frames, the
+                 end of frames marker, the index and the footer are built in a temporary file first and copied to
+                 the container in one step, and the old end of the container is written back if that copy fails,
+                 so an error leaves the container as it was
+    Written by: Kuah Jia Chen
+    Input: input_file_name is a string, file_name is a string and the other options are the same as
+           q2_block_encoder, they only apply to the new blocks
+    Return: None
+    Time complexity (Worst case) : O(K + N * log B / W), where K is the number of blocks in the container, N is the
+                                   size of the input file, B is the block_size and W is the number of workers
+    Space complexity:
+        Input: O(1)
+        Aux: O(K + W * B), where K is the number of blocks in the container, W is the number of workers and B is
+             the block_size
+    """
+    if not os.path.exists(file_name):
+        return q2_block_encoder(input_file_name, file_name, block_size, workers, max_code_length, move_to_front,
+                                fm_index, fm_sample_rate, entropy_coder, dedup)
+
+    # check the options before the container is opened, encode_block would only raise while encoding
+    if dedup and fm_index:
+        raise ValueError("the dedup pre-pass cannot be combined with the FM-index")
+
+    block_options = {"max_code_length": max_code_length, "move_to_front": move_to_front, "fm_index": fm_index,
+                     "fm_sample_rate": fm_sample_rate, "entropy_coder": entropy_coder, "dedup": dedup}
+
+    input_file = open(input_file_name, "rb")
+    output_file = open(file_name, "r+b")
+    new_tail = tempfile.TemporaryFile()
+
+    try:
+        block_index, end_of_frames = read_block_index(output_file)
+
+        # the new frames will replace the end of frames marker and the old index
+        for block_length, flags, payload in encode_blocks_in_order(iter_blocks(input_file, block_size), workers,
+                                                                   block_options):
+            block_index.append((end_of_frames + new_tail.tell(), block_length))
+            new_tail.write(frame_block(payload, flags))
+        write_block_index(new_tail, block_index, end_of_frames)
+
+        # the old end of frames marker, index and footer only take O(K) bytes
+        output_file.seek(end_of_frames)
+        old_tail = output_file.read()
+
+        new_tail.seek(0)
+        output_file.seek(end_of_frames)
+        try:
+            shutil.copyfileobj(new_tail, output_file)
+            output_file.truncate()
+            output_file.flush()
+        except BaseException:
+            # write the old end of the container back, the frames before end_of_frames were never changed
+            output_file.seek(end_of_frames)
+            output_file.write(old_tail)
+            output_file.truncate()
+            output_file.flush()
+            raise
+    finally:
+        new_tail.close()
+        output_file.close()
+        input_file.close()
 
     return None
 
@@ -238,19 +1154,243 @@ def naive_suffix_array(input_string):
     return suffix_array
 
 
-def bwt(text):
+def sais_suffix_array(int_array, alphabet_size):
+    """
+    Description: use the SA-IS (induced sorting) algorithm to generate the suffix array of int_array, a shorter
+                 suffix is placed before a longer suffix that it is a prefix of (the same order as sorted() uses
+                 for strings)
+    Written by: Kuah Jia Chen
+    Input: int_array is a list of integers in the range [0, alphabet_size) and alphabet_size is an integer
+    Return: the suffix array of the int_array
+    Time complexity (Worst case) : O(N + K), where N is the length of int_array and K is the alphabet_size
+    Space complexity:
+        Input: O(N), where N is the length of int_array
+        Aux: O(N + K), where N is the length of int_array and K is the alphabet_size
+    """
+    # shift every symbol up by one and append a virtual sentinel 0 that is smaller than every symbol
+    text = [symbol + 1 for symbol in int_array]
+    text.append(0)
+
+    suffix_array = induced_sort_suffix_array(text, alphabet_size + 1)
+
+    # the first entry is always the virtual sentinel
+    return suffix_array[1:]
+
+
+def induced_sort_suffix_array(text, alphabet_size):
+    """
+    Description: compute the suffix array of text with SA-IS, text must end with a unique smallest symbol 0
+    Written by: Kuah Jia Chen
+    Input: text is a list of integers in the range [0, alphabet_size) and alphabet_size is an integer
+    Return: the suffix array of the text
+    Time complexity (Worst case) : O(N + K), where N is the length of text and K is the alphabet_size
+    Space complexity:
+        Input: O(N), where N is the length of text
+        Aux: O(N + K), where N is the length of text and K is the alphabet_size
+    """
+    n = len(text)
+
+    if n == 1:
+        return [0]
+
+    # classify every suffix as S-type (True) or L-type (False)
+    is_s_type = [False] * n
+    is_s_type[n - 1] = True
+    for i in range(n - 2, -1, -1):
+        if text[i] < text[i + 1] or (text[i] == text[i + 1] and is_s_type[i + 1]):
+            is_s_type[i] = True
+
+    # count the size of the bucket of each symbol
+    bucket_sizes = [0] * alphabet_size
+    for symbol in text:
+        bucket_sizes[symbol] += 1
+
+    # get the left-most-S (LMS) positions in text order
+    lms_positions = []
+    for i in range(1, n):
+        if is_s_type[i] and not is_s_type[i - 1]:
+            lms_positions.append(i)
+
+    # first pass, sort the LMS substrings
+    suffix_array = induce_from_lms(text, is_s_type, bucket_sizes, lms_positions)
+
+    # name the LMS substrings in their sorted order, equal LMS substrings share the same name
+    names = [-1] * n
+    current_name = 0
+    previous_position = None
+    for position in suffix_array:
+        if position > 0 and is_s_type[position] and not is_s_type[position - 1]:
+            if previous_position is not None and \
+                    not lms_substring_equal(text, is_s_type, previous_position, position):
+                current_name += 1
+            names[position] = current_name
+            previous_position = position
+
+    reduced_text = []
+    for position in lms_positions:
+        reduced_text.append(names[position])
+
+    # recurse only when some LMS substrings share the same name
+    if current_name + 1 < len(reduced_text):
+        reduced_suffix_array = induced_sort_suffix_array(reduced_text, current_name + 1)
+    else:
+        reduced_suffix_array = [0] * len(reduced_text)
+        for i in range(len(reduced_text)):
+            reduced_suffix_array[reduced_text[i]] = i
+
+    sorted_lms_positions = []
+    for i in reduced_suffix_array:
+        sorted_lms_positions.append(lms_positions[i])
+
+    # second pass, induce the order of every suffix from the sorted LMS suffixes
+    return induce_from_lms(text, is_s_type, bucket_sizes, sorted_lms_positions)
+
+
+def induce_from_lms(text, is_s_type, bucket_sizes, lms_positions):
+    """
+    Description: place the LMS positions at the end of their buckets and induce the order of the L-type suffixes
+                 and then the S-type suffixes
+    Written by: Kuah Jia Chen
+    Input: text is a list of integers, is_s_type is a list of booleans, bucket_sizes is a list of integers and
+           lms_positions is a list of integers
+    Return: the induced suffix array
+    Time complexity (Worst case) : O(N + K), where N is the length of text and K is the length of bucket_sizes
+    Space complexity:
+        Input: O(N + K), where N is the length of text and K is the length of bucket_sizes
+        Aux: O(N + K), where N is the length of text and K is the length of bucket_sizes
+    """
+    n = len(text)
+    suffix_array = [-1] * n
+
+    # place the LMS positions at the tail of their buckets, the last one is placed first
+    bucket_tails = get_bucket_boundaries(bucket_sizes, False)
+    for i in range(len(lms_positions) - 1, -1, -1):
+        position = lms_positions[i]
+        bucket_tails[text[position]] -= 1
+        suffix_array[bucket_tails[text[position]]] = position
+
+    # induce the L-type suffixes from left to right
+    bucket_heads = get_bucket_boundaries(bucket_sizes, True)
+    for i in range(n):
+        position = suffix_array[i] - 1
+        if position >= 0 and not is_s_type[position]:
+            suffix_array[bucket_heads[text[position]]] = position
+            bucket_heads[text[position]] += 1
+
+    # induce the S-type suffixes from right to left
+    bucket_tails = get_bucket_boundaries(bucket_sizes, False)
+    for i in range(n - 1, -1, -1):
+        position = suffix_array[i] - 1
+        if position >= 0 and is_s_type[position]:
+            bucket_tails[text[position]] -= 1
+            suffix_array[bucket_tails[text[position]]] = position
+
+    return suffix_array
+
+
+def get_bucket_boundaries(bucket_sizes, is_head):
+    """
+    Description: get the start index (if is_head is true) or the exclusive end index of each bucket
+    Written by: Kuah Jia Chen
+    Input: bucket_sizes is a list of integers and is_head is a boolean
+    Return: a list that contains the boundary of each bucket
+    Time complexity (Worst case) : O(K), where K is the length of bucket_sizes
+    Space complexity:
+        Input: O(K), where K is the length of bucket_sizes
+        Aux: O(K), where K is the length of bucket_sizes
+    """
+    boundaries = [0] * len(bucket_sizes)
+    total = 0
+
+    for i in range(len(bucket_sizes)):
+        total += bucket_sizes[i]
+        boundaries[i] = total - bucket_sizes[i] if is_head else total
+
+    return boundaries
+
+
+def lms_substring_equal(text, is_s_type, first_position, second_position):
+    """
+    Description: check whether the LMS substrings starting at first_position and second_position are equal
+    Written by: Kuah Jia Chen
+    Input: text is a list of integers, is_s_type is a list of booleans, first_position and second_position
+           are integers
+    Return: True if both LMS substrings are equal, otherwise False
+    Time complexity (Worst case) : O(L), where L is the length of the shorter LMS substring
+    Space complexity:
+        Input: O(N), where N is the length of text
+        Aux: O(1)
+    """
+    n = len(text)
+
+    # the LMS substring of the sentinel is unique
+    if first_position == n - 1 or second_position == n - 1:
+        return False
+
+    offset = 0
+    while True:
+        first_index = first_position + offset
+        second_index = second_position + offset
+
+        first_is_lms = first_index > 0 and is_s_type[first_index] and not is_s_type[first_index - 1]
+        second_is_lms = second_index > 0 and is_s_type[second_index] and not is_s_type[second_index - 1]
+
+        # both LMS substrings end at the same time
+        if offset > 0 and first_is_lms and second_is_lms:
+            return True
+
+        if first_is_lms != second_is_lms or text[first_index] != text[second_index] or \
+                is_s_type[first_index] != is_s_type[second_index]:
+            return False
+
+        offset += 1
+
+
+def suffix_array_for_string(input_string, suffix_sorter="sa_is"):
+    """
+    Description: generate the suffix array of the input_string with the chosen suffix_sorter, "sa_is" maps the
+                 characters to their ranks in the alphabet and uses SA-IS while "naive" sorts every suffix
+                 as a string and is kept as a reference for cross-checking
+    Written by: Kuah Jia Chen
+    Input: input_string is a string and suffix_sorter is either "sa_is" or "naive"
+    Return: the suffix array of the input_string
+    Time complexity (Worst case) : O(N + K * log K) for "sa_is" and O(N^2 * log N) for "naive", where N is the
+                                   length of input_string and K is the number of unique characters
+    Space complexity:
+        Input: O(N), where N is the length of input_string
+        Aux: O(N) for "sa_is" and O(N^2) for "naive", where N is the length of input_string
+    """
+    if suffix_sorter == "naive":
+        return naive_suffix_array(input_string)
+
+    if suffix_sorter != "sa_is":
+        raise ValueError("unknown suffix sorter: " + str(suffix_sorter))
+
+    # map each character to its rank so that the buckets stay as small as the alphabet
+    alphabet = sorted(set(input_string))
+    rank = {}
+    for i in range(len(alphabet)):
+        rank[alphabet[i]] = i
+
+    int_array = [rank[char] for char in input_string]
+
+    return sais_suffix_array(int_array, len(alphabet))
+
+
+def bwt(text, suffix_sorter="sa_is"):
     """
     Description: generate the bwt string for the text
     Written by: Kuah Jia Chen
-    Input: text is a string
+    Input: text is a string and suffix_sorter is either "sa_is" (default) or "naive" (reference mode)
     Return: the bwt string for the text
-    Time complexity (Worst case) : O(N^2 * log N), where N is the length of bwt_string
+    Time complexity (Worst case) : O(N + K * log K) with "sa_is" and O(N^2 * log N) with "naive", where N is the
+                                   length of bwt_string and K is the number of unique characters
     Space complexity:
         Input: O(N), where N is the length of bwt_string
-        Aux: O(N^2), where N is the length of bwt_string
+        Aux: O(N) with "sa_is" and O(N^2) with "naive", where N is the length of bwt_string
     """
     text = text + "$"
-    suffix_array = naive_suffix_array(text)
+    suffix_array = suffix_array_for_string(text, suffix_sorter)
     n = len(text)
     ans = []
 
@@ -261,6 +1401,55 @@ def bwt(text):
     return "".join(ans)
 
 
+def bwt_block(block, suffix_sorter="sa_is"):
+    """
+    Description: generate the sentinel-free bwt of a block of bytes, the suffixes are sorted as if a sentinel that
+                 is smaller than every byte was appended, the sentinel is then left out of the bwt and the row where
+                 it would be is returned as the primary index
+    Written by: Kuah Jia Chen
+    Input: block is a non-empty bytes object and suffix_sorter is either "sa_is" (default) or "naive" (reference mode)
+    Return: the bwt as a bytes object of the same length as block, and the primary index, which is at least 1
+    Time complexity (Worst case) : O(N) with "sa_is" and O(N^2 * log N) with "naive", where N is the length of block
+    Space complexity:
+        Input: O(N), where N is the length of block
+        Aux: O(N) with "sa_is" and O(N^2) with "naive", where N is the length of block
+    """
+    if suffix_sorter == "naive":
+        suffix_array = naive_suffix_array(block)
+    elif suffix_sorter == "sa_is":
+        suffix_array = sais_suffix_array(list(block), 256)
+    else:
+        raise ValueError("unknown suffix sorter: " + str(suffix_sorter))
+
+    return bwt_from_suffix_array(block, suffix_array)
+
+
+def bwt_from_suffix_array(block, suffix_array):
+    """
+    Description: generate the sentinel-free bwt of a block of bytes from its suffix array
+    Written by: Kuah Jia Chen
+    Input: block is a non-empty bytes object and suffix_array is its suffix array (without the sentinel)
+    Return: the bwt as a bytes object of the same length as block, and the primary index, which is at least 1
+    Time complexity (Worst case) : O(N), where N is the length of block
+    Space complexity:
+        Input: O(N), where N is the length of block
+        Aux: O(N), where N is the length of block
+    """
+    # the row of the sentinel suffix comes first and is preceded by the last byte
+    ans = bytearray()
+    ans.append(block[-1])
+    primary_index = None
+
+    for i in range(len(suffix_array)):
+        if suffix_array[i] == 0:
+            # the whole block is preceded by the sentinel, which is left out
+            primary_index = i + 1
+        else:
+            ans.append(block[suffix_array[i] - 1])
+
+    return bytes(ans), primary_index
+
+
 def huffman_encoder(input_string, frequency_table, unique_characters):
     """
     Description: compute the Huffman codeword for each unique characters
@@ -369,6 +1558,159 @@ def huffman_encoder(input_string, frequency_table, unique_characters):
     return character_encoding
 
 
+def huffman_code_lengths(frequencies):
+    """
+    Description: compute the Huffman code length of every symbol from an integer frequency array, the heap only
+                 holds node ids so no code words are built while merging
+    Written by: Kuah Jia Chen
+    Input: frequencies is a list of non-negative integers indexed by symbol
+    Return: a list with the code length of each symbol, 0 for a symbol that does not occur
+    Time complexity (Worst case) : O(K + S * log S), where K is the length of frequencies and S is the number of
+                                   symbols that occur
+    Space complexity:
+        Input: O(K), where K is the length of frequencies
+        Aux: O(K + S), where K is the length of frequencies and S is the number of symbols that occur
+    """
+    code_lengths = [0] * len(frequencies)
+
+    # the heap elements are [frequency, node id], the leaves use their symbol as the node id
+    min_heap = []
+    for symbol in range(len(frequencies)):
+        if frequencies[symbol] > 0:
+            min_heap.append([frequencies[symbol], symbol])
+
+    # a single symbol still needs a one bit code word
+    if len(min_heap) == 1:
+        code_lengths[min_heap[0][1]] = 1
+        return code_lengths
+
+    heapq.heapify(min_heap)
+
+    # parent[node id] is the node id of its parent, the internal nodes are numbered after the symbols
+    parent = [None] * (len(frequencies) + len(min_heap))
+    next_node = len(frequencies)
+
+    while len(min_heap) >= 2:
+        first_elem = heapq.heappop(min_heap)
+        second_elem = heapq.heappop(min_heap)
+
+        parent[first_elem[1]] = next_node
+        parent[second_elem[1]] = next_node
+        heapq.heappush(min_heap, [first_elem[0] + second_elem[0], next_node])
+        next_node += 1
+
+    # the nodes are created after their children, so the depths can be found from the root downwards
+    depth = [0] * next_node
+    for node in range(next_node - 2, -1, -1):
+        if parent[node] is not None:
+            depth[node] = depth[parent[node]] + 1
+
+    for symbol in range(len(frequencies)):
+        if frequencies[symbol] > 0:
+            code_lengths[symbol] = depth[symbol]
+
+    return code_lengths
+
+
+def length_limited_code_lengths(frequencies, max_code_length=DEFAULT_MAX_CODE_LENGTH):
+    """
+    Description: compute Huffman code lengths that are at most max_code_length bits, the optimal code lengths are
+                 used when they already fit, otherwise the number of code words of each length is rebalanced
+                 (moving the longest code words up while keeping the Kraft sum at 1) and the shorter lengths are
+                 given to the more frequent symbols
+    Written by: Kuah Jia Chen
+    Input: frequencies is a list of non-negative integers indexed by symbol and max_code_length is a positive
+           integer
+    Return: a list with the code length of each symbol, 0 for a symbol that does not occur
+    Time complexity (Worst case) : O(K + S * log S + L^2), where K is the length of frequencies, S is the number of
+                                   symbols that occur and L is the longest optimal code length
+    Space complexity:
+        Input: O(K), where K is the length of frequencies
+        Aux: O(K + S + L), where K is the length of frequencies, S is the number of symbols that occur and L is the
+             longest optimal code length
+    """
+    code_lengths = huffman_code_lengths(frequencies)
+    longest = max(code_lengths) if code_lengths else 0
+
+    if longest <= max_code_length:
+        return code_lengths
+
+    symbols = []
+    for symbol in range(len(frequencies)):
+        if frequencies[symbol] > 0:
+            symbols.append(symbol)
+
+    if len(symbols) > (1 << max_code_length):
+        raise ValueError("too many symbols for code words of at most " + str(max_code_length) + " bits")
+
+    # count the number of code words of each length
+    length_count = [0] * (longest + 1)
+    for symbol in symbols:
+        length_count[code_lengths[symbol]] += 1
+
+    # every pair of code words that is too long is replaced by one code word a bit shorter, and a shorter code
+    # word is split to keep the Kraft sum at 1
+    for code_length in range(longest, max_code_length, -1):
+        while length_count[code_length] > 0:
+            shorter = code_length - 2
+            while length_count[shorter] == 0:
+                shorter -= 1
+
+            length_count[code_length] -= 2
+            length_count[code_length - 1] += 1
+            length_count[shorter + 1] += 2
+            length_count[shorter] -= 1
+
+    # give the shortest code lengths to the most frequent symbols
+    symbols.sort(key=lambda current_symbol: (-frequencies[current_symbol], current_symbol))
+
+    code_lengths = [0] * len(frequencies)
+    position = 0
+    for code_length in range(1, max_code_length + 1):
+        for _ in range(length_count[code_length]):
+            code_lengths[symbols[position]] = code_length
+            position += 1
+
+    return code_lengths
+
+
+def canonical_code_words(code_lengths):
+    """
+    Description: assign the canonical Huffman code words, the code words are consecutive integers in the order of
+                 (code length, symbol), so they can be rebuilt from the code lengths alone
+    Written by: Kuah Jia Chen
+    Input: code_lengths is a list of non-negative integers indexed by symbol, 0 for a symbol that does not occur
+    Return: a list with the (value, number of bits) code word of each symbol, None for a symbol that does not occur
+    Time complexity (Worst case) : O(K + L), where K is the length of code_lengths and L is the longest code length
+    Space complexity:
+        Input: O(K), where K is the length of code_lengths
+        Aux: O(K + L), where K is the length of code_lengths and L is the longest code length
+    """
+    max_code_length = max(code_lengths) if code_lengths else 0
+
+    # count the number of code words of each length
+    length_count = [0] * (max_code_length + 1)
+    for code_length in code_lengths:
+        if code_length > 0:
+            length_count[code_length] += 1
+
+    # get the first code word of each length
+    next_code = [0] * (max_code_length + 1)
+    code = 0
+    for code_length in range(1, max_code_length + 1):
+        code = (code + length_count[code_length - 1]) << 1
+        next_code[code_length] = code
+
+    code_words = [None] * len(code_lengths)
+    for symbol in range(len(code_lengths)):
+        code_length = code_lengths[symbol]
+        if code_length > 0:
+            code_words[symbol] = (next_code[code_length], code_length)
+            next_code[code_length] += 1
+
+    return code_words
+
+
 def get_frequency_unique(input_string):
     """
     Description: get the frequency table and the unique characters in input_string
@@ -415,34 +1757,61 @@ def elias(input_num):
         Input: O(1)
         Aux: O(log N), where N is the input_num
     """
+    code_word, code_length = elias_code(input_num)
+    return format(code_word, "0" + str(code_length) + "b")
 
-    # get the bit representation of the input_num
-    input_num_bit = bit_representation(input_num)
 
-    length_of_bits = len(input_num_bit)
+def elias_code(input_num):
+    """
+    Description: get the elias code word for the input_num as an integer and its number of bits, small integers
+                 are looked up in ELIAS_CODE_TABLE
+    Written by: Kuah Jia Chen
+    Input: input_num is a positive integer
+    Return: the elias code word as a (value, number of bits) tuple
+    Time complexity (Worst case) : O(1) for input_num below ELIAS_TABLE_SIZE, otherwise O(log* N), where N is the
+                                   input_num
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    if 0 < input_num < ELIAS_TABLE_SIZE:
+        return ELIAS_CODE_TABLE[input_num]
 
-    ans = []
+    return compute_elias_code(input_num)
 
-    # use the elias formula to get the bits that encode the length of input_num_bit
-    while length_of_bits > 1:
 
-        current_length = length_of_bits - 1
-        current_length_bits = bit_representation(current_length)
-        current_length_bits[0] = '0'
+def compute_elias_code(input_num):
+    """
+    Description: compute the elias code word for the input_num with integer arithmetic, every length component
+                 is (length - 1) in binary with its leading "1" written as "0", placed in front of the previous one
+    Written by: Kuah Jia Chen
+    Input: input_num is a positive integer
+    Return: the elias code word as a (value, number of bits) tuple
+    Time complexity (Worst case) : O(log* N), where N is the input_num
+    Space complexity:
+        Input: O(1)
+        Aux: O(1)
+    """
+    if input_num < 1:
+        raise ValueError("elias code words are only defined for positive integers: " + str(input_num))
 
-        for i in range(len(current_length_bits) - 1, -1, -1):
-            ans.append(current_length_bits[i])
+    code_word = input_num
+    code_length = input_num.bit_length()
+    length_of_bits = code_length
+
+    while length_of_bits > 1:
+        current_length = length_of_bits - 1
+        length_of_bits = current_length.bit_length()
 
-        length_of_bits = len(current_length_bits)
+        # drop the leading "1" of the component and put it in front of the code word
+        code_word |= (current_length ^ (1 << (length_of_bits - 1))) << code_length
+        code_length += length_of_bits
 
-    # reverse the whole list since they are now in reverse order
-    ans = ans[::-1]
+    return code_word, code_length
 
-    # append the input_num_bit to ans
-    for j in range(len(input_num_bit)):
-        ans.append(input_num_bit[j])
 
-    return ''.join(ans)
+# ELIAS_CODE_TABLE[n] is the (value, number of bits) elias code word of n, index 0 is not a valid input
+ELIAS_CODE_TABLE = [None] + [compute_elias_code(n) for n in range(1, ELIAS_TABLE_SIZE)]
 
 
 def bit_representation(num, is_seven=False):
@@ -490,13 +1859,70 @@ def read_file(file_path):
 
 
 if __name__ == '__main__':
-    # # retrieve the file paths from the commandline arguments
-    # _, filename1 = sys.argv
-    # print("Number of arguments passed : ", len(sys.argv))
-    # # since we know the program takes one argument
-    # print("First argument : ", filename1)
-    # file1content = read_file(filename1)
-    # print("\nContent of first file : ", file1content)
-    # input_string = file1content[0]
-    # q2_encoder(input_string, "bwtencoded.bin")
-    print(elias(17))
+    # retrieve the file paths and options from the commandline arguments
+    parser = argparse.ArgumentParser(description="Encode a file using its Burrows-Wheeler Transform")
+    parser.add_argument("input_file")
+    parser.add_argument("-o", "--output", default="bwtencoded.bin")
+    parser.add_argument("--block-size", type=int, default=None,
+                        help="number of bytes in each block of the block container (default: %d, or the one of "
+                             "the compression level)" % DEFAULT_BLOCK_SIZE)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of processes that encode blocks in parallel, 0 uses all cores")
+    parser.add_argument("--mtf", action="store_true",
+                        help="add the move-to-front and zero run stage between the BWT and Huffman coding")
+    parser.add_argument("--fm-index", action="store_true",
+                        help="store an FM-index in every block so that the archive can be searched, it turns off "
+                             "the dedup pre-pass of the compression level")
+    parser.add_argument("--entropy", choices=["huffman", "rans"], default=None,
+                        help="entropy coder of the blocks, rans gets closer to the entropy on skewed symbols "
+                             "(default: huffman, or the one of the compression level)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="replace the long repeats inside each block by back-references before the BWT")
+    parser.add_argument("--append", action="store_true",
+                        help="encode the input file into new blocks at the end of the block container given by "
+                             "--output instead of replacing it")
+    parser.add_argument("-l", "--level", type=int, choices=sorted(COMPRESSION_LEVELS), default=None,
+                        help="compression level, the block size grows from 50 kB at 1 to 900 kB at 9 and 7 to 9 add "
+                             "the dedup pre-pass, the other options override the ones of the level")
+    for level in COMPRESSION_LEVELS:
+        parser.add_argument("-" + str(level), dest="level", action="store_const", const=level,
+                            help=argparse.SUPPRESS)
+    parser.add_argument("--legacy", action="store_true",
+                        help="encode only the first line of a text file, without its line break, into a single "
+                             "stream instead of a block container, for decoders that predate the block container, "
+                             "the stream only holds 7-bit characters greater than $")
+    arguments = parser.parse_args()
+    if arguments.fm_index and arguments.dedup:
+        parser.error("--dedup cannot be combined with --fm-index")
+    if arguments.legacy and (arguments.block_size is not None or arguments.level is not None or arguments.mtf
+                             or arguments.fm_index or arguments.entropy is not None or arguments.dedup
+                             or arguments.append):
+        parser.error("--legacy cannot be combined with the options of the block container")
+
+    # the options of the level are the defaults of the block container
+    options = {"block_size": DEFAULT_BLOCK_SIZE, "move_to_front": False, "entropy_coder": "huffman", "dedup": False}
+    if arguments.level is not None:
+        options = level_options(arguments.level)
+    if arguments.block_size is not None:
+        options["block_size"] = arguments.block_size
+    if arguments.entropy is not None:
+        options["entropy_coder"] = arguments.entropy
+    options["move_to_front"] = options["move_to_front"] or arguments.mtf
+    # an FM-index cannot be built over a deduplicated block, so it turns off the dedup pre-pass of the level
+    if arguments.fm_index and options["dedup"] and not arguments.dedup:
+        print("warning: --fm-index turns off the dedup pre-pass of level " + str(arguments.level), file=sys.stderr)
+        options["dedup"] = False
+    options["dedup"] = options["dedup"] or arguments.dedup
+    options["fm_index"] = arguments.fm_index
+    workers = arguments.workers if arguments.workers > 0 else None
+
+    # every byte of the input is kept by the block container, the legacy stream only keeps the first line and
+    # its line break would sort before the $ terminator
+    if arguments.legacy:
+        file1content = read_file(arguments.input_file)
+        input_string = file1content[0].rstrip("\r\n") if file1content else ""
+        q2_encoder(input_string, arguments.output)
+    elif arguments.append:
+        q2_block_append(arguments.input_file, arguments.output, workers=workers, **options)
+    else:
+        q2_block_encoder(arguments.input_file, arguments.output, workers=workers, **options)
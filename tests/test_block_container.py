@@ -0,0 +1,356 @@
+import importlib.util
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(module_name, file_name):
+    """
+    Description: load one of the standalone scripts of the repository as a module, a script that another test file
+                 already loaded is reused so that every test file sees the same module
+    Written by: Kuah Jia Chen
+    Input: module_name is a string and file_name is the name of the script
+    Return: the loaded module
+    Time complexity (Worst case) : O(S), where S is the size of the script
+    Space complexity:
+        Input: O(1)
+        Aux: O(S), where S is the size of the script
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+encoder = load_script("encoder", "Encoder (Huffman, Eias, BWT).py")
+decoder = load_script("decoder", "Decoder (Huffman, Elias, BWT).py")
+
+
+class TestBlockAppend(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.original = b"the quick brown fox jumps over the lazy dog\n" * 40
+        self.extra = b"pack my box with five dozen liquor jugs\n" * 30
+        self.input_file = os.path.join(self.directory.name, "input.txt")
+        self.extra_file = os.path.join(self.directory.name, "extra.txt")
+        self.archive = os.path.join(self.directory.name, "archive.bin")
+
+        with open(self.input_file, "wb") as file:
+            file.write(self.original)
+        with open(self.extra_file, "wb") as file:
+            file.write(self.extra)
+
+        encoder.q2_block_encoder(self.input_file, self.archive, block_size=500)
+        with open(self.archive, "rb") as file:
+            self.archive_bytes = file.read()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_archive_unchanged(self):
+        with open(self.archive, "rb") as file:
+            self.assertEqual(file.read(), self.archive_bytes)
+        self.assertEqual(decoder.q2_block_decoder(self.archive), self.original)
+
+    def test_append(self):
+        encoder.q2_block_append(self.extra_file, self.archive, block_size=500)
+        self.assertEqual(decoder.q2_block_decoder(self.archive), self.original + self.extra)
+
+    def test_invalid_options_leave_archive_decodable(self):
+        with self.assertRaises(ValueError):
+            encoder.q2_block_append(self.extra_file, self.archive, block_size=500, fm_index=True, dedup=True)
+        self.assert_archive_unchanged()
+
+    def test_failed_encode_leaves_archive_decodable(self):
+        encode_block = encoder.encode_block
+        calls = []
+
+        def failing_encode_block(block, **options):
+            calls.append(len(block))
+            if len(calls) > 1:
+                raise OSError("disk full")
+            return encode_block(block, **options)
+
+        with mock.patch.object(encoder, "encode_block", failing_encode_block):
+            with self.assertRaises(OSError):
+                encoder.q2_block_append(self.extra_file, self.archive, block_size=500)
+        self.assert_archive_unchanged()
+
+        # a later append still works on the old archive
+        encoder.q2_block_append(self.extra_file, self.archive, block_size=500)
+        self.assertEqual(decoder.q2_block_decoder(self.archive), self.original + self.extra)
+
+    def test_failed_index_leaves_archive_decodable(self):
+        with mock.patch.object(encoder, "write_block_index", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                encoder.q2_block_append(self.extra_file, self.archive, block_size=500)
+        self.assert_archive_unchanged()
+
+    def test_failed_copy_leaves_archive_decodable(self):
+        def failing_copyfileobj(source, destination):
+            # half of the new end of the container is written over the old one before the error
+            data = source.read()
+            destination.write(data[:len(data) // 2])
+            raise OSError("disk full")
+
+        with mock.patch.object(encoder.shutil, "copyfileobj", failing_copyfileobj):
+            with self.assertRaises(OSError):
+                encoder.q2_block_append(self.extra_file, self.archive, block_size=500)
+        self.assert_archive_unchanged()
+
+        encoder.q2_block_append(self.extra_file, self.archive, block_size=500)
+        self.assertEqual(decoder.q2_block_decoder(self.archive), self.original + self.extra)
+
+
+class TestRoundTrip(unittest.TestCase):
+
+    # the options of q2_block_encoder that every input is encoded with
+    OPTIONS = [{}, {"move_to_front": True}, {"entropy_coder": "rans"}, {"move_to_front": True, "entropy_coder": "rans"},
+               {"dedup": True}, {"fm_index": True}]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.directory.name, "input.bin")
+        self.archive = os.path.join(self.directory.name, "archive.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_round_trip(self, data, block_sizes=(7, 1000)):
+        with open(self.input_file, "wb") as file:
+            file.write(data)
+
+        for block_size in block_sizes:
+            for options in self.OPTIONS:
+                encoder.q2_block_encoder(self.input_file, self.archive, block_size=block_size, **options)
+                self.assertEqual(decoder.q2_block_decoder(self.archive), data, (block_size, options))
+
+    def test_all_byte_values(self):
+        self.assert_round_trip(bytes(range(256)))
+        self.assert_round_trip(bytes(range(255, -1, -1)) * 3 + b"\x00\xff" * 50)
+
+    def test_empty_input(self):
+        self.assert_round_trip(b"")
+
+    def test_one_byte_input(self):
+        for data in [b"\x00", b"a", b"\xff"]:
+            self.assert_round_trip(data, block_sizes=(1, 1000))
+
+
+class TestRans(unittest.TestCase):
+
+    def assert_symbols_round_trip(self, symbols, alphabet_size):
+        buffer = io.BytesIO()
+        output_binary_stream = encoder.BitWriter(buffer)
+        encoder.write_rans_symbols(symbols, alphabet_size, output_binary_stream)
+        output_binary_stream.pack_to_file_last_byte()
+
+        self.assertEqual(list(decoder.read_rans_symbols(decoder.BitReader(buffer.getvalue()), alphabet_size)), symbols)
+
+    def assert_block_round_trip(self, block):
+        for move_to_front in [False, True]:
+            flags, payload = encoder.encode_block(block, move_to_front=move_to_front, entropy_coder="rans")
+            self.assertEqual(decoder.decode_block(payload, flags), block)
+
+    def test_skewed_distribution(self):
+        rng = random.Random(1016)
+        # one symbol has 99% of the probability, so the others get the smallest scaled frequencies
+        symbols = [0 if rng.random() < 0.99 else rng.randrange(1, 200) for _ in range(20000)]
+        self.assert_symbols_round_trip(symbols, 200)
+        self.assert_block_round_trip(bytes(symbols))
+
+    def test_one_symbol_distribution(self):
+        self.assert_symbols_round_trip([3] * 1000, 5)
+        self.assert_symbols_round_trip([0], 1)
+        self.assert_block_round_trip(b"a" * 5000)
+        self.assert_block_round_trip(b"\xff")
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_repeats_around_the_minimum_match(self):
+        rng = random.Random(1019)
+        for repeat_length in [encoder.DEDUP_MIN_MATCH - 1, encoder.DEDUP_MIN_MATCH, encoder.DEDUP_MIN_MATCH + 1]:
+            repeat = bytes(rng.randrange(256) for _ in range(repeat_length))
+            block = repeat + bytes(rng.randrange(256) for _ in range(40)) + repeat
+
+            literals, matches = encoder.long_match_dedup(block)
+            if repeat_length < encoder.DEDUP_MIN_MATCH:
+                self.assertEqual(matches, [])
+            else:
+                self.assertEqual(matches, [(repeat_length + 40, 0, repeat_length)])
+            self.assertEqual(decoder.restore_long_matches(literals, matches), block)
+
+            flags, payload = encoder.encode_block(block, dedup=True)
+            self.assertEqual(bool(flags & encoder.FLAG_DEDUP), repeat_length >= encoder.DEDUP_MIN_MATCH)
+            self.assertEqual(decoder.decode_block(payload, flags), block)
+
+    def test_overlapping_repeat(self):
+        # a back-reference may copy the bytes it is writing
+        block = b"x" + b"ab" * 100 + b"y"
+        literals, matches = encoder.long_match_dedup(block)
+        self.assertEqual(matches, [(3, 1, 198)])
+        self.assertEqual(decoder.restore_long_matches(literals, matches), block)
+        flags, payload = encoder.encode_block(block, dedup=True)
+        self.assertEqual(decoder.decode_block(payload, flags), block)
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.directory.name, "input.bin")
+        self.archive = os.path.join(self.directory.name, "archive.bin")
+        self.recovered = os.path.join(self.directory.name, "recovered.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_script(self, file_name, *arguments):
+        return subprocess.run([sys.executable, os.path.join(ROOT, file_name)] + list(arguments),
+                              capture_output=True, text=True)
+
+    def test_default_is_the_block_container(self):
+        data = b"first line\nsecond line\r\n" + bytes(range(256))
+        with open(self.input_file, "wb") as file:
+            file.write(data)
+
+        self.assertEqual(self.run_script("Encoder (Huffman, Eias, BWT).py", self.input_file, "-o", self.archive)
+                         .returncode, 0)
+        with open(self.archive, "rb") as file:
+            self.assertEqual(file.read(len(encoder.CONTAINER_MAGIC)), encoder.CONTAINER_MAGIC)
+
+        self.assertEqual(self.run_script("Decoder (Huffman, Elias, BWT).py", self.archive, "-o", self.recovered)
+                         .returncode, 0)
+        with open(self.recovered, "rb") as file:
+            self.assertEqual(file.read(), data)
+
+    def test_legacy_stream(self):
+        with open(self.input_file, "w") as file:
+            file.write("banana\nignored line\n")
+
+        self.assertEqual(self.run_script("Encoder (Huffman, Eias, BWT).py", self.input_file, "--legacy", "-o",
+                                         self.archive).returncode, 0)
+        self.assertEqual(self.run_script("Decoder (Huffman, Elias, BWT).py", self.archive, "-o", self.recovered)
+                         .returncode, 0)
+        with open(self.recovered) as file:
+            self.assertEqual(file.read(), "banana")
+
+        result = self.run_script("Encoder (Huffman, Eias, BWT).py", self.input_file, "--legacy", "--mtf")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--legacy cannot be combined", result.stderr)
+
+    def test_fm_index_turns_off_the_dedup_of_a_level(self):
+        data = b"the quick brown fox jumps over the lazy dog\n" * 20
+        with open(self.input_file, "wb") as file:
+            file.write(data)
+
+        # level 9 has the dedup pre-pass, which cannot be combined with the FM-index
+        result = self.run_script("Encoder (Huffman, Eias, BWT).py", self.input_file, "-9", "--fm-index", "-o",
+                                 self.archive)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("warning: --fm-index turns off the dedup pre-pass of level 9", result.stderr)
+        self.assertEqual(decoder.FMArchive(self.archive).count(b"fox"), 20)
+
+        # level 1 has no dedup pre-pass, so there is nothing to turn off
+        result = self.run_script("Encoder (Huffman, Eias, BWT).py", self.input_file, "-1", "--fm-index", "-o",
+                                 self.archive)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stderr, "")
+
+        result = self.run_script("Encoder (Huffman, Eias, BWT).py", self.input_file, "-9", "--fm-index", "--dedup")
+        self.assertEqual(result.returncode, 2)
+
+
+def brute_force_locate(data, pattern):
+    """
+    Description: find all occurrences of the pattern in the data by comparing it at every offset
+    Written by: Kuah Jia Chen
+    Input: data and pattern are bytes objects
+    Return: a sorted list of the 0-based positions of the occurrences
+    Time complexity (Worst case) : O(N * M), where N is the length of data and M is the length of pattern
+    Space complexity:
+        Input: O(N + M), where N is the length of data and M is the length of pattern
+        Aux: O(D), where D is the number of occurrences
+    """
+    return [i for i in range(len(data) - len(pattern) + 1) if data[i:i + len(pattern)] == pattern]
+
+
+class TestFMIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.directory.name, "input.bin")
+        self.archive = os.path.join(self.directory.name, "archive.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def encode(self, data, block_size, **options):
+        with open(self.input_file, "wb") as file:
+            file.write(data)
+        encoder.q2_block_encoder(self.input_file, self.archive, block_size=block_size, fm_index=True, **options)
+
+    def assert_queries(self, data, patterns, cache_size=decoder.DEFAULT_FM_CACHE_SIZE):
+        archive = decoder.FMArchive(self.archive, cache_size=cache_size)
+        for pattern in patterns:
+            expected = brute_force_locate(data, pattern)
+            self.assertEqual(archive.locate(pattern), expected, pattern)
+            self.assertEqual(archive.count(pattern), len(expected), pattern)
+            self.assertLessEqual(len(archive.cache), cache_size)
+        self.assertEqual(decoder.fm_count(self.archive, patterns[0]), len(brute_force_locate(data, patterns[0])))
+        self.assertEqual(decoder.fm_locate(self.archive, patterns[0]), brute_force_locate(data, patterns[0]))
+
+    def test_matches_across_block_boundaries(self):
+        data = b"abcdefghij" * 7
+        self.encode(data, 16)
+        # the 3 bytes on each side of every boundary
+        patterns = [data[boundary - 3:boundary + 3] for boundary in range(16, len(data), 16)]
+        # a pattern longer than a block crosses two boundaries
+        patterns += [data[10:50], b"j", b"ja", b"jab", b"xyz"]
+        self.assert_queries(data, patterns)
+        self.assert_queries(data, patterns, cache_size=1)
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(1013)
+        for trial in range(12):
+            alphabet = [b"ab", b"acgt", bytes(range(256))][trial % 3]
+            data = bytes(rng.choice(alphabet) for _ in range(rng.randint(1, 600)))
+            block_size = rng.choice([7, 64, 250, 1000])
+            self.encode(data, block_size, move_to_front=trial % 2 == 0, fm_sample_rate=rng.choice([1, 4, 32]))
+
+            patterns = []
+            for _ in range(10):
+                start = rng.randrange(len(data))
+                patterns.append(data[start:start + rng.choice([1, 2, 5, 20, 80])])
+            self.assert_queries(data, patterns, cache_size=rng.choice([1, 2, 4]))
+
+            archive = decoder.FMArchive(self.archive)
+            for _ in range(10):
+                start = rng.randint(0, len(data))
+                end = rng.randint(start, len(data))
+                self.assertEqual(archive.extract(start, end), data[start:end])
+
+    def test_block_without_fm_index(self):
+        with open(self.input_file, "wb") as file:
+            file.write(b"no index here")
+        encoder.q2_block_encoder(self.input_file, self.archive, block_size=4)
+        with self.assertRaises(ValueError):
+            decoder.FMArchive(self.archive)
+
+
+if __name__ == '__main__':
+    unittest.main()
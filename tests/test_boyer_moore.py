@@ -0,0 +1,168 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Boyer_Moore
+
+
+def brute_force_search(text, pattern):
+    """
+    Description: find all occurrences of the pattern in the text by comparing it at every offset
+    Written by: Kuah Jia Chen
+    Input: text is a string and pattern is a string that can contain at most 1 wildcard character
+    Return: a list that contains the matched indices
+    Time complexity (Worst case) : O(N * M), where N is the length of the text and M is the length of pattern
+    Space complexity:
+        Input: O(N + M), where N is the length of the text and M is the length of the pattern
+        Aux: O(D), where D is the number of matched indices
+    """
+    if not pattern:
+        return []
+
+    return [i for i in range(len(text) - len(pattern) + 1)
+            if all(pattern[j] == "." or text[i + j] == pattern[j] for j in range(len(pattern)))]
+
+
+class TestWildcardSearch(unittest.TestCase):
+
+    def test_shift_after_match(self):
+        # the wildcard lets the pattern agree with itself at a smaller shift than the matched prefix
+        self.assertEqual(Boyer_Moore.q2("bbbbabbabbbabbbaaa", "b.bba"), [0, 3])
+        self.assertEqual(Boyer_Moore.q2("bbbbabba", "b.bba"), [0, 3])
+        self.assertEqual(Boyer_Moore.q2("bbaabbaaabaaaa", "a.baaa"), [3, 7])
+        self.assertEqual(Boyer_Moore.q2("aaaaaabaaabbabab", "a.aaab"), [1, 5])
+
+    def test_matched_prefix_shift_stops_at_wildcard(self):
+        self.assertEqual(Boyer_Moore.q2("babbaababbabab", "b.aba"), [3, 8])
+
+    def test_wildcard_in_matched_suffix(self):
+        self.assertEqual(Boyer_Moore.q2("babaaaaaabbbbbaa", "baa.aaa"), [2])
+
+    def test_match_shift(self):
+        self.assertEqual(Boyer_Moore.match_shift("b.bba", Boyer_Moore.matched_prefix_array("b.bba"), 1), 3)
+        self.assertEqual(Boyer_Moore.match_shift("abc", Boyer_Moore.matched_prefix_array("abc"), None), 3)
+        self.assertEqual(Boyer_Moore.match_shift("a.a", Boyer_Moore.matched_prefix_array("a.a"), 1), 1)
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(3155)
+        for _ in range(5000):
+            alphabet = rng.choice(["a", "ab", "abc"])
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40)))
+            pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 9)))
+            if rng.random() < 0.8:
+                wildcard_index = rng.randint(0, len(pattern))
+                pattern = pattern[:wildcard_index] + "." + pattern[wildcard_index:]
+            self.assertEqual(Boyer_Moore.q2(text, pattern), brute_force_search(text, pattern), (text, pattern))
+
+
+class TestMultiPatternSearch(unittest.TestCase):
+
+    def test_wildcard_at_the_ends(self):
+        self.assertEqual(Boyer_Moore.multi_pattern_search("abab", [".", "a.", ".b"]),
+                         [(0, 0), (1, 0), (2, 0), (0, 1), (0, 2), (1, 2), (2, 2), (0, 3)])
+        self.assertEqual(Boyer_Moore.multi_pattern_search("aaaa", ["aaa.", "aaa."]), [(0, 0), (1, 0)])
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(676)
+        for _ in range(2000):
+            alphabet = rng.choice(["a", "ab", "abc"])
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            patterns = []
+            for _ in range(rng.randint(1, 4)):
+                pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 5)))
+                if rng.random() < 0.7:
+                    wildcard_index = rng.randint(0, len(pattern))
+                    pattern = pattern[:wildcard_index] + "." + pattern[wildcard_index:]
+                patterns.append(pattern)
+
+            expected = [(pattern_id, offset) for offset in range(len(text)) for pattern_id in range(len(patterns))
+                        if offset in brute_force_search(text, patterns[pattern_id])]
+            self.assertEqual(Boyer_Moore.multi_pattern_search(text, patterns), expected, (text, patterns))
+
+
+class TestPatternCache(unittest.TestCase):
+
+    def test_hits_and_eviction(self):
+        cache = Boyer_Moore.PatternCache(2)
+        first = cache.get("ab.")
+        self.assertIs(cache.get("ab."), first)
+        cache.get("cd")
+        # "ab." is the most recently used, so "cd" is evicted
+        cache.get("ab.")
+        cache.get("ef")
+        self.assertEqual(cache.info(), {"hits": 2, "misses": 3, "size": 2, "max_size": 2})
+        self.assertIs(cache.get("ab."), first)
+        cache.get("cd")
+        self.assertEqual(cache.info(), {"hits": 3, "misses": 4, "size": 2, "max_size": 2})
+
+        cache.clear()
+        self.assertEqual(cache.info(), {"hits": 0, "misses": 0, "size": 0, "max_size": 2})
+        with self.assertRaises(ValueError):
+            Boyer_Moore.PatternCache(0)
+
+    def test_compiled_pattern_is_immutable(self):
+        compiled_pattern = Boyer_Moore.compile("a.c")
+        with self.assertRaises(AttributeError):
+            compiled_pattern.pattern = "abc"
+        self.assertEqual(compiled_pattern.search("abcaxc"), [0, 3])
+
+
+class TestFileSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.text_file = os.path.join(self.directory.name, "text.txt")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_text(self, text):
+        with open(self.text_file, "w", encoding="latin-1") as file:
+            file.write(text)
+
+    def test_matches_on_chunk_edges(self):
+        # with a chunk of 4 bytes, the occurrences of "abab" start at every offset modulo 4
+        text = "ab" * 12
+        self.write_text(text)
+        for chunk_size in range(1, 9):
+            self.assertEqual(list(Boyer_Moore.iter_file_search(self.text_file, "abab", chunk_size)),
+                             brute_force_search(text, "abab"), chunk_size)
+            self.assertEqual(list(Boyer_Moore.iter_file_search(self.text_file, "b.b", chunk_size)),
+                             brute_force_search(text, "b.b"), chunk_size)
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(2425)
+        for _ in range(60):
+            alphabet = rng.choice(["ab", "abc"])
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 5)))
+            wildcard_index = rng.randint(0, len(pattern))
+            pattern = pattern[:wildcard_index] + "." + pattern[wildcard_index:]
+            self.write_text(text)
+
+            chunk_size = rng.randint(1, 10)
+            self.assertEqual(list(Boyer_Moore.iter_file_search(self.text_file, pattern, chunk_size)),
+                             brute_force_search(text, pattern), (text, pattern, chunk_size))
+
+    def test_parallel_search_on_partition_edges(self):
+        rng = random.Random(2525)
+        text = "".join(rng.choice("ab") for _ in range(300))
+        self.write_text(text)
+        for pattern in ["abba", "a.b", ".ab", "ab.", "b"]:
+            for partition_size in [1, 7, 64]:
+                self.assertEqual(list(Boyer_Moore.parallel_file_search(self.text_file, pattern, workers=2,
+                                                                       chunk_size=5,
+                                                                       partition_size=partition_size)),
+                                 brute_force_search(text, pattern), (pattern, partition_size))
+
+        # a single worker falls back to the streaming search
+        self.assertEqual(list(Boyer_Moore.parallel_file_search(self.text_file, "abba", workers=1, chunk_size=3)),
+                         brute_force_search(text, "abba"))
+
+
+if __name__ == '__main__':
+    unittest.main()
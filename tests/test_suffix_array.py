@@ -0,0 +1,68 @@
+import importlib.util
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(module_name, file_name):
+    """
+    Description: load one of the standalone scripts of the repository as a module, a script that another test file
+                 already loaded is reused so that every test file sees the same module
+    Written by: Kuah Jia Chen
+    Input: module_name is a string and file_name is the name of the script
+    Return: the loaded module
+    Time complexity (Worst case) : O(S), where S is the size of the script
+    Space complexity:
+        Input: O(1)
+        Aux: O(S), where S is the size of the script
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+encoder = load_script("encoder", "Encoder (Huffman, Eias, BWT).py")
+
+
+class TestSuffixArray(unittest.TestCase):
+
+    def assert_same_as_naive(self, text):
+        self.assertEqual(encoder.suffix_array_for_string(text, "sa_is"), encoder.suffix_array_for_string(text, "naive"),
+                         text)
+        self.assertEqual(encoder.bwt(text, "sa_is"), encoder.bwt(text, "naive"), text)
+
+    def test_random(self):
+        rng = random.Random(1001)
+        for _ in range(300):
+            alphabet = rng.choice(["ab", "acgt", "abcdefghijklmnopqrstuvwxyz"])
+            self.assert_same_as_naive("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 120))))
+
+    def test_periodic(self):
+        for period in ["ab", "aab", "abb", "abcab", "mississippi"]:
+            for repeats in [1, 2, 5, 17]:
+                self.assert_same_as_naive(period * repeats)
+                self.assert_same_as_naive(period * repeats + period[:-1])
+
+    def test_single_symbol(self):
+        for length in [1, 2, 3, 8, 100]:
+            self.assert_same_as_naive("a" * length)
+
+    def test_bytes(self):
+        rng = random.Random(1002)
+        for _ in range(50):
+            block = bytes(rng.choice([0, 1, 255]) for _ in range(rng.randint(1, 80)))
+            self.assertEqual(encoder.sais_suffix_array(list(block), 256),
+                             sorted(range(len(block)), key=lambda i: block[i:]), block)
+
+
+if __name__ == '__main__':
+    unittest.main()